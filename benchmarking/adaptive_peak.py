@@ -0,0 +1,71 @@
+# compare an adaptive sweep with a uniform one for finding a narrow peak
+# run with: python adaptive_peak.py <measurement time (ms)>
+# default 1 ms per measurement
+#
+# The toy model is a Lorentzian peak on a flat background. The uniform
+# sweep uses the adaptive sweep's smallest step everywhere, so both resolve
+# the peak equally well, but the adaptive sweep (docs/examples) only takes
+# small steps where the signal changes.
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from qcodes.instrument.parameter import ManualParameter, Parameter
+from qcodes.loops import Loop
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'docs',
+                                'examples'))
+from adaptive_sweep import AdaptiveSweep  # noqa: E402
+
+
+timer = time.perf_counter
+
+START, STOP = 0, 10
+CENTER, WIDTH = 6.2834, 0.05
+MAX_STEP = 0.05
+MIN_STEP = 0.001
+
+
+class PeakSignal(Parameter):
+    def __init__(self, x, measure_time):
+        super().__init__(name='signal')
+        self._x = x
+        self._measure_time = measure_time
+
+    def get(self):
+        time.sleep(self._measure_time)
+        dx = (self._x.get() - CENTER) / WIDTH
+        return 1 / (1 + dx * dx)
+
+
+def run_sweep(sweep, signal):
+    t0 = timer()
+    data = Loop(sweep).each(signal).run_temp()
+    elapsed = timer() - t0
+    x, y = data.arrays['x_set'].ndarray, data.arrays['signal'].ndarray
+    peak = x[np.nanargmax(y)]
+    return len(x), elapsed, abs(peak - CENTER)
+
+
+def run_all(measure_time):
+    x = ManualParameter('x')
+    signal = PeakSignal(x, measure_time)
+
+    print('{:>10} {:>8} {:>10} {:>16}'.format(
+        'sweep', 'points', 'time (s)', 'peak error'))
+    sweeps = (
+        ('uniform', x[START:STOP + MIN_STEP / 2:MIN_STEP]),
+        ('adaptive', AdaptiveSweep(x, START, STOP, target_delta=0.02,
+                                   max_step=MAX_STEP, min_step=MIN_STEP))
+    )
+    for name, sweep in sweeps:
+        print('{:>10} {:8d} {:10.3f} {:16.5f}'.format(
+            name, *run_sweep(sweep, signal)))
+
+
+if __name__ == '__main__':
+    ms = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    run_all(ms * 1e-3)
@@ -0,0 +1,109 @@
+# compare DataSet.store latency with and without write_in_background
+# run with: python background_write.py <rows> <row_length> <write_period>
+#                                       <point_time>
+# rows: number of rows (outer loop), default 200
+# row_length: points per row (inner loop), default 500
+# write_period: seconds between writes, default 0.2
+# point_time: seconds spent "measuring" each point, default 1e-4
+#
+# every point is stored separately, like in a Loop, and we time each
+# store call. With synchronous writes the calls that trigger a write take
+# as long as the write itself, in the background they shouldn't.
+# The measurement is simulated by waiting without holding the GIL, like
+# instrument communication does, which is when the writer thread can run.
+# With point_time=0 the writer can only run by taking the GIL from the
+# loop, so there is much less to gain.
+
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from qcodes.data.data_array import DataArray
+from qcodes.data.data_set import new_data
+from qcodes.data.gnuplot_format import GNUPlotFormat
+from qcodes.data.hdf5_format import HDF5Format
+from qcodes.data.io import DiskIO
+
+
+timer = time.perf_counter
+
+FORMATTERS = [
+    ('GNUPlotFormat', GNUPlotFormat),
+    ('HDF5Format', HDF5Format)
+]
+
+
+def make_arrays(rows, row_length):
+    x = DataArray(name='x', shape=(rows,), is_setpoint=True)
+    y = DataArray(name='y', shape=(rows, row_length), set_arrays=(x,),
+                  is_setpoint=True)
+    z = DataArray(name='z', shape=(rows, row_length), set_arrays=(x, y))
+    return x, y, z
+
+
+def measure(point_time):
+    t0 = timer()
+    while timer() - t0 < point_time:
+        time.sleep(0)
+
+
+def run_one(name, formatter, io, rows, row_length, write_period,
+            point_time, background):
+    location = '{}_{}'.format(name, 'background' if background else 'sync')
+    data_set = new_data(arrays=make_arrays(rows, row_length),
+                        location=location, io=io, formatter=formatter,
+                        write_period=write_period,
+                        write_in_background=background)
+
+    store_times = np.zeros(rows * row_length)
+    values = np.random.rand(rows, row_length)
+    i = 0
+    t_start = timer()
+    for row in range(rows):
+        data_set.store((row,), {'x_set': row})
+        for col in range(row_length):
+            t0 = timer()
+            data_set.store((row, col), {'y_set': col,
+                                        'z': values[row, col]})
+            store_times[i] = timer() - t0
+            i += 1
+            measure(point_time)
+    loop_time = timer() - t_start
+
+    t0 = timer()
+    data_set.finalize()
+    finalize_time = timer() - t0
+
+    store_times *= 1e6
+    slow = store_times[store_times > 1000]
+    print('{:14} {:11} {:8.1f} {:8.1f} {:8.0f} {:7d} {:10.1f} {:9.3f} '
+          '{:9.3f}'.format(name, 'background' if background else 'sync',
+                           np.median(store_times), store_times.std(),
+                           store_times.max(), slow.size, slow.sum() / 1000,
+                           loop_time, finalize_time))
+
+
+def run_all(rows, row_length, write_period, point_time):
+    print('{} rows of {} points, write_period {} s, point_time {} s\n'
+          .format(rows, row_length, write_period, point_time))
+    print('store times in us, and the number and total time (ms) of '
+          'stores over 1 ms\n')
+    print('{:14} {:11} {:>8} {:>8} {:>8} {:>7} {:>10} {:>9} {:>9}'.format(
+        'formatter', 'writes', 'median', 'std', 'max', '>1ms',
+        '>1ms (ms)', 'loop (s)', 'final (s)'))
+
+    with tempfile.TemporaryDirectory() as base_location:
+        io = DiskIO(base_location)
+        for name, formatter_class in FORMATTERS:
+            for background in (False, True):
+                run_one(name, formatter_class(), io, rows, row_length,
+                        write_period, point_time, background)
+
+
+if __name__ == '__main__':
+    args = [float(arg) for arg in sys.argv[1:]]
+    defaults = [200, 500, 0.2, 1e-4]
+    rows, row_length, write_period, point_time = args + defaults[len(args):]
+    run_all(int(rows), int(row_length), write_period, point_time)
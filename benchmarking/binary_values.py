@@ -0,0 +1,60 @@
+# reading a ZNB20 trace as a binary block vs. as ascii, through a
+# simulated instrument (needs pyvisa-sim)
+# run with: python binary_values.py <repeats>
+# repeats: reads per trace length, default 20
+#
+# For each trace length, times ask_binary_values('CALC:DATA? SDAT') against
+# ask('CALC:DATA:ASCII? SDAT') plus parsing the text, and prints the best
+# of the repeats. The simulated instrument has no real transfer time, so
+# this mostly shows the parsing cost.
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from qcodes.tests.test_visa import make_sim_file, SimZNB20
+
+
+timer = time.perf_counter
+
+
+def best_time(func, repeats):
+    times = []
+    for i in range(repeats):
+        t0 = timer()
+        func()
+        times.append(timer() - t0)
+    return min(times)
+
+
+def time_trace(npts, repeats):
+    values, sim_file = make_sim_file(npts)
+    znb = SimZNB20('znb20_{}'.format(npts), address='TCPIP::znb20::INSTR',
+                   sim_file=sim_file, terminator='\n', server_name=None)
+    try:
+        def read_ascii():
+            text = znb.ask('CALC:DATA:ASCII? SDAT')
+            return np.array([float(v) for v in text.split(',')])
+
+        binary = best_time(
+            lambda: znb.ask_binary_values('CALC:DATA? SDAT'), repeats)
+        ascii = best_time(read_ascii, repeats)
+    finally:
+        znb.close()
+        os.remove(sim_file)
+    return binary, ascii
+
+
+def run_all(repeats):
+    print('{:>8} {:>12} {:>12} {:>6}'.format(
+        'points', 'binary (ms)', 'ascii (ms)', 'ratio'))
+    for npts in (201, 2001, 20001):
+        binary, ascii = time_trace(npts, repeats)
+        print('{:8d} {:12.3f} {:12.3f} {:6.1f}'.format(
+            npts, binary * 1e3, ascii * 1e3, ascii / binary))
+
+
+if __name__ == '__main__':
+    run_all(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,95 @@
+# compare HDF5Format storage settings on a time-trace dataset
+# run with: python hdf5_compression.py <traces> <trace_length> <rows_per_write>
+# traces: number of traces (outer loop), default 200
+# trace_length: points per trace (inner loop), default 10000
+# rows_per_write: traces acquired between writes, default 10
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from qcodes.data.data_array import DataArray
+from qcodes.data.data_set import new_data
+from qcodes.data.hdf5_format import HDF5Format
+from qcodes.data.io import DiskIO
+
+
+timer = time.perf_counter
+
+SETTINGS = [
+    ('default', {}),
+    ('lzf', {'compression': 'lzf'}),
+    ('lzf+shuffle', {'compression': 'lzf', 'shuffle': True}),
+    ('gzip', {'compression': 'gzip'}),
+    ('gzip+shuffle', {'compression': 'gzip', 'shuffle': True}),
+    ('gzip1+shuffle', {'compression': 'gzip', 'compression_opts': 1,
+                       'shuffle': True}),
+    ('float32', {'dtypes': {'signal': 'float32'}}),
+    ('float32+lzf+shuffle', {'dtypes': {'signal': 'float32'},
+                             'compression': 'lzf', 'shuffle': True}),
+]
+
+
+def make_traces(traces, trace_length):
+    """
+    Something like digitizer output: a slowly varying signal plus noise,
+    quantized to 14 bits.
+    """
+    t = np.linspace(0, 1e-3, trace_length)
+    signal = (np.sin(2 * np.pi * 5e3 * t) +
+              0.1 * np.random.randn(traces, trace_length))
+    return t, np.round(signal * 2**13) / 2**13
+
+
+def run_one(name, options, io, t, signal, rows_per_write):
+    traces, trace_length = signal.shape
+
+    rep = DataArray(name='rep', preset_data=np.arange(traces, dtype=float),
+                    is_setpoint=True)
+    time_set = DataArray(name='time', preset_data=t, is_setpoint=True)
+    time_set.nest(traces, 0, rep)
+    data_array = DataArray(name='signal', shape=(traces, trace_length),
+                           set_arrays=(rep, time_set))
+
+    formatter = HDF5Format(**options)
+    data_set = new_data(arrays=(rep, time_set, data_array), location=name,
+                        io=io, formatter=formatter)
+    data_set.signal.init_data()
+
+    t0 = timer()
+    for i in range(0, traces, rows_per_write):
+        data_set.signal[i:i + rows_per_write] = signal[i:i + rows_per_write]
+        formatter.write(data_set)
+    formatter.close_file(data_set)
+    write_time = timer() - t0
+
+    path = formatter._filepath_from_location(name, io)
+    size = os.path.getsize(path)
+
+    # the inner (time) setpoint array has the full 2D shape too
+    raw_size = sum(array.ndarray.size * 8 for array in
+                   data_set.arrays.values())
+    print('{:22} {:10.3f} {:14.3g} {:12.2f} {:8.2f}'.format(
+        name, write_time, signal.size / write_time, size / 2**20,
+        raw_size / size))
+
+
+def run_all(traces, trace_length, rows_per_write):
+    t, signal = make_traces(traces, trace_length)
+    print('{} traces of {} points, writing every {} traces\n'.format(
+        traces, trace_length, rows_per_write))
+    print('{:22} {:>10} {:>14} {:>12} {:>8}'.format(
+        'setting', 'write (s)', 'points/s', 'size (MiB)', 'ratio'))
+
+    with tempfile.TemporaryDirectory() as base_location:
+        io = DiskIO(base_location)
+        for name, options in SETTINGS:
+            run_one(name, options, io, t, signal, rows_per_write)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    run_all(*(args + [200, 10000, 10][len(args):]))
@@ -0,0 +1,58 @@
+# time the per-point overhead of a nested Loop, with the loop plan compiled
+# once per run vs. recompiled every time the inner loop starts, like the
+# loop used to do
+# run with: python loop_overhead.py <outer> <inner>
+# default: 1000 x 10 and 100 x 1000 points. The sweep is a no-op
+# ManualParameter sweep measuring two ManualParameters, so the shorter the
+# inner loop, the more the compiling shows.
+
+import sys
+import time
+
+from qcodes.actions import _Nest
+from qcodes.instrument.parameter import ManualParameter
+from qcodes.loops import Loop
+
+
+timer = time.perf_counter
+
+
+def time_loop(outer, inner, buffer_rows):
+    x = ManualParameter('x')
+    y = ManualParameter('y')
+    m1 = ManualParameter('m1', initial_value=1)
+    m2 = ManualParameter('m2', initial_value=2)
+    loop = Loop(x[0:outer:1]).loop(y[0:inner:1]).each(m1, m2)
+    t0 = timer()
+    loop.run_temp(buffer_rows=buffer_rows)
+    return (timer() - t0) / (outer * inner)
+
+
+def time_recompile(outer, inner, buffer_rows):
+    # run the inner loop without its plan, so it compiles a new one
+    nest_call = _Nest.__call__
+    _Nest.__call__ = lambda self, **kwargs: self.inner_loop._run_loop(
+        action_indices=self.action_indices, **kwargs)
+    try:
+        return time_loop(outer, inner, buffer_rows)
+    finally:
+        _Nest.__call__ = nest_call
+
+
+def run_all(outer, inner):
+    print('{} x {} points'.format(outer, inner))
+    print('{:>12} {:>16} {:>16}'.format(
+        'buffer_rows', 'recompile (us)', 'compiled (us)'))
+    for buffer_rows in (False, True):
+        print('{:>12} {:16.2f} {:16.2f}'.format(
+            str(buffer_rows),
+            time_recompile(outer, inner, buffer_rows) * 1e6,
+            time_loop(outer, inner, buffer_rows) * 1e6))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        run_all(int(sys.argv[1]), int(sys.argv[2]))
+    else:
+        run_all(1000, 10)
+        run_all(100, 1000)
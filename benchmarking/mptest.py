@@ -4,14 +4,21 @@
 # period: milliseconds to wait between calling each process
 # repetitions: how many times to call each one
 # start_method: multiprocessing method to use (fork, forkserver, spawn)
+#
+# then ServerManager round trips with each transport: latency of single
+# asks, and throughput of asks (one thread, and several threads at once)
+# and of writes
 
 import multiprocessing as mp
 import sys
 import os
 import psutil
+import threading
 import time
 
 import qcodes as qc
+from qcodes.process.server import ServerManager, BaseServer
+from qcodes.process.transport import SocketTransport
 
 
 timer = time.perf_counter
@@ -75,6 +82,67 @@ def format_memory(mem):
             '').format(**mem)
 
 
+class EchoServer(BaseServer):
+    def __init__(self, query_queue, response_queue, extras=None):
+        super().__init__(query_queue, response_queue, extras)
+        self.run_event_loop()
+
+    def handle_echo(self, value=None):
+        return value
+
+
+def time_transport(name, transport, reps, thread_count=4):
+    manager = ServerManager(name='echo', server_class=EchoServer,
+                            transport=transport)
+    manager.ask('echo')  # wait for the server to start
+
+    delays = []
+    for i in range(reps):
+        t1 = timer()
+        manager.ask('echo', i)
+        delays.append((timer() - t1) * 1000)
+    delays.sort()
+
+    t1 = timer()
+    for i in range(reps):
+        manager.ask('echo', i)
+    ask_rate = reps / (timer() - t1)
+
+    def ask_many():
+        for i in range(reps):
+            manager.ask('echo', i)
+
+    threads = [threading.Thread(target=ask_many) for _ in range(thread_count)]
+    t1 = timer()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    threaded_rate = reps * thread_count / (timer() - t1)
+
+    t1 = timer()
+    for i in range(reps):
+        manager.write('echo', i)
+    manager.ask('echo')  # all the writes have been handled
+    write_rate = reps / (timer() - t1)
+
+    manager.close()
+
+    print('{:8} {:9.4f} {:9.4f} {:9.4f} {:10.0f} {:12.0f} {:10.0f}'.format(
+        name, sum(delays) / reps, delays[reps // 2], delays[-1], ask_rate,
+        threaded_rate, write_rate))
+
+
+def time_transports(reps, thread_count=4):
+    print('ServerManager round trips, {} of each\n'.format(reps))
+    print('milliseconds per ask, and queries per second')
+    print('{:8} {:>9} {:>9} {:>9} {:>10} {:>12} {:>10}'.format(
+        'transport', 'avg', 'median', 'max', 'asks/s',
+        'asks/s ({}th)'.format(thread_count), 'writes/s'))
+    time_transport('Queue', None, reps, thread_count)
+    time_transport('socket', SocketTransport(), reps, thread_count)
+
+
 if __name__ == '__main__':
     proc_count = int(sys.argv[-4])
     period = float(sys.argv[-3])
@@ -154,3 +222,5 @@ if __name__ == '__main__':
     # report on the memory results
     for m in mem:
         print(format_memory(m))
+
+    time_transports(max(reps, 1000))
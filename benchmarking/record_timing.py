@@ -0,0 +1,43 @@
+# per-point cost of Loop(...).run(record_timing=True), and what it records
+# run with: python record_timing.py <points>
+# points: number of loop points, default 10000
+#
+# The sweep is a no-op ManualParameter sweep measuring two ManualParameters,
+# so all the time is loop overhead. Prints the time per point without and
+# with record_timing, then the average of each timing array of the timed
+# run, so you can see where the time of a point goes.
+
+import sys
+import time
+
+from qcodes.instrument.parameter import ManualParameter
+from qcodes.loops import Loop
+
+
+timer = time.perf_counter
+
+
+def time_loop(points, record_timing):
+    x = ManualParameter('x')
+    m1 = ManualParameter('m1', initial_value=1)
+    m2 = ManualParameter('m2', initial_value=2)
+    loop = Loop(x[0:points:1]).each(m1, m2)
+    t0 = timer()
+    data = loop.run_temp(record_timing=record_timing)
+    return (timer() - t0) / points, data
+
+
+def run_all(points):
+    off, _ = time_loop(points, False)
+    on, data = time_loop(points, True)
+    print('{} points, per point (us): off {:.2f}, on {:.2f}'.format(
+        points, off * 1e6, on * 1e6))
+
+    for name in ('x_set_time', 'x_wait_time', 'x_store_time',
+                 'x_write_time', 'm1_get_time', 'm2_get_time'):
+        print('{:>14} {:8.2f} us'.format(
+            name, data.arrays[name].ndarray.mean() * 1e6))
+
+
+if __name__ == '__main__':
+    run_all(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,47 @@
+# cost of a DataArray scalar store, with its modification tracking, vs. a
+# bare ndarray assignment
+# run with: python setitem_cost.py <number>
+# number: stores per timing, default 2000
+#
+# For 1D, 2D and 3D arrays, times data[index] = value and
+# data.ndarray[index] = value (the best of 5 repeats) and prints both per
+# store and their ratio. The full index of scalars takes the integer
+# arithmetic fast path, the last case (a partial index of a 2D array) is a
+# block through the remaining dimension.
+
+import sys
+import timeit
+
+from qcodes.data.data_array import DataArray
+
+
+def time_store(shape, index, number):
+    data = DataArray(shape=shape)
+    data.init_data()
+    value = data.ndarray[index]
+
+    def store():
+        data[index] = value
+
+    def raw_store():
+        data.ndarray[index] = value
+
+    per_store = min(timeit.repeat(store, number=number, repeat=5)) / number
+    per_raw = min(timeit.repeat(raw_store, number=number, repeat=5)) / number
+    return per_store, per_raw
+
+
+def run_all(number):
+    print('{:>14} {:>10} {:>12} {:>12} {:>6}'.format(
+        'shape', 'index', 'store (us)', 'ndarray (us)', 'ratio'))
+    for shape, index in (((1000, ), (5, )), ((100, 100), (5, 7)),
+                         ((20, 20, 20), (3, 4, 5)),
+                         ((100, 100), (5, ))):
+        per_store, per_raw = time_store(shape, index, number)
+        print('{:>14} {:>10} {:12.3f} {:12.3f} {:6.1f}'.format(
+            str(shape), str(index), per_store * 1e6, per_raw * 1e6,
+            per_store / per_raw))
+
+
+if __name__ == '__main__':
+    run_all(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,80 @@
+# time how long syncing a live DataSet takes, vs. the number of new points
+# run with: python sync_latency.py <sizes>...
+# sizes: numbers of new points to sync, default 1000 10000 100000 1000000
+#
+# "arrays" is just the DataArray side: DataArray.get_changes on the server
+# copy, pickling the result like the query queue does, and apply_changes on
+# the local copy. "DataSet.sync" is the whole thing, through a DataServer
+# in another process, and "shared" is the same with shared_memory=True,
+# where the store writes straight into memory shared with the DataServer
+# and the sync only exchanges indices.
+
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from qcodes.data.data_array import DataArray
+from qcodes.data.data_set import new_data, DataMode
+from qcodes.data.io import DiskIO
+from qcodes.data.manager import get_data_manager
+
+
+timer = time.perf_counter
+
+
+def time_arrays(size):
+    shape = (size // 100, 100)
+    server_array = DataArray(shape=shape)
+    server_array.init_data()
+    server_array.ndarray[:] = np.random.rand(*shape)
+    server_array.modified_range = (0, server_array.ndarray.size - 1)
+
+    local_array = DataArray(shape=shape)
+    local_array.init_data()
+
+    t0 = timer()
+    changes = pickle.loads(pickle.dumps(server_array.get_changes(-1)))
+    local_array.apply_changes(**changes)
+    return timer() - t0
+
+
+def time_sync(size, io, shared_memory=False):
+    x = DataArray(name='x', shape=(size,), is_setpoint=True)
+    y = DataArray(name='y', shape=(size,), set_arrays=(x,))
+    data_set = new_data(arrays=(x, y), data_manager=True,
+                        mode=DataMode.PUSH_TO_SERVER,
+                        location='sync_{}_{}'.format(size, shared_memory),
+                        io=io, shared_memory=shared_memory)
+    data_set.store((slice(None), ), {'x_set': np.arange(size),
+                                     'y': np.random.rand(size)})
+
+    # now read it back, like the main process does during a background loop
+    data_set.mode = DataMode.PULL_FROM_SERVER
+    t0 = timer()
+    data_set.sync()
+    sync_time = timer() - t0
+
+    data_set.mode = DataMode.PUSH_TO_SERVER
+    data_set.finalize()
+    return sync_time
+
+
+def run_all(sizes):
+    data_manager = get_data_manager()
+    print('{:>10} {:>12} {:>18} {:>12}'.format(
+        'points', 'arrays (ms)', 'DataSet.sync (ms)', 'shared (ms)'))
+    with tempfile.TemporaryDirectory() as base_location:
+        io = DiskIO(base_location)
+        for size in sizes:
+            print('{:10d} {:12.3f} {:18.3f} {:12.3f}'.format(
+                size, time_arrays(size) * 1e3, time_sync(size, io) * 1e3,
+                time_sync(size, io, shared_memory=True) * 1e3))
+    data_manager.halt()
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]]
+    run_all(sizes or [1000, 10000, 100000, 1000000])
@@ -0,0 +1,65 @@
+# time the per-point overhead of Loop(...).run(use_threads=True)
+# run with: python thread_pool.py <points>
+# points: number of loop points per measurement, default 2000
+#
+# Each parameter is on its own (fake) instrument and returns immediately,
+# so all the time is loop and threading overhead. "thread_map" starts a new
+# thread for every get at every point, like the loop used to do; "pool"
+# is the loop's persistent thread pool, and "serial" is use_threads=False.
+
+import sys
+import time
+
+from qcodes.actions import _Measure
+from qcodes.instrument.parameter import ManualParameter
+from qcodes.loops import Loop
+from qcodes.utils.threading import thread_map
+
+
+timer = time.perf_counter
+
+
+class FakeInstrument:
+    def __init__(self, name):
+        self.name = name
+
+
+def make_params(count):
+    return [ManualParameter('p{}'.format(i), initial_value=i,
+                            instrument=FakeInstrument('inst{}'.format(i)))
+            for i in range(count)]
+
+
+def time_loop(points, params, use_threads):
+    sweep = ManualParameter('x')
+    loop = Loop(sweep[0:points:1]).each(*params)
+    t0 = timer()
+    loop.run_temp(use_threads=use_threads)
+    return (timer() - t0) / points
+
+
+def time_thread_map(points, params, use_threads):
+    # the old threaded path, with everything else the same
+    with_pool = _Measure._call_threaded
+    _Measure._call_threaded = (
+        lambda self, calls, times=None: thread_map(calls))
+    try:
+        return time_loop(points, params, use_threads)
+    finally:
+        _Measure._call_threaded = with_pool
+
+
+def run_all(points):
+    print('{:>7} {:>12} {:>12} {:>17}'.format(
+        'params', 'serial (us)', 'pool (us)', 'thread_map (us)'))
+    for count in (1, 4, 16):
+        params = make_params(count)
+        print('{:7d} {:12.1f} {:12.1f} {:17.1f}'.format(
+            count, time_loop(points, params, False) * 1e6,
+            time_loop(points, params, True) * 1e6,
+            time_thread_map(points, params, True) * 1e6))
+
+
+if __name__ == '__main__':
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    run_all(points)
@@ -0,0 +1,46 @@
+# how precisely a Loop hits short delays: plain time.sleep vs. the
+# sleep-then-spin wait the loop uses
+# run with: python wait_jitter.py <points>
+# points: loop points per delay, default 200
+#
+# For each delay, runs a no-op ManualParameter loop with spin_time 0 (only
+# sleep, like the loop used to do) and the configured
+# config['core']['wait_spin_time'], and prints the error (actual -
+# requested delay) statistics the loop saves in its metadata.
+
+import sys
+
+from qcodes import config
+from qcodes.instrument.parameter import ManualParameter
+from qcodes.loops import Loop
+
+
+def wait_stats(points, delay, spin_time):
+    x = ManualParameter('x')
+    m = ManualParameter('m', initial_value=1)
+    core = config['core']
+    settings = core['wait_spin_time'], core['wait_stats']
+    core['wait_spin_time'], core['wait_stats'] = spin_time, True
+    try:
+        data = Loop(x[0:points:1], delay).each(m).run_temp()
+    finally:
+        core['wait_spin_time'], core['wait_stats'] = settings
+    return data.metadata['loop']['wait_stats']
+
+
+def run_all(points):
+    spin_time = config['core']['wait_spin_time']
+    print('{} points per delay, errors in us'.format(points))
+    print('{:>10} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+        'delay (ms)', 'spin (ms)', 'mean', 'std', 'min', 'max'))
+    for delay in (0.0002, 0.001, 0.003, 0.01):
+        for spin in (0, spin_time):
+            stats = wait_stats(points, delay, spin)
+            print('{:10.1f} {:10.1f} {:10.1f} {:10.1f} {:10.1f} {:10.1f}'
+                  .format(delay * 1e3, spin * 1e3, stats['mean'] * 1e6,
+                          stats['std'] * 1e6, stats['min'] * 1e6,
+                          stats['max'] * 1e6))
+
+
+if __name__ == '__main__':
+    run_all(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
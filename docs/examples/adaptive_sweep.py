@@ -4,11 +4,15 @@ import qcodes as qc
 class AdaptiveSweep(qc.SweepValues):
     '''
     an example class to show how adaptive sampling might be implemented
-    this code has not been tested
+    benchmarking/adaptive_peak.py runs it on a toy model
 
     usage:
     Loop(AdaptiveSweep(param, start, end, target_delta), delay).run()
 
+    the loop passes each point's measurements to .feedback, and since
+    the number of points isn't known in advance, the DataSet arrays grow
+    as needed and are trimmed to the points used when the loop is done.
+
     inputs:
         start: initial parameter value
         end: final parameter value
@@ -80,6 +84,10 @@ class AdaptiveSweep(qc.SweepValues):
     def __next__(self):
         self._new_val_count = 0
 
+        if self._setting is None:
+            self._setting = self._start
+            return self._setting
+
         if self._setting == self._end:
             # terminate the iteration if we've already set the endpoint
             raise StopIteration
@@ -87,13 +95,16 @@ class AdaptiveSweep(qc.SweepValues):
         # target the step so the next delta is target_delta, if data is linear
         if self._delta is None:
             step = self._min_step  # start off slow
+        elif self._delta == 0:
+            step = self._step * 3
         else:
             step = abs(self._step * self._target_delta / self._delta)
             # don't increase too much at once
-            step = max(step, self._step * 3)
+            step = min(step, self._step * 3)
 
         # constrain it to provide min and max
         step = min(max(self._min_step, step), self._max_step)
+        self._step = step
         self._setting += self._direction * step
 
         # stop at the end
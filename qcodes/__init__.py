@@ -51,6 +51,7 @@ from qcodes.data.data_array import DataArray
 from qcodes.data.format import Formatter
 from qcodes.data.gnuplot_format import GNUPlotFormat
 from qcodes.data.hdf5_format import HDF5Format
+from qcodes.data.binary_format import BinaryFormat
 from qcodes.data.io import DiskIO
 
 from qcodes.instrument.base import Instrument
@@ -1,8 +1,11 @@
 """Actions, mainly to be executed in measurement Loops."""
+from concurrent.futures import wait as wait_futures
 import time
 
+from qcodes.instrument.remote import batch_gets
 from qcodes.utils.deferred_operations import is_function
 from qcodes.utils.threading import thread_map
+from qcodes.utils.timing import sleep_until
 
 
 _NO_SNAPSHOT = {'type': None, 'description': 'Action without snapshot'}
@@ -68,7 +71,8 @@ class Wait:
     This is transformed into a Task within the Loop, such that
     it can do other things (monitor, check for halt) during the delay.
 
-    But for use outside of a Loop, it is also callable (then it just sleeps)
+    But for use outside of a Loop, it is also callable (then it just waits,
+    with ``qcodes.utils.timing.sleep_until``)
 
     Args:
         delay: seconds to delay
@@ -83,7 +87,7 @@ class Wait:
 
     def __call__(self):
         if self.delay:
-            time.sleep(self.delay)
+            sleep_until(time.perf_counter() + self.delay)
 
     def snapshot(self, update=False):
         """
@@ -97,16 +101,90 @@ class Wait:
         return {'type': 'Wait', 'delay': self.delay}
 
 
+def _instrument_key(parameter):
+    """
+    Which instrument a parameter talks to, as far as threads are concerned.
+
+    Parameters without an instrument can run alongside anything else.
+    """
+    instrument = getattr(parameter, '_instrument', None)
+    return id(parameter if instrument is None else instrument)
+
+
+def _count_instruments(parameters):
+    """
+    The number of gets from ``parameters`` that ``_Measure`` can have
+    running at once: one per instrument, plus each parameter without one.
+    """
+    return len(set(_instrument_key(param) for param in parameters))
+
+
+def _call_all(calls, indices, out, times=None):
+    if times is None:
+        for i in indices:
+            out[i] = calls[i]()
+        return
+
+    for i in indices:
+        t = time.perf_counter()
+        out[i] = calls[i]()
+        times[i] = time.perf_counter() - t
+
+
+def _call_serial(calls, times=None):
+    if times is None:
+        return [call() for call in calls]
+
+    out = [None] * len(calls)
+    _call_all(calls, range(len(calls)), out, times)
+    return out
+
+
 class _Measure:
     """
-    A callable collection of parameters to measure.
+    A callable collection of parameters to measure. Each call measures
+    them, stores the results and returns them, one item per parameter.
 
     This should not be constructed manually, only by an ActiveLoop.
+
+    With ``use_threads``, the gets of different instruments run in parallel,
+    on the threads of ``executor`` (a ``concurrent.futures.Executor``) if
+    given, otherwise on new threads for every call. The gets of one
+    instrument always run one after another, in one thread.
+
+    With ``get_time_ids``, one array_id per parameter, the time each get
+    took is stored along with the measurements. Parameters read in one
+    batch all get the time of the whole batch.
     """
-    def __init__(self, params_indices, data_set, use_threads):
-        self.use_threads = use_threads and len(params_indices) > 1
-        # the applicable DataSet.store function
-        self.store = data_set.store
+    def __init__(self, params_indices, data_set, use_threads, store=None,
+                 executor=None, get_time_ids=None):
+        # the applicable DataSet.store function, unless the loop collects
+        # the data itself
+        self.store = store or data_set.store
+        self.executor = executor
+        self.get_time_ids = get_time_ids
+
+        # parameters on the same instrument server are read with one query,
+        # if there are any we use the slower path that reassembles them
+        params = [param for param, _ in params_indices]
+        self.batches = batch_gets(params)
+        if len(self.batches) == len(params_indices):
+            self.batches = None
+            call_params = [[param] for param in params]
+        else:
+            call_params = [[params[i] for i in indices]
+                           for _, indices in self.batches]
+
+        # group the calls by instrument (a batch covers a whole server)
+        groups = {}
+        for i, group_params in enumerate(call_params):
+            if len(group_params) > 1:
+                key = id(group_params[0]._instrument._manager)
+            else:
+                key = _instrument_key(group_params[0])
+            groups.setdefault(key, []).append(i)
+        self.groups = list(groups.values())
+        self.use_threads = use_threads and len(self.groups) > 1
 
         # for performance, pre-calculate which params return data for
         # multiple arrays, and the name mappings
@@ -130,10 +208,19 @@ class _Measure:
 
     def __call__(self, loop_indices, **ignore_kwargs):
         out_dict = {}
-        if self.use_threads:
-            out = thread_map(self.getters)
+        times = None
+        if self.get_time_ids is not None:
+            times = [None] * len(self.getters)
+
+        if self.batches:
+            out = self._get_batches(times)
+        elif self.use_threads:
+            out = self._call_threaded(self.getters, times)
         else:
-            out = [g() for g in self.getters]
+            out = _call_serial(self.getters, times)
+
+        if times is not None:
+            out_dict.update(zip(self.get_time_ids, times))
 
         for param_out, param_id, composite in zip(out, self.param_ids,
                                                   self.composite):
@@ -144,6 +231,44 @@ class _Measure:
                 out_dict[param_id] = param_out
 
         self.store(loop_indices, out_dict)
+        return out
+
+    def _get_batches(self, times=None):
+        getters = [getter for getter, _ in self.batches]
+        batch_times = None if times is None else [None] * len(getters)
+        if self.use_threads:
+            results = self._call_threaded(getters, batch_times)
+        else:
+            results = _call_serial(getters, batch_times)
+
+        out = [None] * len(self.getters)
+        for j, ((_, indices), values) in enumerate(zip(self.batches,
+                                                       results)):
+            for i, value in zip(indices, values):
+                out[i] = value
+                if times is not None:
+                    times[i] = batch_times[j]
+        return out
+
+    def _call_threaded(self, calls, times=None):
+        out = [None] * len(calls)
+        first_group, other_groups = self.groups[0], self.groups[1:]
+        if self.executor is None:
+            thread_map([_call_all] * len(self.groups),
+                       [(calls, group, out, times) for group in self.groups])
+            return out
+
+        # this thread does one group itself while the pool does the rest
+        futures = [self.executor.submit(_call_all, calls, group, out, times)
+                   for group in other_groups]
+        try:
+            _call_all(calls, first_group, out, times)
+        finally:
+            # don't leave gets running behind us, even after an error
+            wait_futures(futures)
+        for future in futures:
+            future.result()
+        return out
 
 
 class _Nest:
@@ -154,12 +279,15 @@ class _Nest:
     This should not be constructed manually, only by an ActiveLoop.
     """
 
-    def __init__(self, inner_loop, action_indices):
+    def __init__(self, inner_loop, action_indices, plan=None):
         self.inner_loop = inner_loop
         self.action_indices = action_indices
+        # the inner loop's compiled actions, reused for every outer point
+        self.plan = plan
 
     def __call__(self, **kwargs):
-        self.inner_loop._run_loop(action_indices=self.action_indices, **kwargs)
+        self.inner_loop._run_loop(action_indices=self.action_indices,
+                                  plan=self.plan, **kwargs)
 
 
 class BreakIf:
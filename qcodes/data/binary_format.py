@@ -0,0 +1,352 @@
+import numpy as np
+import json
+import os
+
+from qcodes.utils.helpers import deep_update, NumpyJSONEncoder
+from .data_array import DataArray
+from .format import Formatter
+
+
+class BinaryFormat(Formatter):
+    """
+    Saves data as raw binary columns, one data file per group of arrays
+    sharing the same setpoints, plus a small JSON header next to it.
+
+    This is much faster to write and read than ``GNUPlotFormat`` for large
+    data sets, at the cost of the files not being human-readable.
+
+    options:
+
+    extension (default 'bin'): file extension for the binary data files
+
+    header_extension (default 'json'): file extension for the header files
+
+    metadata_file (default 'snapshot.json'): name of the metadata file
+
+    Each group produces two files, ``<group.name>.<header_extension>`` and
+    ``<group.name>.<extension>``. The data file holds one column per array
+    in the group: first the setpoint arrays, expanded to the full shape of
+    the group (as in ``GNUPlotFormat``), then the measured arrays. Values
+    are little-endian float64, and each column occupies a fixed block of
+    ``prod(shape)`` values in raveled (C) order, so the file has the layout
+    of an array of shape ``(n_columns, ) + shape``. The whole file is
+    allocated on the first write and each later write fills in only the new
+    chunk of every column, so incremental writes never move existing data.
+
+    The header records the column order, labels, shape and dtype, and
+    ``saved_points``: how many points (in raveled order) of each column
+    have been written. Values after that are read back as NaN.
+
+    Supports lazy reading: the data arrays (and the inner setpoint array) of
+    each group are then ``np.memmap`` views of the data file, so only the
+    parts that are actually used get loaded. Changes to these arrays stay in
+    memory, they are not written back to the file. Setpoints that appear in
+    several groups are only checked for consistency in a full read.
+    """
+    dtype = np.dtype('<f8')
+    header_version = 1
+
+    supports_lazy = True
+
+    def __init__(self, extension='bin', header_extension='json',
+                 metadata_file=None):
+        self.metadata_file = metadata_file or 'snapshot.json'
+        # file extensions: accept either with or without leading dot
+        self.extension = '.' + extension.lstrip('.')
+        self.header_extension = '.' + header_extension.lstrip('.')
+        if self.extension == self.header_extension:
+            raise ValueError('BinaryFormat extension and header_extension '
+                             'must be different')
+
+    def read_one_file(self, data_set, f, ids_read, lazy=False):
+        """
+        Called by Formatter.read to bring one group of arrays into
+        a DataSet. Setpoint data may be duplicated across multiple groups,
+        but each measured DataArray must only map to one group.
+
+        Only header files are handled here, the binary data file belonging
+        to each header is found and read from its name.
+
+        Args:
+            data_set (DataSet): the data we are reading into.
+
+            f (file-like): a header file to read from, as provided by
+                ``io_manager.open``.
+
+            ids_read (set): ``array_id``s that we have already read.
+
+            lazy (bool): memory map the data file instead of reading it.
+                Default False.
+        """
+        if not f.name.endswith(self.header_extension):
+            return
+        if os.path.basename(f.name) == self.metadata_file:
+            return
+
+        header = json.load(f)
+        if header.get('format') != 'qcodes-binary':
+            raise ValueError('not a BinaryFormat header: ' + f.name)
+
+        data_path = f.name[:-len(self.header_extension)] + self.extension
+        columns = self._read_columns(data_path, header, lazy)
+
+        self._read_arrays(data_set, header, columns, ids_read, lazy)
+
+    def _read_columns(self, data_path, header, lazy=False):
+        """
+        Load the data file into an array of shape ``(n_columns, size)``.
+
+        Points beyond ``saved_points`` are filled with NaN.
+        """
+        shape = tuple(header['shape'])
+        size = int(np.prod(shape))
+        n_cols = len(header['arrays'])
+        saved_points = header['saved_points']
+        dtype = np.dtype(header['dtype'])
+
+        if os.path.getsize(data_path) < n_cols * size * dtype.itemsize:
+            raise ValueError('binary data file is too short: ' + data_path)
+
+        if lazy:
+            # copy-on-write, so filling in NaN below (and any changes the
+            # user makes later) never touch the file
+            columns = np.memmap(data_path, dtype=dtype, mode='c',
+                                shape=(n_cols, size))
+        else:
+            columns = np.fromfile(data_path, dtype=dtype,
+                                  count=n_cols * size)
+            columns = columns.reshape((n_cols, size)).astype(float)
+
+        if saved_points < size:
+            columns[:, saved_points:] = float('nan')
+        return columns
+
+    def _read_arrays(self, data_set, header, columns, ids_read, lazy=False):
+        arrays = data_set.arrays
+        shape = tuple(header['shape'])
+        ndim = len(shape)
+        saved_points = header['saved_points']
+
+        set_arrays = ()
+        data_arrays = []
+
+        for i, info in enumerate(header['arrays'][:ndim]):
+            array_id = info['array_id']
+            snap = data_set.get_array_metadata(array_id)
+
+            # setpoint arrays
+            set_shape = shape[: i + 1]
+            if array_id in arrays:
+                set_array = arrays[array_id]
+                if set_array.shape != set_shape:
+                    raise ValueError(
+                        'shapes do not match for set array: ' + array_id)
+                if array_id not in ids_read and not lazy:
+                    # it's OK for setpoints to be duplicated across
+                    # multiple files, but we should only empty the
+                    # array out the first time we see it, so subsequent
+                    # reads can check for consistency
+                    set_array.clear()
+            else:
+                set_array = DataArray(label=info['label'], array_id=array_id,
+                                      set_arrays=set_arrays, shape=set_shape,
+                                      is_setpoint=True, snapshot=snap)
+                data_set.add_array(set_array)
+
+            # the expanded column repeats each setpoint value over all the
+            # inner loops, take just the first inner point of each
+            inner_index = (0, ) * (ndim - i - 1)
+            values = columns[i].reshape(shape)[(Ellipsis, ) + inner_index]
+            if lazy:
+                if array_id not in ids_read:
+                    # outer setpoints are strided through the file, and
+                    # much smaller than the data, so load them now
+                    set_array.ndarray = (values if i == ndim - 1 else
+                                         np.array(values))
+                    set_array.init_data()
+            else:
+                set_array.init_data()
+                self._merge_setpoints(set_array, values)
+
+            set_arrays = set_arrays + (set_array, )
+            ids_read.add(array_id)
+
+        for i, info in enumerate(header['arrays'][ndim:], ndim):
+            array_id = info['array_id']
+            snap = data_set.get_array_metadata(array_id)
+
+            # data arrays
+            if array_id in ids_read:
+                raise ValueError('duplicate data id found: ' + array_id)
+
+            if array_id in arrays:
+                data_array = arrays[array_id]
+                if not lazy:
+                    data_array.clear()
+            else:
+                data_array = DataArray(label=info['label'], array_id=array_id,
+                                       set_arrays=set_arrays, shape=shape,
+                                       snapshot=snap)
+                if not lazy:
+                    data_array.init_data()
+                data_set.add_array(data_array)
+
+            if lazy:
+                data_array.ndarray = columns[i].reshape(shape)
+                data_array.init_data()
+            else:
+                # set .ndarray directly to avoid the overhead of __setitem__
+                data_array.ndarray[...] = columns[i].reshape(shape)
+            data_arrays.append(data_array)
+            ids_read.add(array_id)
+
+        if saved_points:
+            indices = np.unravel_index(saved_points - 1, shape)
+            for array in set_arrays + tuple(data_arrays):
+                array.mark_saved(array.flat_index(indices[:array.ndim]))
+
+    @staticmethod
+    def _merge_setpoints(set_array, values):
+        nparray = set_array.ndarray
+        empty = np.isnan(nparray)
+        new = ~np.isnan(values)
+        conflict = new & ~empty & (nparray != values)
+        if conflict.any():
+            raise ValueError('inconsistent setpoint values',
+                             nparray[conflict][0], values[conflict][0],
+                             set_array.name)
+        fill = empty & new
+        nparray[fill] = values[fill]
+
+    def write(self, data_set, io_manager, location, force_write=False):
+        """
+        Write updates in this DataSet to storage.
+
+        Will write only the new chunk of each column if possible, otherwise
+        recreate the data file.
+
+        Args:
+            data_set (DataSet): the data we're storing
+            io_manager (io_manager): the base location to write to
+            location (str): the file location within io_manager
+            force_write (bool): rewrite everything even if appending
+                would be possible. Default False.
+        """
+        arrays = data_set.arrays
+
+        # puts everything with same dimensions together
+        groups = self.group_arrays(arrays)
+        existing_files = set(io_manager.list(location))
+
+        # Every group gets its own header and data file
+        for group in groups:
+            header_fn = io_manager.join(location,
+                                        group.name + self.header_extension)
+            data_fn = io_manager.join(location, group.name + self.extension)
+
+            file_exists = (header_fn in existing_files and
+                           data_fn in existing_files)
+            save_range = self.match_save_range(group, file_exists)
+
+            if save_range is None:
+                continue
+
+            overwrite = save_range[0] == 0 or force_write
+            if overwrite:
+                save_range = (0, save_range[1])
+
+            data_path = io_manager.to_path(data_fn)
+            # io_manager.open only supports text files, make sure the
+            # folder exists before opening the data file directly.
+            os.makedirs(os.path.dirname(data_path), exist_ok=True)
+
+            self._write_columns(group, data_path, save_range, overwrite)
+
+            with io_manager.open(header_fn, 'w') as f:
+                json.dump(self._make_header(group, save_range[1] + 1), f,
+                          indent=4)
+
+            # see GNUPlotFormat.write for why we only mark the data arrays
+            # and the inner setpoint array
+            for array in group.data + (group.set_arrays[-1],):
+                array.mark_saved(save_range[1])
+
+    def _write_columns(self, group, data_path, save_range, overwrite):
+        shape = group.set_arrays[-1].shape
+        size = int(np.prod(shape))
+        start, stop = save_range[0], save_range[1] + 1
+        itemsize = self.dtype.itemsize
+
+        with open(data_path, 'wb' if overwrite else 'r+b') as f:
+            if overwrite:
+                n_cols = len(group.set_arrays) + len(group.data)
+                # allocate every column up front, so later chunks can be
+                # written in place without moving anything
+                f.truncate(n_cols * size * itemsize)
+
+            for col, values in enumerate(
+                    self.group_columns(group, start, stop)):
+                f.seek((col * size + start) * itemsize)
+                f.write(np.ascontiguousarray(values, self.dtype).tobytes())
+
+    def _make_header(self, group, saved_points):
+        shape = group.set_arrays[-1].shape
+        if len(shape) != len(group.set_arrays):
+            raise ValueError('array dimensionality does not match setpoints')
+
+        arrays = []
+        for i, array in enumerate(group.set_arrays + group.data):
+            arrays.append({
+                'array_id': array.array_id,
+                'label': getattr(array, 'label', None) or array.array_id,
+                'is_setpoint': i < len(shape)
+            })
+
+        return {
+            'format': 'qcodes-binary',
+            'version': self.header_version,
+            'dtype': self.dtype.str,
+            'shape': [int(size) for size in shape],
+            'arrays': arrays,
+            'saved_points': int(saved_points)
+        }
+
+    def write_metadata(self, data_set, io_manager, location, read_first=True):
+        """
+        Write all metadata in this DataSet to storage.
+
+        Args:
+            data_set (DataSet): the data we're storing
+
+            io_manager (io_manager): the base location to write to
+
+            location (str): the file location within io_manager
+
+            read_first (bool, optional): read previously saved metadata before
+                writing? The current metadata will still be the used if
+                there are changes, but if the saved metadata has information
+                not present in the current metadata, it will be retained.
+                Default True.
+        """
+        if read_first:
+            # In case the saved file has more metadata than we have here,
+            # read it in first. But any changes to the in-memory copy should
+            # override the saved file data.
+            memory_metadata = data_set.metadata
+            data_set.metadata = {}
+            self.read_metadata(data_set)
+            deep_update(data_set.metadata, memory_metadata)
+
+        fn = io_manager.join(location, self.metadata_file)
+        with io_manager.open(fn, 'w', encoding='utf8') as snap_file:
+            json.dump(data_set.metadata, snap_file, sort_keys=True,
+                      indent=4, ensure_ascii=False, cls=NumpyJSONEncoder)
+
+    def read_metadata(self, data_set):
+        io_manager = data_set.io
+        location = data_set.location
+        fn = io_manager.join(location, self.metadata_file)
+        if io_manager.list(fn):
+            with io_manager.open(fn, 'r', encoding='utf8') as snap_file:
+                metadata = json.load(snap_file)
+            data_set.metadata.update(metadata)
@@ -1,5 +1,7 @@
 import numpy as np
 import collections
+import os
+import tempfile
 
 from qcodes.utils.helpers import DelegateAttributes, full_class
 
@@ -130,6 +132,8 @@ class DataArray(DelegateAttributes):
         self.modified_range = None
 
         self.ndarray = None
+        # file backing ndarray, if it's shared with other processes
+        self.shared_file = None
         if snapshot is None:
             snapshot = {}
         self._snapshot_input = {}
@@ -237,6 +241,70 @@ class DataArray(DelegateAttributes):
 
         return self
 
+    def grow(self, axis, size):
+        """
+        Make dimension ``axis`` at least ``size`` long, for loops that don't
+        know their length in advance.
+
+        The dimension at least doubles each time, so growing a point at a
+        time costs amortized constant time per point. The new points are
+        NaN, or for a preset array nested in the loop being grown, copies
+        of its first slice along ``axis``. Flat indices change, so the
+        whole array is marked modified and unsaved, to be rewritten on the
+        next write.
+
+        Args:
+            axis (int): which dimension to grow.
+            size (int): the minimum new length of that dimension.
+        """
+        old_size = self.shape[axis]
+        if size <= old_size:
+            return
+
+        shape = list(self.shape)
+        shape[axis] = max(size, 2 * old_size)
+        self._reshape(tuple(shape), axis, old_size)
+
+    def trim(self, axis, size):
+        """
+        Cut dimension ``axis`` down to ``size``, the length actually used
+        after growing it with ``grow``.
+
+        Args:
+            axis (int): which dimension to trim.
+            size (int): its final length.
+        """
+        if size == self.shape[axis]:
+            return
+
+        shape = list(self.shape)
+        shape[axis] = size
+        self._reshape(tuple(shape), axis, size)
+
+    def _reshape(self, shape, axis, keep):
+        # keep the first ``keep`` points along ``axis``, in a new array
+        if self.ndarray is not None:
+            old = self.ndarray
+            new = np.empty(shape)
+            new.fill(float('nan'))
+            region = tuple(slice(0, min(old_d, new_d))
+                           for old_d, new_d in zip(old.shape, shape))
+            new[region] = old[region]
+            if (self._preset and shape[axis] > keep and
+                    self.set_arrays[axis] is not self):
+                fill = [slice(None)] * len(shape)
+                fill[axis] = slice(keep, None)
+                new[tuple(fill)] = np.take(old, [0], axis=axis)
+            self.ndarray = new
+
+        self.shape = shape
+        self._set_index_bounds()
+        self.last_saved_index = None
+        if self.ndarray is not None and self.ndarray.size:
+            self.modified_range = (0, self.ndarray.size - 1)
+        else:
+            self.modified_range = None
+
     def init_data(self, data=None):
         """
         Create the actual numpy array to hold data.
@@ -244,7 +312,10 @@ class DataArray(DelegateAttributes):
         The array will be sized based on either ``self.shape`` or
         data provided here.
 
-        Idempotent: will do nothing if the array already exists.
+        Idempotent: will not change the data if the array already exists.
+        This also means you can set ``self.ndarray`` to an existing array
+        (like a ``np.memmap``) with the right shape, then call ``init_data``
+        to adopt it.
 
         If data is provided, this array is marked as a preset
         meaning it can still be nested around this data.
@@ -285,16 +356,110 @@ class DataArray(DelegateAttributes):
             if self.ndarray.shape != self.shape:
                 raise ValueError('data has already been initialized, '
                                  'but its shape doesn\'t match self.shape')
-            return
         else:
             self.ndarray = np.ndarray(self.shape)
             self.clear()
         self._set_index_bounds()
 
+    def init_shared_data(self, directory=None):
+        """
+        Create the numpy array in a memory-mapped file, to share it with
+        other processes.
+
+        Other copies of this array (in other processes) that attach to the
+        same file with ``attach_shared_data`` see all changes immediately,
+        so only the indices of what changed need to be communicated.
+        Pickling a shared array also just sends the file name, and the
+        unpickled copy attaches to it.
+
+        Any existing data (like a preset array) is copied into the file,
+        otherwise it is filled with NaN.
+
+        Args:
+            directory (Optional[str]): where to make the file. Default
+                ``/dev/shm`` if it exists, so the data never touches the
+                disk, otherwise the system temporary directory.
+        """
+        if self.shared_file is not None:
+            return
+
+        self.init_data()
+        if not self.ndarray.size:
+            # can't map an empty file, but there's nothing to share anyway
+            return
+
+        if directory is None:
+            directory = _shared_memory_dir()
+        fd, path = tempfile.mkstemp(prefix='qcodes_', suffix='.dat',
+                                    dir=directory)
+        try:
+            os.ftruncate(fd, self.ndarray.size * np.dtype(float).itemsize)
+        finally:
+            os.close(fd)
+
+        shared = np.memmap(path, dtype=float, mode='r+', shape=self.shape)
+        shared[...] = self.ndarray
+        self.ndarray = shared
+        self.shared_file = path
+
+    def attach_shared_data(self, path):
+        """
+        Use the memory-mapped file made by ``init_shared_data`` in another
+        copy of this array as our numpy array.
+
+        Args:
+            path (str): the file to attach to.
+        """
+        self.ndarray = np.memmap(path, dtype=float, mode='r+',
+                                 shape=tuple(self.shape))
+        self.shared_file = path
+        self._set_index_bounds()
+
+    def release_shared_data(self):
+        """
+        Delete the file behind a shared array.
+
+        Processes that are already attached keep their data, but nobody
+        new can attach, and from now on this array pickles like any other.
+        """
+        if self.shared_file is None:
+            return
+        try:
+            os.remove(self.shared_file)
+        except OSError:
+            # on Windows the file can't be removed while it's mapped
+            pass
+        self.shared_file = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if state.get('shared_file'):
+            if os.path.exists(state['shared_file']):
+                state['ndarray'] = None
+            else:
+                state['shared_file'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if state.get('shared_file'):
+            self.attach_shared_data(state['shared_file'])
+
     def _set_index_bounds(self):
         self._min_indices = [0 for d in self.shape]
         self._max_indices = [d - 1 for d in self.shape]
 
+        # for the flat index arithmetic in _flat_range:
+        # _strides[i] is the number of points one step in dimension i
+        # covers, _block_sizes[k] the number of points that k indices
+        # select, ie the size of the remaining dimensions.
+        block_sizes = [1]
+        for d in reversed(self.shape):
+            block_sizes.insert(0, block_sizes[0] * int(d))
+        self._shape = tuple(int(d) for d in self.shape)
+        self._strides = tuple(block_sizes[1:])
+        self._block_sizes = tuple(block_sizes)
+
     def clear(self):
         """Fill the (already existing) data array with nan."""
         # only floats can hold nan values. I guess we could
@@ -314,6 +479,31 @@ class DataArray(DelegateAttributes):
         Also update the record of modifications to the array. If you don't
         want this overhead, you can access ``self.ndarray`` directly.
         """
+        self._update_modified_range(*self._flat_range(loop_indices))
+
+        self.ndarray.__setitem__(loop_indices, value)
+
+    def _flat_range(self, loop_indices):
+        """
+        Find the first and last flat indices that ``self[loop_indices]``
+        covers.
+        """
+        # fast path for the common case of plain (non-negative) int indices
+        # for the first dimensions, which select a single point or a
+        # contiguous block of points covering all the remaining dimensions.
+        if loop_indices.__class__ is int:
+            loop_indices = (loop_indices, )
+        if (loop_indices.__class__ is tuple and
+                len(loop_indices) <= len(self._shape)):
+            low = 0
+            for index, stride, size in zip(loop_indices, self._strides,
+                                           self._shape):
+                if index.__class__ is not int or not 0 <= index < size:
+                    break
+                low += index * stride
+            else:
+                return low, low + self._block_sizes[len(loop_indices)] - 1
+
         if isinstance(loop_indices, collections.Iterable):
             min_indices = list(loop_indices)
             max_indices = list(loop_indices)
@@ -330,9 +520,7 @@ class DataArray(DelegateAttributes):
 
         min_li = self.flat_index(min_indices, self._min_indices)
         max_li = self.flat_index(max_indices, self._max_indices)
-        self._update_modified_range(min_li, max_li)
-
-        self.ndarray.__setitem__(loop_indices, value)
+        return min_li, max_li
 
     def __getitem__(self, loop_indices):
         return self.ndarray[loop_indices]
@@ -372,9 +560,12 @@ class DataArray(DelegateAttributes):
         return np.ravel_multi_index(tuple(zip(indices)), self.shape)[0]
 
     def _update_modified_range(self, low, high):
-        if self.modified_range:
-            self.modified_range = (min(self.modified_range[0], low),
-                                   max(self.modified_range[1], high))
+        modified_range = self.modified_range
+        if modified_range:
+            # conditionals rather than min and max, this runs on every store
+            old_low, old_high = modified_range
+            self.modified_range = (low if low < old_low else old_low,
+                                   high if high > old_high else old_high)
         else:
             self.modified_range = (low, high)
 
@@ -440,7 +631,10 @@ class DataArray(DelegateAttributes):
                 returns a dict with keys:
                     start (int): the flat index of the first returned value.
                     stop (int): the flat index of the last returned value.
-                    vals (List[float]): the new values
+                    vals (ndarray): the new values, a 1D copy of that slice
+                        of the raveled array. Omitted if this array is
+                        shared (see ``init_shared_data``), because the
+                        other copy can see the values already.
         """
         latest_index = self.last_saved_index
         if latest_index is None:
@@ -448,37 +642,56 @@ class DataArray(DelegateAttributes):
         if self.modified_range:
             latest_index = max(latest_index, self.modified_range[1])
 
-        vals = [
-            self.ndarray[np.unravel_index(i, self.ndarray.shape)]
-            for i in range(synced_index + 1, latest_index + 1)
-        ]
-
-        if vals:
+        if latest_index > synced_index:
+            if self.shared_file is not None:
+                return {'start': synced_index + 1, 'stop': latest_index}
+            # a copy, so it can't change while waiting to be sent
+            vals = np.array(self._flat_slice(synced_index + 1,
+                                             latest_index + 1))
             return {
                 'start': synced_index + 1,
                 'stop': latest_index,
                 'vals': vals
             }
 
-    def apply_changes(self, start, stop, vals):
+    def apply_changes(self, start, stop, vals=None):
         """
         Insert new synced values into the array.
 
         To be be called in a ``PULL_FROM_SERVER`` ``DataSet`` using results
         returned by ``get_changes`` from the ``DataServer``.
 
-        TODO: check that vals has the right length?
-
         Args:
             start (int): the flat index of the first new value.
             stop (int): the flat index of the last new value.
-            vals (List[float]): the new values
+            vals (Optional[Union[ndarray, List[float]]]): the new values.
+                Omit if this array shares its data with the server copy,
+                then we only record how far we're synced.
+
+        Raises:
+            ValueError: if the number of values doesn't match start and
+                stop.
         """
-        for i, val in enumerate(vals):
-            index = np.unravel_index(i + start, self.ndarray.shape)
-            self.ndarray[index] = val
+        if vals is None:
+            self.synced_index = stop
+            return
+        if len(vals) != stop - start + 1:
+            raise ValueError('expected {} values, got {}'.format(
+                stop - start + 1, len(vals)))
+        if self.ndarray.flags.c_contiguous:
+            self.ndarray.reshape(-1)[start:stop + 1] = vals
+        else:
+            self.ndarray.flat[start:stop + 1] = vals
         self.synced_index = stop
 
+    def _flat_slice(self, start, stop):
+        """
+        A slice of the raveled array: a view if possible, or else a copy.
+        """
+        if self.ndarray.flags.c_contiguous:
+            return self.ndarray.reshape(-1)[start:stop]
+        return self.ndarray.flat[start:stop]
+
     def __repr__(self):
         array_id_or_none = ' {}'.format(self.array_id) if self.array_id else ''
         return '{}[{}]:{}\n{}'.format(self.__class__.__name__,
@@ -518,3 +731,9 @@ class DataArray(DelegateAttributes):
             last_index = max(last_index, self.synced_index)
 
         return (last_index + 1) / self.ndarray.size
+
+
+def _shared_memory_dir():
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm'
+    return tempfile.gettempdir()
@@ -3,6 +3,7 @@
 from enum import Enum
 import time
 import logging
+import threading
 from traceback import format_exc
 from copy import deepcopy
 from collections import OrderedDict
@@ -87,6 +88,20 @@ def new_data(location=None, loc_record=None, name=None, overwrite=False,
             this and generally writes more often. Use None to disable writing
             from calls to ``self.store``. Default 5.
 
+        write_in_background (bool, optional): Only if ``mode=LOCAL``, do the
+            periodic writes in a separate thread, so ``self.store`` never
+            waits for the formatter. ``self.finalize`` stops the thread and
+            writes everything that's left. Default False.
+
+        shared_memory (bool, optional): Only with a ``data_manager``, keep
+            the arrays in memory shared between the ``DataServer`` and every
+            other copy of this DataSet, instead of sending the data itself
+            through the ``DataServer`` queues. ``self.store`` writes directly
+            into the shared arrays, and only the modified index ranges are
+            sent to the server, at most every
+            ``DataSet.shared_update_period`` seconds. Likewise ``self.sync``
+            only asks how far the data goes. Default False.
+
     Returns:
         A new ``DataSet`` object ready for storing new data in.
     """
@@ -117,7 +132,8 @@ def new_data(location=None, loc_record=None, name=None, overwrite=False,
                    mode=mode, **kwargs)
 
 
-def load_data(location=None, data_manager=None, formatter=None, io=None):
+def load_data(location=None, data_manager=None, formatter=None, io=None,
+              lazy=False):
     """
     Load an existing DataSet.
 
@@ -147,6 +163,12 @@ def load_data(location=None, data_manager=None, formatter=None, io=None):
             says the root data directory is the current working directory, ie
             where you started the python session.
 
+        lazy (bool, optional): only read the metadata and array shapes now,
+            and leave the data in storage to be loaded as it is accessed.
+            Only used if the formatter ``supports_lazy`` (like
+            ``BinaryFormat``), otherwise all the data is read as usual.
+            Ignored for live data. Default False.
+
     Returns:
         A new ``DataSet`` object loaded with pre-existing data.
     """
@@ -172,7 +194,7 @@ def load_data(location=None, data_manager=None, formatter=None, io=None):
         data = DataSet(location=location, formatter=formatter, io=io,
                        mode=DataMode.LOCAL)
         data.read_metadata()
-        data.read()
+        data.read(lazy=lazy)
         return data
 
 
@@ -185,6 +207,85 @@ def _get_live_data(data_manager):
     return live_data
 
 
+class _BackgroundWriter:
+    """
+    Writes a LOCAL DataSet to storage from a separate thread.
+
+    ``store`` puts values straight into the arrays, but only records which
+    points changed. The modifications are handed over to the arrays'
+    ``modified_range`` right before each write, so while a write is running
+    the formatter is the only one using the save state of the arrays, and
+    new data can keep coming in.
+
+    Args:
+        data_set (DataSet): the DataSet to write. Its ``write_period`` sets
+            how often the thread writes. If it's None there is no thread,
+            only explicit ``DataSet.write`` calls save the data.
+    """
+    def __init__(self, data_set):
+        self.data_set = data_set
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        # only one write at a time, whether from the thread or not
+        self.write_lock = threading.Lock()
+        self.stopping = threading.Event()
+
+        self.thread = None
+        if data_set.write_period is not None:
+            self.thread = threading.Thread(target=self._run, daemon=True,
+                                           name='DataSet writer')
+            self.thread.start()
+
+    def store(self, loop_indices, ids_values):
+        arrays = self.data_set.arrays
+        ranges = []
+        for array_id, value in ids_values.items():
+            array = arrays[array_id]
+            low, high = array._flat_range(loop_indices)
+            # the data goes in first, so anything a write finds pending is
+            # already there
+            array.ndarray[loop_indices] = value
+            ranges.append((array_id, low, high))
+
+        with self.pending_lock:
+            pending = self.pending
+            for array_id, low, high in ranges:
+                if array_id in pending:
+                    old_low, old_high = pending[array_id]
+                    pending[array_id] = (min(old_low, low),
+                                         max(old_high, high))
+                else:
+                    pending[array_id] = (low, high)
+
+    def write(self):
+        """Write everything stored so far."""
+        data_set = self.data_set
+        with self.write_lock:
+            with self.pending_lock:
+                pending, self.pending = self.pending, {}
+
+            for array_id, (low, high) in pending.items():
+                data_set.arrays[array_id]._update_modified_range(low, high)
+
+            data_set.formatter.write(data_set, data_set.io, data_set.location)
+            data_set.last_write = time.time()
+
+    def stop(self):
+        """Stop the thread, after any write it's doing now."""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _run(self):
+        while not self.stopping.wait(self.data_set.write_period):
+            if not self.pending:
+                continue
+            try:
+                self.data_set.write()
+            except Exception:
+                logging.error(format_exc())
+
+
 class DataSet(DelegateAttributes):
 
     """
@@ -236,6 +337,20 @@ class DataSet(DelegateAttributes):
             this and generally writes more often. Use None to disable writing
             from calls to ``self.store``. Default 5.
 
+        write_in_background (bool, optional): Only if ``mode=LOCAL``, do the
+            periodic writes in a separate thread, so ``self.store`` never
+            waits for the formatter. ``self.finalize`` stops the thread and
+            writes everything that's left. Default False.
+
+        shared_memory (bool, optional): Only with a ``data_manager``, keep
+            the arrays in memory shared between the ``DataServer`` and every
+            other copy of this DataSet, instead of sending the data itself
+            through the ``DataServer`` queues. ``self.store`` writes directly
+            into the shared arrays, and only the modified index ranges are
+            sent to the server, at most every
+            ``DataSet.shared_update_period`` seconds. Likewise ``self.sync``
+            only asks how far the data goes. Default False.
+
     Attributes:
         background_functions (OrderedDict[callable]): Class attribute,
             ``{key: fn}``: ``fn`` is a callable accepting no arguments, and
@@ -259,8 +374,13 @@ class DataSet(DelegateAttributes):
 
     background_functions = OrderedDict()
 
+    # with shared_memory, seconds between sending modified ranges to the
+    # DataServer, ie the delay before new data is visible anywhere else
+    shared_update_period = 0.1
+
     def __init__(self, location=None, mode=DataMode.LOCAL, arrays=None,
-                 data_manager=False, formatter=None, io=None, write_period=5):
+                 data_manager=False, formatter=None, io=None, write_period=5,
+                 write_in_background=False, shared_memory=False):
         if location is False or isinstance(location, str):
             self.location = location
         else:
@@ -272,8 +392,16 @@ class DataSet(DelegateAttributes):
         self.io = io or self.default_io
 
         self.write_period = write_period
+        self.write_in_background = write_in_background
+        # created on the first store, so it never needs to be pickled
+        self._background_writer = None
+        self.shared_memory = shared_memory
+        self.last_update = 0
         self.last_write = 0
         self.last_store = -1
+        # total seconds spent in the writes that store() triggers,
+        # for loops that record their timing
+        self.triggered_write_time = 0
 
         self.metadata = {}
 
@@ -325,6 +453,11 @@ class DataSet(DelegateAttributes):
         # we can't (and shouldn't) send data_manager itself through a queue
         self.data_manager = data_manager
 
+        if self.shared_memory:
+            shared_files = data_manager.ask('get_shared_files')
+            for array_id, path in shared_files.items():
+                self.arrays[array_id].attach_shared_data(path)
+
     def init_on_server(self):
         """
         Configure this DataSet as the DataServer copy.
@@ -334,8 +467,21 @@ class DataSet(DelegateAttributes):
         if not self.arrays:
             raise RuntimeError('A server-side DataSet needs DataArrays.')
 
+        if self.shared_memory:
+            for array in self.arrays.values():
+                array.init_shared_data()
+
         self._init_local()
 
+    def release_shared_memory(self):
+        """
+        Delete the files behind shared arrays (see ``shared_memory``).
+
+        Called by the DataServer when it's done with this DataSet.
+        """
+        for array in self.arrays.values():
+            array.release_shared_data()
+
     def _init_live(self, data_manager):
         self.mode = DataMode.PULL_FROM_SERVER
         self.data_manager = data_manager
@@ -597,23 +743,127 @@ class DataSet(DelegateAttributes):
                 to insert into that array.
          """
         if self.mode == DataMode.PUSH_TO_SERVER:
+            if self.shared_memory:
+                # the server copy sees the data already, it only needs to
+                # know what changed
+                for array_id, value in ids_values.items():
+                    self.arrays[array_id][loop_indices] = value
+                if time.time() > self.last_update + self.shared_update_period:
+                    self._send_modified_ranges()
+                return
             # Defers to the copy on the dataserver to call this identical
             # function
             self.data_manager.write('store_data', loop_indices, ids_values)
         elif self.mode == DataMode.LOCAL:
             # You will always end up in this block, either in the copy
             # on the server (if you hit the if statement above) or else here
+            if self.write_in_background:
+                if self._background_writer is None:
+                    self._background_writer = _BackgroundWriter(self)
+                self._background_writer.store(loop_indices, ids_values)
+                self.last_store = time.time()
+                return
+
             for array_id, value in ids_values.items():
                 self.arrays[array_id][loop_indices] = value
             self.last_store = time.time()
             if (self.write_period is not None and
                     time.time() > self.last_write + self.write_period):
+                t = time.perf_counter()
                 self.write()
                 self.last_write = time.time()
+                self.triggered_write_time += time.perf_counter() - t
         else: # in PULL_FROM_SERVER mode; store() isn't legal
             raise RuntimeError('This object is pulling from a DataServer, '
                                'so data insertion is not allowed.')
 
+    def _send_modified_ranges(self):
+        modified_ranges = {}
+        for array_id, array in self.arrays.items():
+            if array.modified_range:
+                modified_ranges[array_id] = array.modified_range
+                array.modified_range = None
+        if modified_ranges:
+            self.data_manager.write('mark_modified', modified_ranges)
+        self.last_update = time.time()
+
+    def store_block(self, loop_indices, ids_values):
+        """
+        Insert a block of consecutive points along the innermost loop, like
+        a whole inner loop row, into one or more of our DataArrays.
+
+        This is the same as a ``self.store`` call for each point, but the
+        values are inserted (or sent to the ``DataServer``) all at once, and
+        the modifications are recorded only once per array.
+
+        Args:
+            loop_indices (tuple): the indices of the first point of the
+                block, within all the loops we are inside.
+            ids_values (Dict[sequence]): a dict whose keys are array_ids,
+                and values are sequences of the values for each point in the
+                block. These must all have the same length.
+        """
+        lengths = set(len(values) for values in ids_values.values())
+        if len(lengths) > 1:
+            raise ValueError('all values in a block must have the same '
+                             'length, not {}'.format(sorted(lengths)))
+        if not lengths:
+            return
+
+        start = loop_indices[-1]
+        block_indices = tuple(loop_indices[:-1]) + (
+            slice(start, start + lengths.pop()), )
+        self.store(block_indices, ids_values)
+
+    def grow_loop(self, set_array_id, size):
+        """
+        Make a loop longer, for loops that don't know their length in
+        advance: grow the dimension of that loop in its setpoint array and
+        every array inside the loop to at least ``size``.
+
+        See ``DataArray.grow``. Only ``LOCAL`` DataSets can change shape.
+
+        Args:
+            set_array_id (str): the array_id of the loop's setpoint array.
+            size (int): the minimum new length of the loop.
+        """
+        self._resize_loop(set_array_id, size, 'grow')
+
+    def trim_loop(self, set_array_id, size):
+        """
+        Cut a loop grown with ``grow_loop`` down to its final length.
+
+        Args:
+            set_array_id (str): the array_id of the loop's setpoint array.
+            size (int): the final length of the loop.
+        """
+        self._resize_loop(set_array_id, size, 'trim')
+
+    def _resize_loop(self, set_array_id, size, method):
+        if self.mode != DataMode.LOCAL:
+            raise RuntimeError('Only a LOCAL DataSet can change the length '
+                               'of its loops, this one is in {}'.format(
+                                   self.mode))
+
+        set_array = self.arrays[set_array_id]
+        axis = len(set_array.set_arrays) - 1
+        arrays = [array for array in self.arrays.values()
+                  if len(array.set_arrays) > axis and
+                  array.set_arrays[axis] is set_array]
+
+        writer = self._background_writer
+        if writer is None:
+            for array in arrays:
+                getattr(array, method)(axis, size)
+            return
+
+        # the pending flat ranges don't survive a reshape, but the arrays
+        # are marked entirely modified anyway
+        with writer.write_lock, writer.pending_lock:
+            for array in arrays:
+                writer.pending.pop(array.array_id, None)
+                getattr(array, method)(axis, size)
+
     def default_parameter_name(self, paramname='amplitude'):
         """ Return name of default parameter for plotting
 
@@ -672,11 +922,21 @@ class DataSet(DelegateAttributes):
         paramname = self.default_parameter_name(paramname=paramname)
         return getattr(self, paramname, None)
 
-    def read(self):
-        """Read the whole DataSet from storage, overwriting the local data."""
+    def read(self, lazy=False):
+        """
+        Read the whole DataSet from storage, overwriting the local data.
+
+        Args:
+            lazy (bool, optional): if the formatter ``supports_lazy``, back
+                the arrays with the data in storage instead of loading them
+                into memory. Default False.
+        """
         if self.location is False:
             return
-        self.formatter.read(self)
+        if lazy and getattr(self.formatter, 'supports_lazy', False):
+            self.formatter.read(self, lazy=True)
+        else:
+            self.formatter.read(self)
 
     def read_metadata(self):
         """Read the metadata from storage, overwriting the local data."""
@@ -697,7 +957,10 @@ class DataSet(DelegateAttributes):
         if self.location is False:
             return
 
-        self.formatter.write(self, self.io, self.location)
+        if self._background_writer is not None:
+            self._background_writer.write()
+        else:
+            self.formatter.write(self, self.io, self.location)
 
     def write_copy(self, path=None, io_manager=None, location=None):
         """
@@ -781,10 +1044,14 @@ class DataSet(DelegateAttributes):
         if self.mode == DataMode.PUSH_TO_SERVER:
             # Just like .store, if this DataSet is on the DataServer,
             # we defer to the copy there and execute this same method.
+            if self.shared_memory:
+                self._send_modified_ranges()
             self.data_manager.ask('finalize_data')
         elif self.mode == DataMode.LOCAL:
             # You will always end up in this block, either in the copy
             # on the server (if you hit the if statement above) or else here
+            if self._background_writer is not None:
+                self._background_writer.stop()
             self.write()
 
             if hasattr(self.formatter, 'close_file'):
@@ -2,6 +2,7 @@ from collections import namedtuple
 from traceback import format_exc
 from operator import attrgetter
 import logging
+import numpy as np
 
 
 class Formatter:
@@ -28,6 +29,11 @@ class Formatter:
       ``read``, this method should call ``read_metadata``, but keep it also
       as a separate method because it occasionally gets called independently.
 
+    Formatters that can back the ``DataArray``s with the files themselves
+    (for example with ``np.memmap``) rather than loading them into memory
+    should set ``supports_lazy = True``, and then ``read_one_file`` (or
+    ``read``) must accept a ``lazy`` keyword argument.
+
     All of these methods accept a ``data_set`` argument, which should be a
     ``DataSet`` object. Even if you are loading a new data set from disk, this
     object should already have attributes:
@@ -42,6 +48,8 @@ class Formatter:
     """
     ArrayGroup = namedtuple('ArrayGroup', 'shape set_arrays data name')
 
+    supports_lazy = False
+
     def write(self, data_set, io_manager, location):
         """
         Write the DataSet to storage.
@@ -58,7 +66,7 @@ class Formatter:
         """
         raise NotImplementedError
 
-    def read(self, data_set):
+    def read(self, data_set, lazy=False):
         """
         Read the entire ``DataSet``.
 
@@ -74,6 +82,10 @@ class Formatter:
                 and ``arrays`` (dict of ``{array_id: array}``, can be empty
                 or can already have some or all of the arrays present, they
                 expect to be overwritten)
+
+            lazy (bool): if True, and this Formatter ``supports_lazy``, only
+                read the array shapes now, and leave the data on disk to be
+                loaded as it is accessed. Otherwise ignored. Default False.
         """
         io_manager = data_set.io
         location = data_set.location
@@ -89,11 +101,17 @@ class Formatter:
 
         self.read_metadata(data_set)
 
+        # only pass lazy on if it's supported, so Formatters that don't
+        # support it don't need to accept the argument
+        read_kwargs = {}
+        if lazy and self.supports_lazy:
+            read_kwargs['lazy'] = True
+
         ids_read = set()
         for fn in data_files:
             with io_manager.open(fn, 'r') as f:
                 try:
-                    self.read_one_file(data_set, f, ids_read)
+                    self.read_one_file(data_set, f, ids_read, **read_kwargs)
                 except ValueError:
                     logging.warning('error reading file ' + fn)
                     logging.warning(format_exc())
@@ -255,6 +273,47 @@ class Formatter:
         else:
             return (last_saved_index + 1, mod_range[1])
 
+    @staticmethod
+    def group_columns(group, start, stop):
+        """
+        Get the values of every array in a group over a range of points.
+
+        Setpoint arrays are expanded to the full shape of the group, as they
+        appear in a file with one row per point: flat index ``i`` of the
+        group maps to flat index ``i // inner_size`` of a setpoint array,
+        where ``inner_size`` is the number of points in all the loops inside
+        it.
+
+        Args:
+            group (Formatter.ArrayGroup): the arrays to get values from.
+
+            start (int): the first raveled index to include.
+
+            stop (int): one past the last raveled index to include.
+
+        Returns:
+            List[ndarray]: one 1D array of length ``stop - start`` per array
+                in ``group.set_arrays + group.data``, in that order.
+        """
+        shape = group.set_arrays[-1].shape
+        flat_range = None
+        columns = []
+
+        for array in group.set_arrays:
+            flat = array.ndarray.reshape(-1)
+            inner_size = int(np.prod(shape[array.ndim:]))
+            if inner_size == 1:
+                columns.append(flat[start:stop])
+            else:
+                if flat_range is None:
+                    flat_range = np.arange(start, stop)
+                columns.append(flat[flat_range // inner_size])
+
+        for array in group.data:
+            columns.append(array.ndarray.reshape(-1)[start:stop])
+
+        return columns
+
     def group_arrays(self, arrays):
         """
         Find the sets of arrays which share all the same setpoint arrays.
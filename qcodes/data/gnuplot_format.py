@@ -2,6 +2,7 @@ import numpy as np
 import re
 import math
 import json
+import warnings
 
 from qcodes.utils.helpers import deep_update, NumpyJSONEncoder
 from .data_array import DataArray
@@ -33,6 +34,11 @@ class GNUPlotFormat(Formatter):
     always_nest (default True): whether to always make a folder for files
         or just make a single data file if all data has the same setpoints
 
+    fast_read (default True): parse the whole data block of each file at
+        once with numpy, rather than line by line. Files whose rows are
+        ragged or whose blank lines don't follow the layout described below
+        are still read line by line.
+
     These files are basically tab-separated values, but any quantity of
     any whitespace characters is accepted.
 
@@ -63,7 +69,8 @@ class GNUPlotFormat(Formatter):
     of corresponds to our situation.)
     """
     def __init__(self, extension='dat', terminator='\n', separator='\t',
-                 comment='# ', number_format='g', metadata_file=None):
+                 comment='# ', number_format='g', metadata_file=None,
+                 fast_read=True):
         self.metadata_file = metadata_file or 'snapshot.json'
         # file extension: accept either with or without leading dot
         self.extension = '.' + extension.lstrip('.')
@@ -90,6 +97,8 @@ class GNUPlotFormat(Formatter):
         # number format (only used for writing; will read any number)
         self.number_format = '{:' + number_format + '}'
 
+        self.fast_read = fast_read
+
     def read_one_file(self, data_set, f, ids_read):
         """
         Called by Formatter.read to bring one data file into
@@ -161,10 +170,127 @@ class GNUPlotFormat(Formatter):
             data_arrays.append(data_array)
             ids_read.add(array_id)
 
+        lines = f.read().splitlines()
+
+        if not (self.fast_read and
+                self._read_block(set_arrays, data_arrays, shape, lines)):
+            self._read_lines(set_arrays, data_arrays, ndim, lines)
+
+    def _read_block(self, set_arrays, data_arrays, shape, lines):
+        """
+        Read all data points at once, if the file has the standard layout.
+
+        The standard layout is what ``write`` produces: one line per point in
+        raveled order, possibly stopping early, with one blank line for each
+        loop that resets. Then each line's indices follow from its position
+        and we can parse and store every column in one go.
+
+        Returns:
+            bool: False if the file doesn't have the standard layout (or has
+                no data) and nothing was read, True if it was all read.
+        """
+        if any(map(self._is_comment, lines)):
+            lines = [line for line in lines if not self._is_comment(line)]
+        # ignore leading or trailing whitespace (including in blank lines)
+        lines = list(map(str.strip, lines))
+
+        positions = np.flatnonzero(list(map(bool, lines)))
+        npoints = len(positions)
+        if not npoints or npoints > np.prod(shape):
+            return False
+
+        # blank lines before each point (ignoring any before the first one)
+        # must match the loops that reset at its raveled index
+        blanks = np.diff(positions) - 1
+        expected_blanks = np.zeros(npoints - 1, dtype=int)
+        flat_indices = np.arange(1, npoints)
+        inner_size = 1
+        for size in reversed(shape[1:]):
+            inner_size *= size
+            expected_blanks += (flat_indices % inner_size) == 0
+        if not np.array_equal(blanks, expected_blanks):
+            return False
+
+        # parse all the numbers in one go. fromstring stops (with a warning)
+        # at anything it can't parse, and a row with missing or extra values
+        # makes the total wrong, so either way the count tells us whether
+        # it worked.
+        ncols = len(set_arrays) + len(data_arrays)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            values = np.fromstring(' '.join(filter(None, lines)), sep=' ')
+        if values.size != npoints * ncols:
+            return False
+        values = values.reshape((npoints, ncols))
+
+        for column, set_array in zip(values.T, set_arrays):
+            self._store_setpoints(set_array, column, shape)
+
+        for column, data_array in zip(values.T[len(set_arrays):],
+                                      data_arrays):
+            # set .ndarray directly to avoid the overhead of __setitem__
+            data_array.ndarray.flat[:npoints] = column
+
+        # mark everything as saved up to the last point read, as in
+        # _read_lines
+        indices = np.unravel_index(npoints - 1, shape)
+        for array in set_arrays + tuple(data_arrays):
+            array.mark_saved(array.flat_index(indices[:array.ndim]))
+
+        return True
+
+    @staticmethod
+    def _store_setpoints(set_array, column, shape):
+        """
+        Store one setpoint column, read as expanded to the full shape.
+
+        Consistency checks are the same as for one point at a time: each
+        stored value is the first non-NaN one (either already in the array,
+        or from the column), and once there is one, every later value must
+        match it. So NaN is only allowed before the first value.
+        """
+        nparray = set_array.ndarray
+        inner_size = int(np.prod(shape[nparray.ndim:]))
+        ngroups = -(-len(column) // inner_size)
+
+        # one row per setpoint value, padded with NaN if the file stops
+        # partway through the last one
+        block = np.full(ngroups * inner_size, float('nan'))
+        block[:len(column)] = column
+        block = block.reshape((ngroups, inner_size))
+        read = (np.arange(ngroups * inner_size) <
+                len(column)).reshape((ngroups, inner_size))
+
+        present = ~np.isnan(block)
+        first_present = block[np.arange(ngroups), present.argmax(axis=1)]
+        stored = nparray.flat[:ngroups]
+        ref = np.where(np.isnan(stored), first_present, stored)
+
+        # whether each point has a value to match: one stored before, or a
+        # non-NaN earlier in the column. NaN never matches.
+        has_ref = ((np.cumsum(present, axis=1) - present) > 0)
+        has_ref |= ~np.isnan(stored)[:, np.newaxis]
+        conflicts = read & has_ref & ~(block == ref[:, np.newaxis])
+        if conflicts.any():
+            group, inner = np.argwhere(conflicts)[0]
+            indices = np.unravel_index(group * inner_size + inner, shape)
+            raise ValueError('inconsistent setpoint values',
+                             ref[group], block[group, inner], set_array.name,
+                             indices[:nparray.ndim], indices)
+
+        nparray.flat[:ngroups] = ref
+
+    def _read_lines(self, set_arrays, data_arrays, ndim, lines):
+        """
+        Read data points one line at a time.
+
+        This handles any layout of blank lines, like bidirectional sweeps or
+        files that were not written by ``GNUPlotFormat``.
+        """
         indices = [0] * ndim
         first_point = True
         resetting = 0
-        for line in f:
+        for line in lines:
             if self._is_comment(line):
                 continue
 
@@ -266,26 +392,12 @@ class GNUPlotFormat(Formatter):
 
             overwrite = save_range[0] == 0 or force_write
             open_mode = 'w' if overwrite else 'a'
-            shape = group.set_arrays[-1].shape
 
             with io_manager.open(fn, open_mode) as f:
                 if overwrite:
                     f.write(self._make_header(group))
 
-                for i in range(save_range[0], save_range[1] + 1):
-                    indices = np.unravel_index(i, shape)
-
-                    # insert a blank line for each loop that reset (to index 0)
-                    # note that if *all* indices are zero (the first point)
-                    # we won't put any blanks
-                    for j, index in enumerate(reversed(indices)):
-                        if index != 0:
-                            if j:
-                                f.write(self.terminator * j)
-                            break
-
-                    one_point = self._data_point(group, indices)
-                    f.write(self.separator.join(one_point) + self.terminator)
+                f.write(self._data_block(group, save_range))
 
             # now that we've saved the data, mark it as such in the data.
             # we mark the data arrays and the inner setpoint array. Outer
@@ -358,9 +470,30 @@ class GNUPlotFormat(Formatter):
     def _comment_line(self, items):
         return self.comment + self.separator.join(items) + self.terminator
 
-    def _data_point(self, group, indices):
-        for array in group.set_arrays:
-            yield self.number_format.format(array[indices[:array.ndim]])
+    def _data_block(self, group, save_range):
+        """
+        Format all the points in ``save_range`` as one string.
 
-        for array in group.data:
-            yield self.number_format.format(array[indices])
+        Each column is formatted in one pass over its values, then the
+        columns are joined into rows and a blank line is inserted for each
+        loop that resets (to index 0) at that row. Note that if *all*
+        indices are zero (the first point) we don't put any blanks.
+        """
+        start, stop = save_range[0], save_range[1] + 1
+        shape = group.set_arrays[-1].shape
+
+        str_columns = [map(self.number_format.format, column.tolist())
+                       for column in self.group_columns(group, start, stop)]
+        lines = list(map(self.separator.join, zip(*str_columns)))
+
+        # the point at flat index i starts a new iteration of every loop
+        # whose inner_size (the number of points inside one iteration)
+        # divides i, and gets one extra blank line for each
+        inner_size = 1
+        for size in reversed(shape[1:]):
+            inner_size *= size
+            first = max(-(-start // inner_size) * inner_size, inner_size)
+            for i in range(first, stop, inner_size):
+                lines[i - start] = self.terminator + lines[i - start]
+
+        return self.terminator.join(lines) + self.terminator
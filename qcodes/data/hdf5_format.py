@@ -12,7 +12,78 @@ class HDF5Format(Formatter):
     HDF5 formatter for saving qcodes datasets.
 
     Capable of storing (write) and recovering (read) qcodes datasets.
+
+    Each DataArray is stored as an hdf5 dataset with the same shape, and
+    every write only saves the points that were modified since the last
+    one, as recorded by ``DataArray.modified_range``.
+
+    Args:
+        chunk_size (int): target number of values in one hdf5 chunk, for
+            arrays without an explicit entry in ``chunks``. Chunks hold
+            whole inner loops where possible. Default 8192.
+
+        chunks (Optional[dict]): ``{array_id: chunk_shape}`` to set the
+            chunk shape of specific arrays.
+
+        compression (Optional[str]): hdf5 compression filter for all data
+            arrays: 'gzip' or 'lzf'. Default None, no compression.
+
+        compression_opts (Optional[int]): compression level for 'gzip',
+            0 to 9. Default None, which means 4 in hdf5.
+
+        shuffle (bool): apply the hdf5 byte shuffle filter, which often
+            makes compression much more effective. Default False.
+
+        dtypes (Optional[dict]): ``{array_id: dtype}`` to store specific
+            arrays with a smaller floating point dtype, like 'float32' or
+            'float16'. Arrays are always read back as float64.
+
+        swmr (bool): use the hdf5 single-writer/multiple-reader mode, so
+            other processes can follow a measurement while it's being
+            written. Default False. See below.
+
+    All of these settings are recorded in the file (as attributes of the
+    'Data Arrays' group, and by hdf5 itself in each dataset), see
+    ``read_storage_options``.
+
+    In SWMR mode the writer creates the file with the latest hdf5 file
+    format, and switches it to SWMR mode on the first ``write``, after
+    creating all the datasets and writing the metadata. After that the file
+    structure is fixed, so every array must exist by the first write, and
+    metadata changes are only saved when the DataSet is finalized (which
+    needs all readers to have closed the file). Readers open the file with
+    ``swmr=True`` and keep it open, so each later ``read`` (or
+    ``DataSet.sync``) only fetches the rows that have been added since the
+    last one.
     """
+    COMPRESSION_FILTERS = ('gzip', 'lzf')
+
+    def __init__(self, chunk_size=8192, chunks=None, compression=None,
+                 compression_opts=None, shuffle=False, dtypes=None,
+                 swmr=False):
+        if compression not in (None, ) + self.COMPRESSION_FILTERS:
+            raise ValueError('compression must be one of {}, not {}'.format(
+                self.COMPRESSION_FILTERS, compression))
+        if compression_opts is not None and compression != 'gzip':
+            raise ValueError('compression_opts is only used for gzip')
+
+        self.dtypes = {}
+        for array_id, dtype in (dtypes or {}).items():
+            dtype = np.dtype(dtype)
+            # unwritten points are filled with NaN
+            if not np.issubdtype(dtype, np.floating):
+                raise TypeError('HDF5Format dtypes must be floating point, '
+                                'not {} for {}'.format(dtype, array_id))
+            self.dtypes[array_id] = dtype
+
+        self.chunk_size = chunk_size
+        self.chunks = {array_id: tuple(chunk_shape) for array_id, chunk_shape
+                       in (chunks or {}).items()}
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.shuffle = shuffle
+        self.swmr = swmr
+
     def close_file(self, data_set):
         """
         Closes the hdf5 file open in the dataset.
@@ -21,6 +92,8 @@ class HDF5Format(Formatter):
             data_set._h5_base_group.close()
             # Removes reference to closed file
             del data_set._h5_base_group
+            if hasattr(data_set, '_h5_rows_read'):
+                del data_set._h5_rows_read
         else:
             logging.warning(
                 'Cannot close file, data_set has no open hdf5 file')
@@ -33,7 +106,11 @@ class HDF5Format(Formatter):
         folder, _filename = os.path.split(filepath)
         if not os.path.isdir(folder):
             os.makedirs(folder)
-        file = h5py.File(filepath, 'a')
+        if self.swmr:
+            # SWMR needs the hdf5 1.10 file format
+            file = h5py.File(filepath, 'a', libver='latest')
+        else:
+            file = h5py.File(filepath, 'a')
         return file
 
     def _open_file(self, data_set, location=None):
@@ -41,7 +118,11 @@ class HDF5Format(Formatter):
             location = data_set.location
         filepath = self._filepath_from_location(location,
                                                 io_manager=data_set.io)
-        data_set._h5_base_group = h5py.File(filepath, 'r+')
+        if self.swmr:
+            data_set._h5_base_group = h5py.File(filepath, 'r', swmr=True,
+                                                libver='latest')
+        else:
+            data_set._h5_base_group = h5py.File(filepath, 'r+')
 
     def read(self, data_set, location=None):
         """
@@ -49,8 +130,20 @@ class HDF5Format(Formatter):
         If no data_set is provided will creata an empty data_set to read into.
         If no location is provided will use the location specified in the
         dataset.
+
+        In SWMR mode, if this data_set has already been read and its file is
+        still open, only reads the rows that were added since then.
         """
-        self._open_file(data_set, location)
+        if (self.swmr and location is None and
+                hasattr(data_set, '_h5_rows_read') and
+                self._read_new_rows(data_set)):
+            return data_set
+
+        if not (self.swmr and location is None and
+                hasattr(data_set, '_h5_base_group')):
+            # in SWMR mode keep using the open file, which may be the
+            # writer's own
+            self._open_file(data_set, location)
 
         for i, array_id in enumerate(
                 data_set._h5_base_group['Data Arrays'].keys()):
@@ -68,9 +161,7 @@ class HDF5Format(Formatter):
             set_arrays = [s.decode() for s in set_arrays]
             # else:
             #     set_arrays = ()
-            vals = dat_arr.value[:, 0]
-            if 'shape' in dat_arr.attrs.keys():
-                vals = vals.reshape(dat_arr.attrs['shape'])
+            vals = self._read_dset_values(dat_arr)
             if array_id not in data_set.arrays.keys():  # create new array
                 d_array = DataArray(
                     name=name, array_id=array_id, label=label, parameter=None,
@@ -95,8 +186,107 @@ class HDF5Format(Formatter):
             for sa_id in d_array._sa_array_ids:
                 d_array.set_arrays += (data_set.arrays[sa_id], )
         data_set = self.read_metadata(data_set)
+
+        if self.swmr:
+            data_set._h5_rows_read = {
+                array_id: dset.shape[0] for array_id, dset in
+                data_set._h5_base_group['Data Arrays'].items()}
         return data_set
 
+    def _read_new_rows(self, data_set):
+        """
+        Update a data_set from its open SWMR file, reading only the rows
+        that have been written since the last read.
+
+        The last row read before is read again, as it may have been
+        incomplete. Returns False (having read nothing) if the file doesn't
+        match what was read before, so it needs to be read in full.
+        """
+        arr_group = data_set._h5_base_group['Data Arrays']
+        rows_read = data_set._h5_rows_read
+        if set(arr_group.keys()) != set(rows_read):
+            return False
+
+        for array_id, dset in arr_group.items():
+            dset.refresh()
+            array = data_set.arrays.get(array_id)
+            n_rows = dset.shape[0]
+            if (array is None or not array.ndim or
+                    array.ndarray.shape[1:] != dset.shape[1:] or
+                    n_rows < rows_read[array_id]):
+                return False
+
+            start = max(rows_read[array_id] - 1, 0)
+            if n_rows > start:
+                array.ndarray[start:n_rows] = dset[start:n_rows]
+            rows_read[array_id] = n_rows
+        return True
+
+    @staticmethod
+    def _read_dset_values(dset):
+        """
+        Get the values of an hdf5 dataset, in the shape of the DataArray.
+
+        Datasets have the native shape of the array, except for possibly
+        fewer rows if the array wasn't completely written. Files written
+        before that have a flat (n, 1) dataset, with the shape of the array
+        in an attribute.
+        """
+        shape = tuple(dset.attrs.get('shape', dset.shape))
+        if (len(dset.shape) == len(shape) and
+                dset.shape[1:] == shape[1:] and dset.shape[0] <= shape[0]):
+            vals = np.full(shape, float('nan'))
+            vals[:dset.shape[0]] = dset[()]
+            return vals
+
+        # legacy (n, 1) layout
+        vals = dset[()][:, 0]
+        if 'shape' in dset.attrs.keys():
+            vals = vals.reshape(dset.attrs['shape'])
+        return vals
+
+    @staticmethod
+    def _save_range(array, new_dset):
+        """
+        Find the flat range ``(start, stop)`` of an array that needs writing.
+
+        If the dataset is new, that's everything from the start up to the
+        last saved or modified point, otherwise just the modified range.
+        Returns None if there is nothing to write.
+        """
+        if new_dset:
+            stop = array.last_saved_index
+            if stop is None:
+                stop = -1
+            if array.modified_range:
+                stop = max(stop, array.modified_range[1])
+            return (0, stop + 1) if stop >= 0 else None
+
+        if array.modified_range:
+            return (array.modified_range[0], array.modified_range[1] + 1)
+        return None
+
+    def _chunk_shape(self, shape):
+        """
+        Choose the hdf5 chunk shape for an array.
+
+        Chunks hold whole inner loops (as many as fit in about
+        ``chunk_size`` values), so each periodic write in a loop touches
+        only one or a few chunks. Inner loops longer than that are split
+        into equal chunks, so no chunk is left mostly empty.
+        """
+        chunks = [1] * len(shape)
+        size = 1
+        for i in reversed(range(len(shape))):
+            n = max(shape[i], 1)
+            if size * n > self.chunk_size:
+                pieces = -(-size * n // self.chunk_size)
+                chunks[i] = -(-n // pieces)
+                break
+            chunks[i] = n
+            size *= n
+        return tuple(chunks) or None
+
     def _filepath_from_location(self, location, io_manager):
         filename = os.path.split(location)[-1]
         filepath = io_manager.to_path(location +
@@ -129,6 +319,9 @@ class HDF5Format(Formatter):
             flush (bool) :  whether to flush after writing, can be disabled
                             for testing or performance reasons
 
+        In SWMR mode, the first write creates all the datasets and writes
+        the metadata, then switches the file to SWMR mode.
+
         N.B. It is recommended to close the file after writing, this can be
         done by calling
             'HDF5Format.close_file(data_set)' or
@@ -154,34 +347,56 @@ class HDF5Format(Formatter):
 
         if data_name not in data_set._h5_base_group.keys():
             arr_group = data_set._h5_base_group.create_group(data_name)
+            self._write_storage_options(arr_group)
         else:
             arr_group = data_set._h5_base_group[data_name]
 
-        for array_id in data_set.arrays.keys():
-            if array_id not in arr_group.keys() or force_write:
-                self._create_dataarray_dset(array=data_set.arrays[array_id],
-                                            group=arr_group)
+        swmr_mode = data_set._h5_base_group.swmr_mode
+        new_dsets = set()
+        for array_id, array in data_set.arrays.items():
+            # arrays of loops without a known length can change shape
+            if (array_id not in arr_group.keys() or force_write or
+                    tuple(arr_group[array_id].attrs.get(
+                        'shape', array.shape)) != tuple(array.shape)):
+                if swmr_mode:
+                    raise RuntimeError(
+                        'cannot add or replace array {} of a file in SWMR '
+                        'mode'.format(array_id))
+                if array_id in arr_group.keys():
+                    del arr_group[array_id]
+                self._create_dataarray_dset(array=array, group=arr_group)
+                new_dsets.add(array_id)
+
+        if not swmr_mode:
+            self.write_metadata(data_set)
+            if self.swmr:
+                # no new objects or attributes from here on
+                data_set._h5_base_group.swmr_mode = True
+
+        for array_id, array in data_set.arrays.items():
             dset = arr_group[array_id]
-            # Resize the dataset and add the new values
-
-            # dataset refers to the hdf5 dataset here
-            datasetshape = dset.shape
-            old_dlen = datasetshape[0]
-            x = data_set.arrays[array_id]
-            new_dlen = len(x[~np.isnan(x)])
-            new_datasetshape = (new_dlen,
-                                datasetshape[1])
-            dset.resize(new_datasetshape)
-            new_data_shape = (new_dlen-old_dlen, datasetshape[1])
-            dset[old_dlen:new_dlen] = x[old_dlen:new_dlen].reshape(
-                new_data_shape)
-            # allow resizing extracted data, here so it gets written for
-            # incremental writes aswell
-            dset.attrs['shape'] = x.shape
-        self.write_metadata(data_set)
+
+            save_range = self._save_range(array, array_id in new_dsets)
+            if save_range is None:
+                continue
+            start, stop = save_range
+
+            # grow the first dimension to hold all the rows we're writing
+            if array.ndim:
+                row_size = int(np.prod(array.shape[1:]))
+                n_rows = (stop - 1) // row_size + 1
+                if n_rows > dset.shape[0]:
+                    dset.resize(n_rows, axis=0)
+
+            # only write the modified points
+            for region in _flat_range_regions(array.shape, start, stop):
+                dset[region] = array.ndarray[region]
+
+            array.mark_saved(stop - 1)
 
         # flush ensures buffers are written to disk
-        # (useful for ensuring openable by other files)
+        # (useful for ensuring openable by other files, and needed for
+        # SWMR readers to see the new data)
         if flush:
             data_set._h5_base_group.file.flush()
 
@@ -192,9 +407,6 @@ class HDF5Format(Formatter):
         group:  group in the hdf5 file where the dset will be created
 
         creates a hdf5 datasaset that represents the data array.
-
-        note that the attribute "units" is used for shape determination
-        in the case of tuple-like variables.
         '''
         # Check for empty meta attributes, use array_id if name and/or label
         # is not specified
@@ -207,16 +419,21 @@ class HDF5Format(Formatter):
         else:
             name = array.array_id
         if array.units is None:
-            array.units = ['']  # used for shape determination
+            array.units = ['']
         units = array.units
-        # Create the hdf5 dataset
-        if isinstance(units, str):
-            n_cols = 1
-        else:
-            n_cols = len(array.units)
+        # Create the hdf5 dataset with the native shape of the array, but
+        # starting with no rows so the first dimension shows how far the
+        # data has been written. Unwritten points are read back as NaN.
+        shape = tuple(array.shape)
+        chunks = self.chunks.get(array.array_id) or self._chunk_shape(shape)
         dset = group.create_dataset(
-            array.array_id, (0, n_cols),
-            maxshape=(None, n_cols))
+            array.array_id, (0, ) + shape[1:],
+            dtype=self.dtypes.get(array.array_id, float),
+            maxshape=(None, ) + shape[1:], chunks=chunks,
+            fillvalue=float('nan'), compression=self.compression,
+            compression_opts=self.compression_opts,
+            shuffle=self.shuffle or None)
+        dset.attrs['shape'] = shape
         dset.attrs['label'] = _encode_to_utf8(str(label))
         dset.attrs['name'] = _encode_to_utf8(str(name))
         dset.attrs['units'] = _encode_to_utf8(str(units))
@@ -231,6 +448,48 @@ class HDF5Format(Formatter):
 
         return dset
 
+    def _write_storage_options(self, arr_group):
+        attrs = arr_group.attrs
+        attrs['chunk_size'] = self.chunk_size
+        attrs['compression'] = _encode_to_utf8(str(self.compression))
+        if self.compression_opts is not None:
+            attrs['compression_opts'] = self.compression_opts
+        attrs['shuffle'] = _encode_to_utf8(str(self.shuffle))
+
+    def read_storage_options(self, data_set):
+        """
+        Read the settings a file was written with.
+
+        Args:
+            data_set (DataSet): a DataSet that has been read or written by
+                this formatter, so its hdf5 file is open.
+
+        Returns:
+            dict: keyword arguments to make an ``HDF5Format`` that writes
+                the same way. ``chunks`` and ``dtypes`` are taken from the
+                datasets themselves, so they are included for every array.
+        """
+        arr_group = data_set._h5_base_group['Data Arrays']
+        attrs = arr_group.attrs
+
+        # files from before these options existed used the defaults
+        compression = attrs.get('compression', b'None').decode()
+        compression_opts = attrs.get('compression_opts', None)
+        options = {
+            'chunk_size': int(attrs.get('chunk_size', 8192)),
+            'compression': None if compression == 'None' else compression,
+            'compression_opts': (None if compression_opts is None
+                                 else int(compression_opts)),
+            'shuffle': str_to_bool(attrs.get('shuffle', b'False').decode()),
+            'chunks': {},
+            'dtypes': {}
+        }
+
+        for array_id, dset in arr_group.items():
+            options['chunks'][array_id] = dset.chunks
+            options['dtypes'][array_id] = dset.dtype
+        return options
+
     def write_metadata(self, data_set, io=None, location=None):
         """
         Writes metadata of dataset to file using write_dict_to_hdf5 method
@@ -239,8 +498,23 @@ class HDF5Format(Formatter):
         of backwards compatibility with the loop.
         This formatter uses io and location as specified for the main
         dataset.
+
+        A file in SWMR mode can't be changed, so then the metadata is only
+        written once the file has been closed (by ``DataSet.finalize``).
         """
-        if not hasattr(data_set, '_h5_base_group'):
+        if hasattr(data_set, '_h5_base_group'):
+            if data_set._h5_base_group.swmr_mode:
+                return
+        elif self.swmr:
+            try:
+                data_set._h5_base_group = self._create_data_object(data_set)
+            except OSError:
+                # SWMR readers that still have the file open lock it
+                logging.warning(
+                    'Cannot write metadata, hdf5 file is still open '
+                    'elsewhere: {}'.format(data_set.location))
+                return
+        else:
             # added here because loop writes metadata before data itself
             data_set._h5_base_group = self._create_data_object(data_set)
         if 'metadata' in data_set._h5_base_group.keys():
@@ -320,7 +594,7 @@ class HDF5Format(Formatter):
         """
         # checks if there is an open file in the dataset as load_data does
         # reading of metadata before reading the complete dataset
-        if not hasattr(self, '_h5_base_group'):
+        if not hasattr(data_set, '_h5_base_group'):
             self._open_file(data_set)
         if 'metadata' in data_set._h5_base_group.keys():
             metadata_group = data_set._h5_base_group['metadata']
@@ -368,6 +642,55 @@ class HDF5Format(Formatter):
         return data_dict
 
 
+def _flat_range_regions(shape, start, stop):
+    """
+    Split a range of flat (raveled) indices into rectangular regions.
+
+    Args:
+        shape (Tuple[int]): the shape of the array.
+        start (int): the first flat index in the range.
+        stop (int): one past the last flat index in the range.
+
+    Yields:
+        tuple: indices (ints and slices) that select one region of the
+            array, such that together they cover exactly the range.
+            There are at most ``2 * len(shape) - 1`` of them.
+    """
+    if not shape:
+        yield ()
+        return
+    if len(shape) == 1:
+        yield (slice(start, stop), )
+        return
+
+    inner_size = int(np.prod(shape[1:]))
+    first, last = start // inner_size, (stop - 1) // inner_size
+    if first == last:
+        offset = first * inner_size
+        for region in _flat_range_regions(shape[1:], start - offset,
+                                          stop - offset):
+            yield (first, ) + region
+        return
+
+    # a partial first row, some complete rows, and a partial last row
+    if start % inner_size:
+        for region in _flat_range_regions(shape[1:], start % inner_size,
+                                          inner_size):
+            yield (first, ) + region
+        first += 1
+
+    stop_in_row = stop - last * inner_size
+    if stop_in_row == inner_size:
+        last += 1
+
+    if first < last:
+        yield (slice(first, last), )
+
+    if stop_in_row < inner_size:
+        for region in _flat_range_regions(shape[1:], 0, stop_in_row):
+            yield (last, ) + region
+
+
 def _encode_to_utf8(s):
     """
     Required because h5py does not support python3 strings
@@ -127,6 +127,7 @@ class DataServer(BaseServer):
         if self._measuring:
             raise RuntimeError('Already executing a measurement')
 
+        self._release_shared_memory()
         self._data = data_set
         self._data.init_on_server()
         self._measuring = True
@@ -144,6 +145,35 @@ class DataServer(BaseServer):
         """
         self._data.store(*args)
 
+    def handle_mark_modified(self, modified_ranges):
+        """
+        Note new data written directly into shared arrays
+
+        modified_ranges: {array_id: (low, high)} flat index ranges
+        """
+        for array_id, (low, high) in modified_ranges.items():
+            self._data.arrays[array_id]._update_modified_range(low, high)
+
+    def handle_get_shared_files(self):
+        """
+        Return the files holding the shared arrays of the active DataSet,
+        as {array_id: path}
+        """
+        return {array_id: array.shared_file
+                for array_id, array in self._data.arrays.items()
+                if array.shared_file is not None}
+
+    def handle_halt(self):
+        """
+        Quit this server, deleting any shared arrays
+        """
+        self._release_shared_memory()
+        super().handle_halt()
+
+    def _release_shared_memory(self):
+        if getattr(self._data, 'shared_memory', False):
+            self._data.release_shared_memory()
+
     def handle_get_measuring(self):
         """
         Is a measurement loop presently running?
@@ -1,4 +1,5 @@
 """Instrument base class."""
+import asyncio
 import logging
 import time
 import warnings
@@ -514,6 +515,86 @@ class Instrument(Metadatable, DelegateAttributes, NestedAttrAccess,
             'Instrument {} has not defined an ask method'.format(
                 type(self).__name__))
 
+    async def write_async(self, cmd):
+        """
+        Coroutine version of ``write``, to use from an asyncio event loop.
+
+        Calls ``write_raw_async``, or if this class transforms the command
+        in ``write``, runs ``write`` in the event loop's default executor.
+
+        Args:
+            cmd (str): the string to send to the instrument
+
+        Raises:
+            Exception: wraps any underlying exception with extra context,
+                including the command and the instrument.
+        """
+        if type(self).write is not Instrument.write:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self.write, cmd)
+            return
+
+        try:
+            await self.write_raw_async(cmd)
+        except Exception as e:
+            e.args = e.args + ('writing ' + repr(cmd) + ' to ' + repr(self),)
+            raise e
+
+    async def write_raw_async(self, cmd):
+        """
+        Low level coroutine to write a command string to the hardware.
+
+        By default runs ``write_raw`` in the event loop's default executor
+        (a thread pool). Subclasses with non-blocking communication should
+        override this method.
+
+        Args:
+            cmd (str): the string to send to the instrument
+        """
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.write_raw, cmd)
+
+    async def ask_async(self, cmd):
+        """
+        Coroutine version of ``ask``, to use from an asyncio event loop.
+
+        Calls ``ask_raw_async``, or if this class transforms the command
+        in ``ask``, runs ``ask`` in the event loop's default executor.
+
+        Args:
+            cmd (str): the string to send to the instrument
+
+        Returns:
+            response (str, normally)
+
+        Raises:
+            Exception: wraps any underlying exception with extra context,
+                including the command and the instrument.
+        """
+        if type(self).ask is not Instrument.ask:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, self.ask, cmd)
+
+        try:
+            return await self.ask_raw_async(cmd)
+        except Exception as e:
+            e.args = e.args + ('asking ' + repr(cmd) + ' to ' + repr(self),)
+            raise e
+
+    async def ask_raw_async(self, cmd):
+        """
+        Low level coroutine to write to the hardware and return a response.
+
+        By default runs ``ask_raw`` in the event loop's default executor
+        (a thread pool). Subclasses with non-blocking communication should
+        override this method.
+
+        Args:
+            cmd (str): the string to send to the instrument
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.ask_raw, cmd)
+
     #
     # shortcuts to parameters & setters & getters                            #
     #
@@ -1,9 +1,113 @@
 """Ethernet instrument driver class based on sockets."""
+from functools import partial
+import asyncio
+import select
 import socket
+import threading
+import time
 
 from .base import Instrument
 
 
+class ConnectionPool:
+
+    """
+    Idle sockets kept open for reuse by ``IPInstrument`` instances with
+    ``persistent=False`` and a ``keep_alive`` time.
+
+    Sockets are pooled by ``(address, port)``, so several instruments talking
+    to the same device share them, and each socket is only used by one
+    instrument at a time. Before a socket is handed out again we check that
+    it's still healthy: a socket the device has closed, or that has data
+    waiting that nobody asked for, is closed instead. Sockets that have been
+    idle longer than their keep-alive time are closed the next time the pool
+    is used.
+    """
+
+    def __init__(self):
+        # (address, port): list of (socket, expiry time)
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Take an idle socket connected to ``key``, if there is a healthy one.
+
+        Args:
+            key (Tuple[str, int]): address and port.
+
+        Returns:
+            Optional[socket.socket]: the socket, or None if you need to
+                connect a new one.
+        """
+        with self._lock:
+            self._expire()
+            idle = self._idle.get(key, [])
+            while idle:
+                sock, _ = idle.pop()
+                if _is_healthy(sock):
+                    return sock
+                _close_socket(sock)
+        return None
+
+    def put(self, key, sock, keep_alive):
+        """
+        Return a socket to the pool.
+
+        Args:
+            key (Tuple[str, int]): address and port.
+
+            sock (socket.socket): the socket, with nothing left to read.
+
+            keep_alive (float): seconds it may stay idle before it's closed.
+        """
+        with self._lock:
+            self._expire()
+            self._idle.setdefault(key, []).append(
+                (sock, time.perf_counter() + keep_alive))
+
+    def close(self):
+        """Close all idle sockets."""
+        with self._lock:
+            for idle in self._idle.values():
+                for sock, _ in idle:
+                    _close_socket(sock)
+            self._idle = {}
+
+    def _expire(self):
+        now = time.perf_counter()
+        for key, idle in list(self._idle.items()):
+            keep = []
+            for sock, expiry in idle:
+                if expiry < now:
+                    _close_socket(sock)
+                else:
+                    keep.append((sock, expiry))
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+
+
+def _is_healthy(sock):
+    # an idle socket should have nothing to read: readable means either the
+    # device closed it, or there's a stray response we can't attribute
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return False
+    return not readable
+
+
+def _close_socket(sock):
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        # already closed by the other side
+        pass
+    sock.close()
+
+
 class IPInstrument(Instrument):
 
     r"""
@@ -22,9 +126,21 @@ class IPInstrument(Instrument):
 
         terminator (str): Character(s) to terminate each send. Default '\n'.
 
+        read_terminator (Optional[str]): Character(s) that end each response.
+            If given, responses are read until it arrives, however many
+            packets that takes. Default None: each response is whatever one
+            ``recv`` returns.
+
         persistent (bool): Whether to leave the socket open between calls.
             Default True.
 
+        keep_alive (Optional[float]): With ``persistent=False``, instead of
+            closing the socket after each call, put it in
+            ``IPInstrument.connection_pool`` for up to this many idle seconds,
+            so the next call - from this or any other instrument at the same
+            address and port - can skip the TCP handshake. Default None,
+            which closes it.
+
         write_confirmation (bool): Whether the instrument acknowledges writes
             with some response we should read. Default True.
 
@@ -37,25 +153,51 @@ class IPInstrument(Instrument):
         metadata (Optional[Dict]): additional static metadata to add to this
             instrument's JSON snapshot.
 
+    Responses are received into a reusable buffer and returned as ``str``,
+    including any terminator. ``ask_block`` reads a response with an
+    IEEE-488.2 binary block header (``#<n><length>``) until the whole block
+    has arrived, straight into a new ``bytearray`` that is returned without
+    decoding. The terminator that normally follows a block is skipped. Only
+    ``ask_block`` looks for block headers, other responses starting with
+    ``#`` are just text.
+
+    The coroutines ``ask_async`` and ``write_async`` (and so
+    ``get_async`` and ``set_async`` of its parameters) use asyncio streams
+    instead of the blocking socket, on a separate connection, so many
+    instruments can be polled concurrently from one event loop.
+
     See help for ``qcodes.Instrument`` for additional information on writing
     instrument subclasses.
     """
 
+    connection_pool = ConnectionPool()
+
     def __init__(self, name, address=None, port=None, timeout=5,
-                 terminator='\n', persistent=True, write_confirmation=True,
-                 **kwargs):
+                 terminator='\n', read_terminator=None, persistent=True,
+                 keep_alive=None, write_confirmation=True, **kwargs):
         super().__init__(name, **kwargs)
 
         self._address = address
         self._port = port
         self._timeout = timeout
         self._terminator = terminator
+        self._read_terminator = read_terminator
         self._confirmation = write_confirmation
+        self._keep_alive = keep_alive
 
         self._ensure_connection = EnsureConnection(self)
         self._buffer_size = 1400
 
         self._socket = None
+        self._response_buffer = _ResponseBuffer(self._buffer_size)
+
+        # asyncio connection, and the event loop it belongs to
+        self._ensure_async_connection = EnsureAsyncConnection(self)
+        self._async_loop = None
+        self._async_lock = None
+        self._reader = None
+        self._writer = None
+        self._async_response_buffer = _ResponseBuffer(self._buffer_size)
 
         self.set_persistent(persistent)
 
@@ -92,6 +234,7 @@ class IPInstrument(Instrument):
                             'you must provide one.')
 
         self._disconnect()
+        self._disconnect_async()
         self.set_persistent(self._persistent)
 
     def set_persistent(self, persistent):
@@ -107,21 +250,57 @@ class IPInstrument(Instrument):
         else:
             self._disconnect()
 
+    def _pooled(self):
+        return bool(self._keep_alive) and not self._persistent
+
     def _connect(self):
         if self._socket is not None:
             self._disconnect()
 
-        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._socket.connect((self._address, self._port))
+        if self._pooled():
+            self._socket = self.connection_pool.get(
+                (self._address, self._port))
+
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.connect((self._address, self._port))
         self.set_timeout(self._timeout)
 
-    def _disconnect(self):
+    def _disconnect(self, reuse=False):
         if getattr(self, '_socket', None) is None:
             return
 
-        self._socket.shutdown(socket.SHUT_RDWR)
-        self._socket.close()
+        if reuse and self._pooled() and self._response_buffer.empty():
+            self.connection_pool.put((self._address, self._port),
+                                     self._socket, self._keep_alive)
+        else:
+            _close_socket(self._socket)
         self._socket = None
+        # anything left unread belonged to that connection
+        self._response_buffer.clear()
+
+    async def _connect_async(self):
+        self._disconnect_async()
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self._address, self._port),
+            self._timeout)
+
+    def _disconnect_async(self):
+        if getattr(self, '_writer', None) is None:
+            return
+
+        if self._async_loop.is_closed():
+            # the transport can't be closed without its loop, and the lock
+            # belonged to that loop too
+            self._async_lock = None
+        else:
+            try:
+                self._writer.close()
+            except RuntimeError:
+                # the loop was closed in the meantime
+                pass
+        self._reader = self._writer = None
+        self._async_response_buffer.clear()
 
     def set_timeout(self, timeout=None):
         """
@@ -145,16 +324,57 @@ class IPInstrument(Instrument):
         """
         self._terminator = terminator
 
+    def set_read_terminator(self, read_terminator):
+        r"""
+        Change the character(s) that end each response.
+
+        Args:
+            read_terminator (Optional[str]): Character(s) that end each
+                response, or None to take whatever one ``recv`` returns.
+        """
+        self._read_terminator = read_terminator
+
     def _send(self, cmd):
         data = cmd + self._terminator
         self._socket.send(data.encode())
 
-    def _recv(self):
-        return self._socket.recv(self._buffer_size).decode()
+    def _response_terminator(self, block):
+        # a block needs to know what terminator follows it, to skip it
+        terminator = self._read_terminator
+        if block and not terminator:
+            terminator = self._terminator[-1:]
+        return terminator.encode() if terminator else None
+
+    def _recv(self, block=False):
+        buffer = self._response_buffer
+        terminator = self._response_terminator(block)
+        while True:
+            response = buffer.next_response(terminator, block)
+            if response is not None:
+                return response
+            buffer.receive(self._socket.recv_into)
+
+    async def _send_async(self, cmd):
+        data = cmd + self._terminator
+        self._writer.write(data.encode())
+        await self._writer.drain()
+
+    async def _recv_async(self, block=False):
+        # StreamReader has no recv_into, so here we copy each chunk in
+        buffer = self._async_response_buffer
+        terminator = self._response_terminator(block)
+        while True:
+            response = buffer.next_response(terminator, block)
+            if response is not None:
+                return response
+            data = await asyncio.wait_for(self._reader.read(buffer.free()),
+                                          self._timeout)
+            buffer.receive(partial(_copy_into, data))
 
     def close(self):
         """Disconnect and irreversibly tear down the instrument."""
         self._disconnect()
+        self._disconnect_async()
         super().close()
 
     def write_raw(self, cmd):
@@ -184,6 +404,62 @@ class IPInstrument(Instrument):
             self._send(cmd)
             return self._recv()
 
+    def ask_block(self, cmd):
+        """
+        Send a command and read an IEEE-488.2 binary block response.
+
+        Args:
+            cmd (str): The command to send to the instrument.
+
+        Returns:
+            Union[bytearray, str]: The block payload, not decoded. If the
+                response isn't a block (like an error message) it's
+                returned as text, up to the read terminator.
+        """
+        with self._ensure_connection:
+            self._send(cmd)
+            return self._recv(block=True)
+
+    async def ask_block_async(self, cmd):
+        """
+        Coroutine version of ``ask_block``.
+
+        Args:
+            cmd (str): The command to send to the instrument.
+
+        Returns:
+            Union[bytearray, str]: The block payload, not decoded.
+        """
+        async with self._ensure_async_connection:
+            await self._send_async(cmd)
+            return await self._recv_async(block=True)
+
+    async def write_raw_async(self, cmd):
+        """
+        Low-level coroutine to send a command that gets no response.
+
+        Args:
+            cmd (str): The command to send to the instrument.
+        """
+        async with self._ensure_async_connection:
+            await self._send_async(cmd)
+            if self._confirmation:
+                await self._recv_async()
+
+    async def ask_raw_async(self, cmd):
+        """
+        Low-level coroutine to send a command an read a response.
+
+        Args:
+            cmd (str): The command to send to the instrument.
+
+        Returns:
+            str: The instrument's response.
+        """
+        async with self._ensure_async_connection:
+            await self._send_async(cmd)
+            return await self._recv_async()
+
     def __del__(self):
         self.close()
 
@@ -204,8 +480,10 @@ class IPInstrument(Instrument):
         snap['confirmation'] = self._confirmation
         snap['address'] = self._address
         snap['terminator'] = self._terminator
+        snap['read_terminator'] = self._read_terminator
         snap['timeout'] = self._timeout
         snap['persistent'] = self._persistent
+        snap['keep_alive'] = self._keep_alive
 
         return snap
 
@@ -233,4 +511,223 @@ class EnsureConnection:
     def __exit__(self, type, value, tb):
         """Possibly disconnect on exiting the context."""
         if not self.instrument._persistent:
-            self.instrument._disconnect()
+            # a connection that saw an error isn't safe to reuse
+            self.instrument._disconnect(reuse=type is None)
+
+
+class EnsureAsyncConnection:
+
+    """
+    Async context manager to ensure an instrument's asyncio connection is
+    open when needed, and that only one coroutine uses it at a time.
+
+    The connection and its lock belong to one event loop: if used from a
+    different loop, we reconnect.
+
+    Args:
+        instrument (IPInstrument): the instance to connect.
+    """
+
+    def __init__(self, instrument):
+        self.instrument = instrument
+
+    async def __aenter__(self):
+        """Take the connection, connecting first if needed."""
+        instrument = self.instrument
+        loop = asyncio.get_event_loop()
+        if instrument._async_loop is not loop:
+            instrument._disconnect_async()
+            instrument._async_loop = loop
+            instrument._async_lock = asyncio.Lock()
+
+        await instrument._async_lock.acquire()
+        try:
+            if not instrument._persistent or instrument._writer is None:
+                await instrument._connect_async()
+        except BaseException:
+            instrument._async_lock.release()
+            raise
+
+    async def __aexit__(self, type, value, tb):
+        """Possibly disconnect, and release the connection."""
+        instrument = self.instrument
+        if not instrument._persistent or type is not None:
+            # after an error (like a timeout) we don't know what's left
+            # unread on the connection, so start over next time
+            instrument._disconnect_async()
+        instrument._async_lock.release()
+
+
+class _ResponseBuffer:
+
+    """
+    Bytes received from an instrument that haven't been returned yet.
+
+    Data is received into one ``bytearray`` that is reused (and grown if a
+    single text response doesn't fit) for the life of the connection. Only
+    binary blocks get their own ``bytearray``, sized from the block header
+    and received into directly, so the payload is never copied again.
+
+    Without a terminator, a text response is whatever has been received.
+
+    Args:
+        size (int): initial size of the buffer in bytes.
+    """
+
+    def __init__(self, size):
+        self._data = bytearray(size)
+        self.clear()
+
+    def empty(self):
+        """Whether everything received has been returned."""
+        return (self._start == self._end and self._block is None and
+                not self._skip_terminator)
+
+    def clear(self):
+        """Forget anything received but not yet returned."""
+        self._start = self._end = 0
+        self._block = None
+        self._block_filled = 0
+        self._block_terminator = None
+        self._skip_terminator = None
+
+    def next_response(self, terminator, block=False):
+        """
+        Take the next complete response, if it has all arrived.
+
+        Args:
+            terminator (Optional[bytes]): what ends a text response, and
+                follows a block. None to take everything received so far.
+            block (bool): whether the response may be a binary block.
+
+        Returns:
+            Optional[Union[str, bytearray]]: the text response including its
+                terminator, or a binary block payload. None if we need to
+                ``receive`` more first.
+        """
+        if self._block is not None:
+            return self._finish_block()
+
+        data = self._data
+        skip = self._skip_terminator
+        if skip:
+            # the terminator that followed the last block
+            if self._end - self._start < len(skip):
+                if skip.startswith(data[self._start:self._end]):
+                    # could be (the start of) the terminator, or nothing yet
+                    return None
+            elif data.startswith(skip, self._start):
+                self._start += len(skip)
+            self._skip_terminator = None
+
+        if (block and self._start < self._end and
+                data[self._start] == ord('#')):
+            if self._end - self._start < 2:
+                # can't tell yet if this is a block header
+                return None
+            if chr(data[self._start + 1]).isdigit():
+                return self._start_block(terminator)
+
+        if terminator is None:
+            return self._next_chunk()
+        return self._next_line(terminator)
+
+    def free(self):
+        """How many bytes the next ``receive`` can take."""
+        target, offset = self._target()
+        return len(target) - offset
+
+    def receive(self, recv_into):
+        """
+        Receive more data from the instrument.
+
+        Args:
+            recv_into (callable): like ``socket.recv_into``, takes a writable
+                buffer, fills (part of) it and returns the number of bytes.
+
+        Raises:
+            ConnectionError: if the connection was closed by the instrument.
+        """
+        target, offset = self._target()
+        with memoryview(target) as view, view[offset:] as space:
+            count = recv_into(space)
+        if not count:
+            raise ConnectionError('connection closed by the instrument')
+
+        if self._block is not None:
+            self._block_filled += count
+        else:
+            self._end += count
+
+    def _target(self):
+        if self._block is not None:
+            return self._block, self._block_filled
+
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._data):
+            unread = self._end - self._start
+            if self._start:
+                # move the partial response to the front
+                self._data[:unread] = self._data[self._start:self._end]
+                self._start, self._end = 0, unread
+            else:
+                self._data.extend(bytes(len(self._data)))
+        return self._data, self._end
+
+    def _start_block(self, terminator):
+        # IEEE-488.2 block header: '#', the number of length digits, then
+        # the length. '#0' is an indefinite-length block, which just runs up
+        # to the terminator.
+        data = self._data
+        digits = data[self._start + 1] - ord('0')
+        if digits == 0:
+            stop = data.find(terminator, self._start + 2, self._end)
+            if stop < 0:
+                return None
+            payload = data[self._start + 2:stop]
+            self._start = stop + len(terminator)
+            return payload
+
+        if self._end - self._start < 2 + digits:
+            return None
+        length = int(data[self._start + 2:self._start + 2 + digits])
+        self._start += 2 + digits
+
+        # whatever part of the payload we already have goes into the block
+        # buffer, the rest will be received straight into it
+        block = bytearray(length)
+        take = min(length, self._end - self._start)
+        block[:take] = data[self._start:self._start + take]
+        self._start += take
+        self._block, self._block_filled = block, take
+        self._block_terminator = terminator
+        return self._finish_block()
+
+    def _finish_block(self):
+        if self._block_filled < len(self._block):
+            return None
+        block, self._block = self._block, None
+        self._skip_terminator = self._block_terminator
+        return block
+
+    def _next_chunk(self):
+        if self._start == self._end:
+            return None
+        response = self._data[self._start:self._end].decode()
+        self._start = self._end
+        return response
+
+    def _next_line(self, terminator):
+        stop = self._data.find(terminator, self._start, self._end)
+        if stop < 0:
+            return None
+        stop += len(terminator)
+        response = self._data[self._start:stop].decode()
+        self._start = stop
+        return response
+
+
+def _copy_into(data, space):
+    space[:len(data)] = data
+    return len(data)
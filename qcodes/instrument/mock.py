@@ -207,6 +207,8 @@ class MockModel(ServerManager, BaseServer):  # pragma: no cover
         self.delattr = self._delattr
 
     def _run_server(self):
+        if self._transport is not None:
+            self._query_queue, self._response_queue = self._transport.serve()
         self.run_event_loop()
 
     def handle_cmd(self, cmd):
@@ -38,6 +38,7 @@ Measured parameters should have .get() which can return:
 
 from datetime import datetime, timedelta
 from copy import copy
+import asyncio
 import time
 import logging
 import os
@@ -49,6 +50,7 @@ from qcodes.utils.deferred_operations import DeferredOperations
 from qcodes.utils.helpers import (permissive_range, wait_secs, is_sequence_of,
                                   DelegateAttributes, full_class, named_repr)
 from qcodes.utils.metadata import Metadatable
+from qcodes.utils.timing import sleep_until
 from qcodes.utils.command import Command, NoCommandError
 from qcodes.utils.validators import Validator, Numbers, Ints, Enum, Anything
 from qcodes.instrument.sweep_values import SweepFixedValues
@@ -559,6 +561,75 @@ class StandardParameter(Parameter):
                 'getting {}:{}'.format(self._instrument.name, self.name),)
             raise e
 
+    async def get_async(self):
+        """
+        Coroutine version of ``get``, to use from an asyncio event loop.
+
+        If the get command is a string, the instrument is queried with
+        ``ask_async``, so instruments with non-blocking communication (like
+        ``IPInstrument``) can be read concurrently without threads, eg::
+
+            values = loop.run_until_complete(asyncio.gather(
+                *(param.get_async() for param in params)))
+
+        Otherwise ``get`` runs in the event loop's default executor.
+
+        Returns:
+            any: the parameter value.
+        """
+        get = self._get
+        if getattr(get, 'exec_str', None) is None:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, self.get)
+
+        try:
+            value = await self._instrument.ask_async(get.cmd_str.format())
+            if hasattr(get, 'output_parser'):
+                value = get.output_parser(value)
+            self._save_val(value)
+            return value
+        except Exception as e:
+            e.args = e.args + (
+                'getting {}:{}'.format(self._instrument.name, self.name),)
+            raise e
+
+    async def set_async(self, value):
+        """
+        Coroutine version of ``set``, to use from an asyncio event loop.
+
+        If the set command is a string, the instrument is written with
+        ``write_async``, and any ``delay`` is an ``asyncio.sleep``.
+        Otherwise, or if this parameter sets in steps, ``set`` runs in the
+        event loop's default executor.
+
+        Args:
+            value (any): the new value for the parameter.
+        """
+        set_cmd = self._set
+        if (getattr(set_cmd, 'exec_str', None) is None or
+                self.set != self._validate_and_set):
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self.set, value)
+            return
+
+        try:
+            clock = time.perf_counter()
+            self.validate(value)
+            encoded = value
+            if hasattr(set_cmd, 'input_parser'):
+                encoded = set_cmd.input_parser(value)
+            await self._instrument.write_async(
+                set_cmd.cmd_str.format(encoded))
+            self._save_val(value)
+            if self._delay is not None:
+                clock = self._update_set_ts(clock)
+                await asyncio.sleep(max(0, clock - time.perf_counter()))
+        except Exception as e:
+            e.args = e.args + (
+                'setting {}:{} to {}'.format(self._instrument.name,
+                                             self.name, repr(value)),)
+            raise e
+
     def _valmapping_get_parser(self, val):
         """
         Get parser to be used in the case that a val_mapping is defined
@@ -609,8 +680,8 @@ class StandardParameter(Parameter):
             self._set(value)
             self._save_val(value)
             if self._delay is not None:
-                clock, remainder = self._update_set_ts(clock)
-                time.sleep(remainder)
+                clock = self._update_set_ts(clock)
+                sleep_until(clock)
         except Exception as e:
             e.args = e.args + (
                 'setting {}:{} to {}'.format(self._instrument.name,
@@ -641,18 +712,14 @@ class StandardParameter(Parameter):
         return permissive_range(start_value, value, self._step)[1:]
 
     def _update_set_ts(self, step_clock):
-        # calculate the delay time to the *max* delay,
-        # then take off up to the tolerance
+        # the deadline after the *max* delay, which we may already be
+        # past by up to the tolerance
         tolerance = self._delay_tolerance
         step_clock += self._delay
-        remainder = wait_secs(step_clock + tolerance)
-        if remainder <= tolerance:
+        if wait_secs(step_clock + tolerance) <= tolerance:
             # don't allow extra delays to compound
             step_clock = time.perf_counter()
-            remainder = 0
-        else:
-            remainder -= tolerance
-        return step_clock, remainder
+        return step_clock
 
     def _validate_and_sweep(self, value):
         try:
@@ -663,15 +730,15 @@ class StandardParameter(Parameter):
                 self._set(step_val)
                 self._save_val(step_val)
                 if self._delay is not None:
-                    step_clock, remainder = self._update_set_ts(step_clock)
-                    time.sleep(remainder)
+                    step_clock = self._update_set_ts(step_clock)
+                    sleep_until(step_clock)
 
             self._set(value)
             self._save_val(value)
 
             if self._delay is not None:
-                step_clock, remainder = self._update_set_ts(step_clock)
-                time.sleep(remainder)
+                step_clock = self._update_set_ts(step_clock)
+                sleep_until(step_clock)
         except Exception as e:
             e.args = e.args + (
                 'setting {}:{} to {}'.format(self._instrument.name,
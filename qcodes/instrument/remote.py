@@ -1,4 +1,5 @@
 """Proxies to interact with server-based instruments from another process."""
+from functools import partial
 import multiprocessing as mp
 
 from qcodes.utils.deferred_operations import DeferredOperations
@@ -125,6 +126,23 @@ class RemoteInstrument(DelegateAttributes):
         """Query the server copy of this instrument, expecting a response."""
         return self._manager.ask('cmd', self._id, func_name, *args, **kwargs)
 
+    def batch(self, commands):
+        """
+        Call several methods of the server instrument in one query.
+
+        Examples:
+            >>> gates.batch([('get', 'chan0'), ('set', 'chan1', 0.5)])
+            [0.1, None]
+
+        Args:
+            commands (Sequence[tuple]): ``(func_name, *args)`` for each call.
+
+        Returns:
+            list: the return value of each call, in order.
+        """
+        return self._manager.batch([(self._id,) + tuple(command)
+                                    for command in commands])
+
     def _write_server(self, func_name, *args, **kwargs):
         """Send a command to the server, without waiting for a response."""
         self._manager.write('cmd', self._id, func_name, *args, **kwargs)
@@ -527,3 +545,52 @@ class RemoteFunction(RemoteComponent):
         """
         return self._instrument._ask_server(
             'callattr', self.name + '.validate', *args)
+
+
+def batch_gets(parameters):
+    """
+    Group parameter gets so that RemoteParameters on the same server are
+    read with one query.
+
+    Args:
+        parameters (Sequence[Parameter]): the parameters to read, any mix of
+            local and remote.
+
+    Returns:
+        List[Tuple[callable, List[int]]]: ``(getter, indices)`` pairs.
+            Each ``getter`` takes no arguments and returns a list of the
+            values of ``parameters[i] for i in indices``. Parameters not on
+            a server, or alone on their server, get their own pair.
+    """
+    groups = []
+    server_groups = {}
+    for i, parameter in enumerate(parameters):
+        if (isinstance(parameter, RemoteParameter) and
+                getattr(parameter.get, '__func__', None) is
+                RemoteParameter.get):
+            manager = parameter._instrument._manager
+            if id(manager) in server_groups:
+                server_groups[id(manager)][1].append(i)
+                continue
+            group = (manager, [i])
+            server_groups[id(manager)] = group
+        else:
+            group = (None, [i])
+        groups.append(group)
+
+    getters = []
+    for manager, indices in groups:
+        if len(indices) == 1:
+            getters.append((_single_get(parameters[indices[0]].get),
+                            indices))
+        else:
+            commands = [(parameters[i]._instrument._id, 'get',
+                         parameters[i].name) for i in indices]
+            getters.append((partial(manager.batch, commands), indices))
+    return getters
+
+
+def _single_get(get):
+    def get_list():
+        return [get()]
+    return get_list
@@ -1,6 +1,12 @@
+from functools import partial
+from queue import Queue
+from traceback import format_exc
+import logging
 import multiprocessing as mp
+import threading
 
-from qcodes.process.server import ServerManager, BaseServer
+from qcodes.process.server import (ServerManager, BaseServer, QUERY_ASK,
+                                   RESPONSE_OK, RESPONSE_ERROR)
 
 
 def get_instrument_server_manager(server_name, shared_kwargs={}):
@@ -92,6 +98,19 @@ class InstrumentServerManager(ServerManager):
 
         return info
 
+    def batch(self, commands):
+        """
+        Run several instrument methods on the server in one query.
+
+        Args:
+            commands (Sequence[tuple]): ``(instrument_id, func_name, *args)``
+                for each call, as for ``handle_cmd``.
+
+        Returns:
+            list: the return value of each call, in order.
+        """
+        return self.ask('batch', commands)
+
     def delete(self, instrument_id):
         self.write('delete', instrument_id)
 
@@ -104,15 +123,32 @@ class InstrumentServerManager(ServerManager):
 
 
 class InstrumentServer(BaseServer):
+    """
+    Holds instruments in a server process and runs their methods on request.
+
+    If the manager's transport can send responses out of order (like
+    `SocketTransport`), and `concurrent` is True, each instrument gets a
+    worker thread: calls to one instrument run in the order they arrive,
+    but a slow instrument doesn't hold up the others. With the default
+    Queue transport, all queries run one at a time in the server's event
+    loop.
+    """
     # just for testing - how long to allow it to wait on a queue.get
     timeout = None
 
+    # run each instrument's commands in its own thread, if we can
+    concurrent = True
+
     def __init__(self, query_queue, response_queue, shared_kwargs):
         super().__init__(query_queue, response_queue, shared_kwargs)
 
         self.instruments = {}
         self.next_id = 0
 
+        self._workers = None
+        if self.concurrent and hasattr(response_queue, 'put_to'):
+            self._workers = {}
+
         # Ensure no references of instruments defined in the main process
         # are copied to the server process. With the spawn multiprocessing
         # method this is not an issue, as the class is reimported in the
@@ -122,6 +158,69 @@ class InstrumentServer(BaseServer):
 
         self.run_event_loop()
 
+    def process_query(self, query):
+        """
+        Hand instrument commands to the worker thread of their instrument,
+        if we have workers, otherwise process them here like anything else.
+        """
+        try:
+            code, func_name, args, kwargs = query
+        except (TypeError, ValueError):
+            func_name = None
+
+        if self._workers is None or func_name not in ('cmd', 'batch',
+                                                      'delete'):
+            return super().process_query(query)
+
+        respond = partial(self._response_queue.put_to,
+                          self._response_queue.reply_to())
+
+        if func_name == 'delete':
+            try:
+                worker = self._workers.pop(args[0], None)
+            except (IndexError, TypeError):
+                worker = None
+            if worker:
+                # finish everything already sent to this instrument first,
+                # then come back here to delete it. Meanwhile we carry on
+                # serving the other instruments.
+                queries = self._query_queue
+                worker.put(partial(queries.requeue, query, queries.current))
+                worker.stop(wait=False)
+                return
+            return super().process_query(query, respond)
+
+        try:
+            if func_name == 'cmd':
+                instrument_ids = {args[0]}
+            else:
+                instrument_ids = {command[0] for command in args[0]}
+        except Exception:
+            # malformed, let the normal error handling report it
+            instrument_ids = {None}
+
+        if len(instrument_ids) <= 1:
+            instrument_id, = instrument_ids or {None}
+            self._worker(instrument_id).put(
+                partial(BaseServer.process_query, self, query, respond))
+        else:
+            _Batch(self, code, args[0], respond).start()
+
+    def _worker(self, instrument_id):
+        worker = self._workers.get(instrument_id)
+        if worker is None:
+            worker = self._workers[instrument_id] = _Worker(instrument_id)
+        return worker
+
+    def handle_halt(self):
+        """
+        Quit this server, after the commands already sent to each
+        instrument are done.
+        """
+        for worker in (self._workers or {}).values():
+            worker.stop(wait=False)
+        super().handle_halt()
+
     def handle_new_id(self):
         """
         split out id generation from adding an instrument
@@ -187,3 +286,110 @@ class InstrumentServer(BaseServer):
         """
         func = getattr(self.instruments[instrument_id], func_name)
         return func(*args, **kwargs)
+
+    def handle_batch(self, commands):
+        """
+        Run several methods, of one or more instruments, and return all
+        their results. Stops at the first error, like separate queries would.
+        With worker threads, commands for different instruments run in
+        parallel (see `_Batch`), but nothing after an error is started.
+
+        commands: a sequence of (instrument_id, func_name, *args) tuples
+        """
+        return [self.handle_cmd(*command) for command in commands]
+
+
+class _Worker:
+
+    """Runs the commands for one instrument, in order, in its own thread."""
+
+    def __init__(self, instrument_id):
+        self._jobs = Queue()
+        self._thread = threading.Thread(
+            target=self._run, name='instrument {}'.format(instrument_id),
+            daemon=True)
+        self._thread.start()
+
+    def put(self, job):
+        self._jobs.put(job)
+
+    def stop(self, wait=True):
+        self._jobs.put(None)
+        if wait:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            # jobs handle their own errors, but don't let a bug in one
+            # stop this instrument forever
+            try:
+                job()
+            except Exception:
+                logging.error(format_exc())
+
+
+class _Batch:
+
+    """
+    A batch of commands for several instruments: each instrument's part
+    runs in its worker, and the last one to finish sends the response.
+
+    Like a batch for a single instrument, it stops at the first error: once
+    a command fails, no command after it in the batch is started. Commands
+    for other instruments that were already running still finish.
+    """
+
+    def __init__(self, server, code, commands, respond):
+        self.server = server
+        self.code = code
+        self.commands = commands
+        self.respond = respond
+
+        self.results = [None] * len(commands)
+        self.errors = []
+        # index of the earliest command that failed so far
+        self.failed_at = None
+        self.groups = {}
+        for i, command in enumerate(commands):
+            self.groups.setdefault(command[0], []).append(i)
+        self.remaining = len(self.groups)
+        self.lock = threading.Lock()
+
+    def start(self):
+        for instrument_id, indices in self.groups.items():
+            self.server._worker(instrument_id).put(
+                partial(self._run_group, indices))
+
+    def _run_group(self, indices):
+        error = None
+        for i in indices:
+            failed_at = self.failed_at
+            if failed_at is not None and failed_at < i:
+                break
+            try:
+                self.results[i] = self.server.handle_cmd(*self.commands[i])
+            except Exception:
+                error = (i, repr(self.commands[i]) + '\n' + format_exc())
+                with self.lock:
+                    if self.failed_at is None or i < self.failed_at:
+                        self.failed_at = i
+                break
+
+        with self.lock:
+            if error:
+                self.errors.append(error)
+            self.remaining -= 1
+            if self.remaining:
+                return
+
+        if self.errors:
+            error_str = min(self.errors)[1]
+            if self.code == QUERY_ASK:
+                self.respond((RESPONSE_ERROR, error_str))
+            else:
+                logging.error(error_str)
+        elif self.code == QUERY_ASK:
+            self.respond((RESPONSE_OK, self.results))
@@ -20,6 +20,22 @@ class SweepValues(Metadatable):
 
     >>> .feedback(set_values, measured_values)
 
+    If the parameter can sweep a whole list of values in hardware, it can
+    implement the BufferedSweep protocol:
+
+    >>> .prepare_buffered_sweep(values, delay)  # upload the setpoints
+    >>> .run_buffered_sweep()  # trigger once, return when it's done
+
+    If every parameter measured at each setpoint can collect its readings
+    during such a sweep, with:
+
+    >>> .prepare_buffered_get(npts)  # arm for npts readings
+    >>> .get_buffered()  # return the npts readings as an array
+
+    then a Loop running this sweep as its innermost loop does the whole
+    row in one ``run_buffered_sweep`` instead of setting and getting at
+    every point. See ``buffered``.
+
     Todo:
         - Link to adawptive sweep
 
@@ -63,6 +79,17 @@ class SweepValues(Metadatable):
 
         self.set = parameter.set
 
+    @property
+    def buffered(self):
+        """
+        Whether the parameter implements the BufferedSweep protocol, and
+        this sweep can use it: it must have fixed values, so no
+        ``feedback``.
+        """
+        return (not hasattr(self, 'feedback') and
+                hasattr(self.parameter, 'prepare_buffered_sweep') and
+                hasattr(self.parameter, 'run_buffered_sweep'))
+
     def validate(self, values):
         """
         Check that all values are allowed for this Parameter.
@@ -1,6 +1,5 @@
 from qcodes import VisaInstrument
 from qcodes.utils import validators as vals
-from cmath import phase
 import numpy as np
 from qcodes import Parameter
 
@@ -39,18 +38,13 @@ class FrequencySweep(Parameter):
         # need to ensure averaged result is returned
         for avgcount in range(self._instrument.avg()):
             self._instrument.write('INIT:IMM; *WAI')
-        data_str = self._instrument.ask('CALC:DATA? SDAT').split(',')
-        data_list = [float(v) for v in data_str]
-
-        # data_list of complex numbers [re1,im1,re2,im2...]
-        data_arr = np.array(data_list).reshape(int(len(data_list) / 2), 2)
-        mag_array, phase_array = [], []
-        for comp in data_arr:
-            complex_num = complex(comp[0], comp[1])
-            mag_array.append(abs(complex_num))
-            phase_array.append(phase(complex_num))
+        # binary REAL,32 (see ZNB20.initialise) of complex numbers
+        # [re1, im1, re2, im2...]
+        data = self._instrument.ask_binary_values('CALC:DATA? SDAT',
+                                                  datatype='f')
+        complex_array = data[0::2] + 1j * data[1::2]
         self._instrument.cont_meas_on()
-        return mag_array, phase_array
+        return np.abs(complex_array), np.angle(complex_array)
 
 
 class ZNB20(VisaInstrument):
@@ -147,6 +141,9 @@ class ZNB20(VisaInstrument):
         self.write('SENS1:SWE:TIME:AUTO ON')
         self.write('TRIG1:SEQ:SOUR IMM')
         self.write('SENS1:AVER:STAT ON')
+        # traces are transferred as little-endian 32-bit floats
+        self.write('FORM:DATA REAL,32')
+        self.write('FORM:BORD SWAP')
         self.update_display_on()
         self.start(1e6)
         self.stop(2e6)
@@ -1,4 +1,45 @@
+import numpy as np
+
 from qcodes import VisaInstrument
+from qcodes.instrument.parameter import StandardParameter
+
+
+class ListSweepParameter(StandardParameter):
+    """
+    The voltage or current of a Keithley 2600 channel, which can also sweep
+    a list of source levels with the TSP trigger model, and read back what
+    it measured at each level.
+
+    This implements the BufferedSweep protocol (see ``SweepValues``) as
+    both the swept and the measured parameter, so for example
+    ``Loop(k.volt.sweep(0, 1, num=101)).each(k.curr)`` runs as one sweep
+    in the instrument.
+
+    Args:
+        name (str): 'volt' or 'curr'
+        instrument (Keithley_2600): the instrument
+        **kwargs: passed on to StandardParameter
+    """
+    _tsp_names = {'volt': ('v', 'nvbuffer2'), 'curr': ('i', 'nvbuffer1')}
+
+    def __init__(self, name, instrument, **kwargs):
+        super().__init__(name, instrument=instrument, **kwargs)
+        self._tsp_name, self._buffer = self._tsp_names[name]
+        self._npts = None
+
+    def prepare_buffered_sweep(self, values, delay):
+        for value in values:
+            self.validate(value)
+        self._instrument._list_sweep = (self._tsp_name, values, delay)
+
+    def run_buffered_sweep(self):
+        self._instrument.run_list_sweep()
+
+    def prepare_buffered_get(self, npts):
+        self._npts = npts
+
+    def get_buffered(self):
+        return self._instrument.read_buffer(self._buffer, self._npts)
 
 
 class Keithley_2600(VisaInstrument):
@@ -19,11 +60,16 @@ class Keithley_2600(VisaInstrument):
         super().__init__(name, address, terminator='\n', **kwargs)
         self._channel = channel
 
+        # the pending list sweep, see ListSweepParameter
+        self._list_sweep = None
+
         self.add_parameter('volt', get_cmd='measure.v()',
+                           parameter_class=ListSweepParameter,
                            get_parser=float, set_cmd='source.levelv={:.8f}',
                            label='Voltage',
                            units='V')
         self.add_parameter('curr', get_cmd='measure.i()',
+                           parameter_class=ListSweepParameter,
                            get_parser=float, set_cmd='source.leveli={:.8f}',
                            label='Current',
                            units='A')
@@ -76,6 +122,48 @@ class Keithley_2600(VisaInstrument):
     def reset(self):
         self.write('reset()')
 
+    def run_list_sweep(self):
+        """
+        Run the list sweep set up by ``volt`` or ``curr``
+        ``.prepare_buffered_sweep``, measuring both current (into nvbuffer1)
+        and voltage (into nvbuffer2) at each source level, and wait for it
+        to finish.
+        """
+        source, values, delay = self._list_sweep
+        levels = ','.join('{:.8f}'.format(value) for value in values)
+        self.write('nvbuffer1.clear()')
+        self.write('nvbuffer2.clear()')
+        self.write('measure.delay={:.6f}'.format(delay))
+        self.write('trigger.source.list{}({{{}}})'.format(source, levels))
+        self.write('trigger.source.action=smu{}.ENABLE'.format(self._channel))
+        self.write('trigger.measure.iv(smu{0}.nvbuffer1, '
+                   'smu{0}.nvbuffer2)'.format(self._channel))
+        self.write('trigger.measure.action=smu{}.ENABLE'.format(
+            self._channel))
+        self.write('trigger.count={:d}'.format(len(values)))
+        self.write('trigger.initiate()')
+        # waitcomplete() is a global TSP function, not an smu one
+        super().ask('waitcomplete() print(1)')
+        self.write('trigger.source.action=smu{}.DISABLE'.format(
+            self._channel))
+        self.write('trigger.measure.action=smu{}.DISABLE'.format(
+            self._channel))
+
+    def read_buffer(self, buffer, npts):
+        """
+        Read readings from a reading buffer of this channel.
+
+        Args:
+            buffer (str): 'nvbuffer1' (current) or 'nvbuffer2' (voltage)
+            npts (int): the number of readings
+
+        Returns:
+            numpy.ndarray: the readings
+        """
+        data = super().ask('printbuffer(1, {:d}, smu{}.{}.readings)'.format(
+            npts, self._channel, buffer))
+        return np.array(data.split(','), dtype=float)
+
     def ask(self, cmd):
         return super().ask('print(smu{:s}.{:s})'.format(self._channel, cmd))
 
@@ -46,6 +46,7 @@ Supported commands to .set_measurement or .each are:
     - Wait: a delay
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import multiprocessing as mp
 import time
@@ -57,17 +58,31 @@ from qcodes.station import Station
 from qcodes.data.data_set import new_data, DataMode
 from qcodes.data.data_array import DataArray
 from qcodes.data.manager import get_data_manager
-from qcodes.utils.helpers import wait_secs, full_class, tprint
+from qcodes.instrument.sweep_values import SweepValues
+from qcodes.utils.helpers import full_class, tprint
 from qcodes.process.qcodes_process import QcodesProcess
 from qcodes.utils.metadata import Metadatable
+from qcodes.utils.timing import DeadlineScheduler
 
 from .actions import (_actions_snapshot, Task, Wait, _Measure, _Nest,
-                      BreakIf, _QcodesBreak)
+                      BreakIf, _QcodesBreak, _count_instruments)
 
 # Switches off multiprocessing by default, cant' be altered after module
 USE_MP = config.core.legacy_mp
 MP_NAME = 'Measurement'
 
+# the arrays ActiveLoop.run(record_timing=True) adds for each loop, all in
+# seconds: (suffix for the sweep name, label)
+_TIMING_PHASES = (
+    ('timestamp', 'time since the run started'),
+    ('set_time', 'set time'),
+    ('wait_time', 'wait time'),
+    ('wait_requested', 'requested wait'),
+    ('wait_actual', 'actual wait'),
+    ('store_time', 'store time'),
+    ('write_time', 'write time')
+)
+
 
 def get_bg(return_first=False):
     """
@@ -399,6 +414,10 @@ class ActiveLoop(Metadatable):
     # maximum sleep time (secs) between checking the signal_queue for a HALT
     signal_period = 1
 
+    # starting length of the arrays of a loop whose sweep has no len(),
+    # like an adaptive sweep. They grow as needed while the loop runs.
+    initial_length = 16
+
     def __init__(self, sweep_values, delay, *actions, then_actions=(),
                  station=None, progress_interval=None, bg_task=None,
                  bg_final_task=None, bg_min_delay=None):
@@ -414,6 +433,16 @@ class ActiveLoop(Metadatable):
         self.bg_min_delay = bg_min_delay
         self.data_set = None
 
+        # threads for parallel gets, only while running with use_threads
+        self._executor = None
+
+        # waits for each delay, shared by all nested loops of a run. Keeps
+        # statistics of the requested vs actual wait times after the run.
+        self.scheduler = None
+
+        # whether the DataSet has arrays for the timing of each point
+        self.record_timing = False
+
         # compile now, but don't save the results
         # just used for preemptive error checking
         # if we saved the results, we wouldn't capture nesting
@@ -489,7 +518,9 @@ class ActiveLoop(Metadatable):
 
         Recursively calls `.containers` on any enclosed actions.
         """
-        loop_size = len(self.sweep_values)
+        loop_size = self._sweep_length()
+        if loop_size is None:
+            loop_size = self.initial_length
         data_arrays = []
         loop_array = DataArray(parameter=self.sweep_values.parameter,
                                is_setpoint=True)
@@ -523,8 +554,63 @@ class ActiveLoop(Metadatable):
                            set_array=loop_array)
             data_arrays.extend(action_arrays)
 
+        if self.record_timing:
+            for i, array in self._timing_arrays():
+                array.nest(size=loop_size, action_index=i,
+                           set_array=loop_array)
+                data_arrays.append(array)
+
         return data_arrays
 
+    def _timing_indices(self):
+        """
+        The action indices of the ``record_timing`` arrays of this loop,
+        after the actions and any combined sweep parameters.
+
+        Returns:
+            Tuple[List[int], Dict[int, int]]: the index of each phase in
+                ``_TIMING_PHASES``, and of the get time of each measured
+                action, by the index of that action.
+        """
+        first = len(self.actions) + len(getattr(self.sweep_values,
+                                                'parameters', ()))
+        phase_indices = list(range(first, first + len(_TIMING_PHASES)))
+        get_indices = {}
+        index = phase_indices[-1]
+        for i, action in enumerate(self.actions):
+            if hasattr(action, 'get'):
+                index += 1
+                get_indices[i] = index
+        return phase_indices, get_indices
+
+    def _timing_arrays(self):
+        phase_indices, get_indices = self._timing_indices()
+        parameter = self.sweep_values.parameter
+        name = parameter.name
+        full_name = getattr(parameter, 'full_name', None) or name
+
+        out = []
+        for i, (suffix, label) in zip(phase_indices, _TIMING_PHASES):
+            out.append((i, DataArray(name=name + '_' + suffix,
+                                     full_name=full_name + '_' + suffix,
+                                     label=name + ' ' + label, units='s')))
+
+        for action_index, i in sorted(get_indices.items()):
+            action = self.actions[action_index]
+            get_name = action.name + '_get_time'
+            get_full_name = (getattr(action, 'full_name', None) or
+                             action.name) + '_get_time'
+            out.append((i, DataArray(name=get_name, full_name=get_full_name,
+                                     label=action.name + ' get time',
+                                     units='s')))
+        return out
+
+    def _sweep_length(self):
+        """The number of setpoints, or None if that isn't known up front."""
+        if hasattr(self.sweep_values, '__len__'):
+            return len(self.sweep_values)
+        return None
+
     def _parameter_arrays(self, action):
         out = []
 
@@ -645,19 +731,51 @@ class ActiveLoop(Metadatable):
 
         return sp
 
-    def set_common_attrs(self, data_set, use_threads, signal_queue):
+    def set_common_attrs(self, data_set, use_threads, signal_queue,
+                         buffer_rows=False):
         """
         set a couple of common attributes that the main and nested loops
         all need to have:
         - the DataSet collecting all our measurements
         - a queue for communicating with the main process
+        - whether the innermost loop stores its data one row at a time
         """
         self.data_set = data_set
         self.signal_queue = signal_queue
         self.use_threads = use_threads
+        self.buffer_rows = buffer_rows
         for action in self.actions:
             if hasattr(action, 'set_common_attrs'):
-                action.set_common_attrs(data_set, use_threads, signal_queue)
+                action.set_common_attrs(data_set, use_threads, signal_queue,
+                                        buffer_rows)
+
+    def _set_executor(self, executor):
+        self._executor = executor
+        for action in self.actions:
+            if isinstance(action, ActiveLoop):
+                action._set_executor(executor)
+
+    def _set_record_timing(self, record_timing):
+        self.record_timing = record_timing
+        for action in self.actions:
+            if isinstance(action, ActiveLoop):
+                action._set_record_timing(record_timing)
+
+    def _set_scheduler(self, scheduler):
+        self.scheduler = scheduler
+        for action in self.actions:
+            if isinstance(action, ActiveLoop):
+                action._set_scheduler(scheduler)
+
+    def _measured_parameters(self):
+        """All the parameters measured by this loop and any nested loops."""
+        parameters = []
+        for action in self.actions:
+            if isinstance(action, ActiveLoop):
+                parameters.extend(action._measured_parameters())
+            elif hasattr(action, 'get'):
+                parameters.append(action)
+        return parameters
 
     def _check_signal(self):
         while not self.signal_queue.empty():
@@ -669,7 +787,8 @@ class ActiveLoop(Metadatable):
             else:
                 raise ValueError('unknown signal', signal_)
 
-    def get_data_set(self, data_manager=USE_MP, *args, **kwargs):
+    def get_data_set(self, data_manager=USE_MP, *args, record_timing=False,
+                     **kwargs):
         """
         Return the data set for this loop.
 
@@ -680,6 +799,8 @@ class ActiveLoop(Metadatable):
 
         data_manager: a DataManager instance (omit to use default,
             False to store locally)
+        record_timing: (default False) include arrays for the timing of
+            each point, see `run`
 
         kwargs are passed along to data_set.new_data. The key ones are:
         location: the location of the DataSet, a string whose meaning
@@ -694,6 +815,10 @@ class ActiveLoop(Metadatable):
         io: knows how to connect to the storage (disk vs cloud etc)
         write_period: how often to save to storage during the loop.
             default 5 sec, use None to write only at the end
+        write_in_background: save to storage from a separate thread, so
+            the loop doesn't wait for it. default False
+        shared_memory: with a DataManager, share the arrays with the
+            DataServer instead of sending every point to it. default False
 
         returns:
             a DataSet object that we can use to plot
@@ -706,6 +831,7 @@ class ActiveLoop(Metadatable):
                               UserWarning)
                 data_mode = DataMode.PUSH_TO_SERVER
 
+            self._set_record_timing(record_timing)
             data_set = new_data(arrays=self.containers(), mode=data_mode,
                                 data_manager=data_manager, *args, **kwargs)
 
@@ -714,12 +840,14 @@ class ActiveLoop(Metadatable):
         else:
             has_args = len(kwargs) or len(args)
             uses_data_manager = (self.data_set.mode != DataMode.LOCAL)
-            if has_args or (uses_data_manager != data_manager):
+            if (has_args or (uses_data_manager != data_manager) or
+                    (record_timing and not self.record_timing)):
                 raise RuntimeError(
                     'The DataSet for this loop already exists. '
                     'You can only provide DataSet attributes, such as '
                     'data_manager, location, name, formatter, io, '
-                    'write_period, when the DataSet is first created.')
+                    'write_period, record_timing, when the DataSet is '
+                    'first created.')
 
         return self.data_set
 
@@ -734,15 +862,17 @@ class ActiveLoop(Metadatable):
 
     def run(self, background=USE_MP, use_threads=False, quiet=False,
             data_manager=USE_MP, station=None, progress_interval=False,
-            *args, **kwargs):
+            *args, buffer_rows=False, record_timing=False, **kwargs):
         """
         Execute this loop.
 
         background: (default False) run this sweep in a separate process
             so we can have live plotting and other analysis in the main process
-        use_threads: (default True): whenever there are multiple `get` calls
+        use_threads: (default False): whenever there are multiple `get` calls
             back-to-back, execute them in separate threads so they run in
-            parallel (as long as they don't block each other)
+            parallel (as long as they don't block each other). The threads
+            are started once for the whole run, and gets from the same
+            instrument are never run in parallel.
         quiet: (default False): set True to not print anything except errors
         data_manager: set to True to use a DataManager. Default to False.
         station: a Station instance for snapshots (omit to use a previously
@@ -750,6 +880,25 @@ class ActiveLoop(Metadatable):
         progress_interval (default None): show progress of the loop every x
             seconds. If provided here, will override any interval provided
             with the Loop definition
+        buffer_rows (default False): collect the data of each row of the
+            innermost loop and store it in one `DataSet.store_block` call
+            at the end of the row, instead of storing every point. This is
+            faster for fast inner loops, but the data of a row is only
+            visible (to live plots, bg_task etc.) once the row is done.
+        record_timing (default False): add arrays to the DataSet with the
+            timing of each point of each loop, all in seconds:
+            <sweep>_timestamp, since the run started (a monotonic clock),
+            and how long the point spent in <sweep>_set_time (setting the
+            sweep parameter), <sweep>_wait_time (the loop delay and any
+            Wait actions), <sweep>_store_time (storing data, but not
+            writing it), <sweep>_write_time (writes triggered by storing),
+            and <parameter>_get_time for each measured parameter. Also
+            <sweep>_wait_requested, the delay asked for at the point, and
+            <sweep>_wait_actual, how long it really took, each counted
+            from the start of the delay (eg the set) to the end of the
+            wait. ``config['core']['wait_stats']`` summarizes these over
+            the whole run.
+            Loops run as one hardware sweep only record their data.
 
         kwargs are passed along to data_set.new_data. These can only be
         provided when the `DataSet` is first created; giving these during `run`
@@ -768,6 +917,10 @@ class ActiveLoop(Metadatable):
         io: knows how to connect to the storage (disk vs cloud etc)
         write_period: how often to save to storage during the loop.
             default 5 sec, use None to write only at the end
+        write_in_background: save to storage from a separate thread, so
+            the loop doesn't wait for it. default False
+        shared_memory: with a DataManager, share the arrays with the
+            DataServer instead of sending every point to it. default False
 
 
         returns:
@@ -783,10 +936,12 @@ class ActiveLoop(Metadatable):
                       flush=True)
             prev_loop.join()
 
-        data_set = self.get_data_set(data_manager, *args, **kwargs)
+        data_set = self.get_data_set(data_manager, *args,
+                                     record_timing=record_timing, **kwargs)
 
         self.set_common_attrs(data_set=data_set, use_threads=use_threads,
-                              signal_queue=self.signal_queue)
+                              signal_queue=self.signal_queue,
+                              buffer_rows=buffer_rows)
 
         station = station or self.station or Station.default
         if station:
@@ -800,6 +955,8 @@ class ActiveLoop(Metadatable):
             'ts_start': ts,
             'background': background,
             'use_threads': use_threads,
+            'buffer_rows': buffer_rows,
+            'record_timing': self.record_timing,
             'use_data_manager': (data_manager is not False)
         }})
 
@@ -852,7 +1009,8 @@ class ActiveLoop(Metadatable):
 
         return ds
 
-    def _compile_actions(self, actions, action_indices=()):
+    def _compile_actions(self, actions, action_indices=(), store=None,
+                         timer=None):
         callables = []
         measurement_group = []
         for i, action in enumerate(actions):
@@ -861,42 +1019,154 @@ class ActiveLoop(Metadatable):
                 measurement_group.append((action, new_action_indices))
                 continue
             elif measurement_group:
-                callables.append(_Measure(measurement_group, self.data_set,
-                                          self.use_threads))
+                callables.append(self._compile_measure(measurement_group,
+                                                       store, timer))
                 measurement_group[:] = []
 
-            callables.append(self._compile_one(action, new_action_indices))
+            callables.append(self._compile_one(action, new_action_indices,
+                                               timer))
 
         if measurement_group:
-            callables.append(_Measure(measurement_group, self.data_set,
-                                      self.use_threads))
+            callables.append(self._compile_measure(measurement_group, store,
+                                                   timer))
             measurement_group[:] = []
 
         return callables
 
-    def _compile_one(self, action, new_action_indices):
+    def _compile_measure(self, measurement_group, store, timer):
+        get_time_ids = None
+        if timer is not None:
+            get_time_ids = [timer.get_time_ids[indices[-1]]
+                            for _, indices in measurement_group]
+        return _Measure(measurement_group, self.data_set, self.use_threads,
+                        store, self._executor, get_time_ids)
+
+    def _compile_one(self, action, new_action_indices, timer=None):
         if isinstance(action, Wait):
+            if timer is not None:
+                return Task(timer.wait, action.delay)
             return Task(self._wait, action.delay)
         elif isinstance(action, ActiveLoop):
-            return _Nest(action, new_action_indices)
+            start_clock = timer.start_clock if timer is not None else None
+            return _Nest(action, new_action_indices,
+                         action._compile_plan(new_action_indices,
+                                              start_clock))
         else:
             return action
 
+    def _compile_plan(self, action_indices=(), start_clock=None):
+        """
+        Compile everything this loop needs to run at one place in the
+        loop tree, including the plans of any nested loops.
+
+        This is done once per run, so nested loops don't redo it for
+        every setpoint of the outer loops.
+
+        Args:
+            action_indices (tuple): where this loop is in the actions of
+                any outer loops.
+            start_clock (Optional[float]): the ``time.perf_counter()`` the
+                run started at, for ``record_timing``. Default now.
+
+        Returns:
+            _LoopPlan
+        """
+        # the innermost loop can collect each row and store it all at once
+        row_buffer = None
+        store = self.data_set.store
+        if self.buffer_rows and not any(isinstance(action, ActiveLoop)
+                                        for action in self.actions):
+            row_buffer = _RowBuffer(self.data_set)
+            store = row_buffer.store
+
+        growable = self._sweep_length() is None
+        if growable and self.data_set.mode != DataMode.LOCAL:
+            raise RuntimeError('a sweep without a fixed length needs a '
+                               'local DataSet, use data_manager=False')
+
+        action_id_map = self.data_set.action_id_map
+        set_id = action_id_map[action_indices]
+
+        timer = None
+        if self.record_timing:
+            if start_clock is None:
+                start_clock = time.perf_counter()
+            phase_indices, get_indices = self._timing_indices()
+            timer = _PointTimer(
+                self.data_set, store, self._wait, start_clock,
+                [action_id_map[action_indices + (i, )]
+                 for i in phase_indices],
+                {action_index: action_id_map[action_indices + (i, )]
+                 for action_index, i in get_indices.items()})
+            store = timer.store
+
+        parameter_ids = None
+        if hasattr(self.sweep_values, 'parameters'):
+            parameter_ids = [action_id_map[action_indices + (j + 1, )]
+                             for j in range(len(self.sweep_values.parameters))]
+
+        buffered = None
+        if self._can_buffer():
+            buffered = [(action, action_id_map[action_indices + (i, )])
+                        for i, action in enumerate(self.actions)]
+
+        return _LoopPlan(
+            callables=self._compile_actions(self.actions, action_indices,
+                                            store, timer),
+            then_callables=self._compile_actions(self.then_actions, ()),
+            store=store, row_buffer=row_buffer, set_id=set_id,
+            parameter_ids=parameter_ids, buffered=buffered,
+            growable=growable, timer=timer)
+
+    def _can_buffer(self):
+        """
+        Whether this loop can run as one hardware sweep: the sweep and all
+        the actions, which must all be simple parameters, implement the
+        BufferedSweep protocol (see ``SweepValues``).
+        """
+        sweep_values = self.sweep_values
+        if not (isinstance(sweep_values, SweepValues) and
+                sweep_values.buffered):
+            return False
+        return all(hasattr(action, 'prepare_buffered_get') and
+                   hasattr(action, 'get_buffered') and
+                   not hasattr(action, 'names') and
+                   not getattr(action, 'shape', None)
+                   for action in self.actions)
+
     def _run_wrapper(self, *args, **kwargs):
+        # the thread pool lives in whichever process runs the loop, and the
+        # calling thread does one instrument's gets itself
+        if self.use_threads:
+            workers = _count_instruments(self._measured_parameters()) - 1
+            if workers > 0:
+                self._set_executor(ThreadPoolExecutor(max_workers=workers))
+        self._set_scheduler(DeadlineScheduler(
+            check=self._check_signal, check_period=self.signal_period))
+        plan = None
         try:
-            self._run_loop(*args, **kwargs)
+            plan = self._compile_plan(start_clock=time.perf_counter())
+            self._run_loop(*args, plan=plan, **kwargs)
         except _QuietInterrupt:
             pass
         finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._set_executor(None)
+            if plan is not None:
+                plan.trim_arrays(self.data_set)
             if hasattr(self, 'data_set'):
                 # somehow this does not show up in the data_set returned by
                 # run(), but it is saved to the metadata
                 ts = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 self.data_set.add_metadata({'loop': {'ts_end': ts}})
+                if self.scheduler.record:
+                    self.data_set.add_metadata({'loop': {
+                        'wait_stats': self.scheduler.stats()}})
                 self.data_set.finalize()
 
     def _run_loop(self, first_delay=0, action_indices=(),
-                  loop_indices=(), current_values=(),
+                  loop_indices=(), current_values=(), plan=None,
                   **ignore_kwargs):
         """
         the routine that actually executes the loop, and can be called
@@ -906,87 +1176,165 @@ class ActiveLoop(Metadatable):
         action_indices: where we are in any outer loop action arrays
         loop_indices: setpoint indices in any outer loops
         current_values: setpoint values in any outer loops
-        signal_queue: queue to communicate with main process directly
+        plan: the _LoopPlan compiled for this loop at action_indices,
+            compiled now if omitted
         ignore_kwargs: for compatibility with other loop tasks
         """
+        if plan is None:
+            plan = self._compile_plan(action_indices)
 
         # at the beginning of the loop, the time to wait after setting
         # the loop parameter may be increased if an outer loop requested longer
         delay = max(self.delay, first_delay)
 
-        callables = self._compile_actions(self.actions, action_indices)
+        callables = plan.callables
+        store = plan.store
+        set_id = plan.set_id
+        parameter_ids = plan.parameter_ids
+        row_buffer = plan.row_buffer
+        if row_buffer is not None:
+            row_buffer.start_row(loop_indices)
+
+        feedback = getattr(self.sweep_values, 'feedback', None)
+        growable = plan.growable
+        timer = plan.timer
 
         t0 = time.time()
         last_task = t0
         last_task_failed = False
-        imax = len(self.sweep_values)
-        for i, value in enumerate(self.sweep_values):
-            if self.progress_interval is not None:
-                tprint('loop %s: %d/%d (%.1f [s])' % (
-                    self.sweep_values.name, i, imax, time.time() - t0),
-                    dt=self.progress_interval, tag='outerloop')
-
-            set_val = self.sweep_values.set(value)
-
-            new_indices = loop_indices + (i,)
-            new_values = current_values + (value,)
-            data_to_store = {}
-
-            if hasattr(self.sweep_values, "parameters"):
-                set_name = self.data_set.action_id_map[action_indices]
-                if hasattr(self.sweep_values, 'aggregate'):
-                    value = self.sweep_values.aggregate(*set_val)
-                self.data_set.store(new_indices, {set_name: value})
-                for j, val in enumerate(set_val):
-                    set_index = action_indices + (j+1, )
-                    set_name = (self.data_set.action_id_map[set_index])
-                    data_to_store[set_name] = val
-            else:
-                set_name = self.data_set.action_id_map[action_indices]
-                data_to_store[set_name] = value
-
-            self.data_set.store(new_indices, data_to_store)
-
-            if not self._nest_first:
-                # only wait the delay time if an inner loop will not inherit it
-                self._wait(delay)
-
-            try:
-                for f in callables:
-                    f(first_delay=delay,
-                      loop_indices=new_indices,
-                      current_values=new_values)
-
-                    # after the first action, no delay is inherited
-                    delay = 0
-            except _QcodesBreak:
-                break
-
-            # after the first setpoint, delay reverts to the loop delay
-            delay = self.delay
-
-            # now check for a background task and execute it if it's
-            # been long enough since the last time
-            # don't let exceptions in the background task interrupt
-            # the loop
-            # if the background task fails twice consecutively, stop
-            # executing it
-            if self.bg_task is not None:
-                t = time.time()
-                if t - last_task >= self.bg_min_delay:
-                    try:
-                        self.bg_task()
-                        last_task_failed = False
-                    except Exception:
-                        if last_task_failed:
-                            self.bg_task = None
-                        last_task_failed = True
-                    last_task = t
+        imax = self._sweep_length()
+        if imax is None:
+            imax = '?'
+
+        if plan.buffered is not None:
+            count = self._run_buffered(plan, first_delay, loop_indices)
+            self._end_loop(plan, t0, count)
+            return
+
+        # points started, an empty sweep has none
+        count = 0
+        try:
+            for i, value in enumerate(self.sweep_values):
+                count += 1
+                if self.progress_interval is not None:
+                    tprint('loop %s: %d/%s (%.1f [s])' % (
+                        self.sweep_values.name, i, imax, time.time() - t0),
+                        dt=self.progress_interval, tag='outerloop')
+
+                if growable and i >= plan.length:
+                    plan.grow(self.data_set, i + 1)
+
+                if timer is not None:
+                    timer.start_point()
+
+                set_val = self.sweep_values.set(value)
+                set_clock = time.perf_counter()
+
+                new_indices = loop_indices + (i,)
+                new_values = current_values + (value,)
+                data_to_store = {}
+
+                if parameter_ids is not None:
+                    if hasattr(self.sweep_values, 'aggregate'):
+                        value = self.sweep_values.aggregate(*set_val)
+                    store(new_indices, {set_id: value})
+                    for val, parameter_id in zip(set_val, parameter_ids):
+                        data_to_store[parameter_id] = val
+                else:
+                    data_to_store[set_id] = value
+
+                store(new_indices, data_to_store)
+
+                if not self._nest_first:
+                    # only wait the delay time if an inner loop will not
+                    # inherit it. The delay counts from the set, so storing
+                    # the setpoint doesn't add to it.
+                    if timer is not None:
+                        timer.wait(delay, set_clock)
+                    else:
+                        self._wait(delay, set_clock)
+
+                # what the actions measured, for sweeps that adapt to it
+                measured = [] if feedback else None
+                try:
+                    for f in callables:
+                        out = f(first_delay=delay,
+                                loop_indices=new_indices,
+                                current_values=new_values)
+                        if measured is not None and out is not None:
+                            measured.extend(out)
+
+                        # after the first action, no delay is inherited
+                        delay = 0
+                except _QcodesBreak:
+                    break
+                finally:
+                    if timer is not None:
+                        timer.end_point(new_indices, set_clock)
+
+                if feedback:
+                    feedback(new_values, measured)
+
+                # after the first setpoint, delay reverts to the loop delay
+                delay = self.delay
+
+                # now check for a background task and execute it if it's
+                # been long enough since the last time
+                # don't let exceptions in the background task interrupt
+                # the loop
+                # if the background task fails twice consecutively, stop
+                # executing it
+                if self.bg_task is not None:
+                    t = time.time()
+                    if t - last_task >= self.bg_min_delay:
+                        try:
+                            self.bg_task()
+                            last_task_failed = False
+                        except Exception:
+                            if last_task_failed:
+                                self.bg_task = None
+                            last_task_failed = True
+                        last_task = t
+        finally:
+            if row_buffer is not None:
+                row_buffer.flush()
+
+        self._end_loop(plan, t0, count)
 
+    def _run_buffered(self, plan, first_delay, loop_indices):
+        """
+        Run this whole loop as one hardware sweep, and store the result
+        in one go. See the BufferedSweep protocol in ``SweepValues``.
+        """
+        values = list(self.sweep_values)
+        npts = len(values)
+        if plan.growable and npts > plan.length:
+            plan.grow(self.data_set, npts)
+        for parameter, _ in plan.buffered:
+            parameter.prepare_buffered_get(npts)
+        self.sweep_values.parameter.prepare_buffered_sweep(values, self.delay)
+
+        if first_delay > self.delay:
+            # an outer loop needs a longer wait at the first point
+            self.sweep_values.set(values[0])
+            self._wait(first_delay)
+        else:
+            self._check_signal()
+
+        self.sweep_values.parameter.run_buffered_sweep()
+
+        ids_values = {plan.set_id: values}
+        for parameter, array_id in plan.buffered:
+            ids_values[array_id] = parameter.get_buffered()
+        self.data_set.store_block(loop_indices + (0, ), ids_values)
+        return npts
+
+    def _end_loop(self, plan, t0, count):
         if self.progress_interval is not None:
             # final progress note: set dt=-1 so it *always* prints
-            tprint('loop %s DONE: %d/%d (%.1f [s])' % (
-                   self.sweep_values.name, i + 1, imax, time.time() - t0),
+            tprint('loop %s DONE: %d/%s (%.1f [s])' % (
+                   self.sweep_values.name, count,
+                   self._sweep_length() or count, time.time() - t0),
                    dt=-1, tag='outerloop')
 
         # run the background task one last time to catch the last setpoint(s)
@@ -994,18 +1342,18 @@ class ActiveLoop(Metadatable):
             self.bg_task()
 
         # the loop is finished - run the .then actions
-        for f in self._compile_actions(self.then_actions, ()):
+        for f in plan.then_callables:
             f()
 
         # run the bg_final_task from the bg_task:
         if self.bg_final_task is not None:
             self.bg_final_task()
 
-
-
-    def _wait(self, delay):
+    def _wait(self, delay, start=None):
         if delay:
-            finish_clock = time.perf_counter() + delay
+            if start is None:
+                start = time.perf_counter()
+            finish_clock = start + delay
 
             if self._monitor:
                 # TODO - perhpas pass self._check_signal in here
@@ -1013,16 +1361,195 @@ class ActiveLoop(Metadatable):
                 # lasts a very long time?
                 self._monitor.call(finish_by=finish_clock)
 
-            while True:
-                self._check_signal()
-                t = wait_secs(finish_clock)
-                time.sleep(min(t, self.signal_period))
-                if t <= self.signal_period:
-                    break
+            self.scheduler.wait_until(finish_clock, start)
         else:
             self._check_signal()
 
 
+class _LoopPlan:
+    """
+    The compiled actions of one ActiveLoop at one place in the loop tree,
+    made by ``ActiveLoop._compile_plan`` and reused for every pass through
+    that loop.
+
+    Args:
+        callables (List[callable]): the loop actions, ready to call at
+            each setpoint. Nested loops are ``_Nest`` objects holding their
+            own plans.
+        then_callables (List[callable]): the ``.then`` actions.
+        store (callable): where the setpoints and measurements go, the
+            ``store`` of either the DataSet or ``row_buffer``.
+        row_buffer (Optional[_RowBuffer]): collects each row, if this is
+            the innermost loop and the run buffers rows.
+        set_id (str): the array_id of the setpoint array.
+        parameter_ids (Optional[List[str]]): for combined sweeps, the
+            array_ids of the individual swept parameters.
+        buffered (Optional[List[Tuple[Parameter, str]]]): if the loop runs
+            as one hardware sweep, each measured parameter and its array_id.
+        growable (bool): whether the length of the loop is only known once
+            it's done, so its arrays grow as needed.
+        timer (Optional[_PointTimer]): times each point, if the run
+            records timing.
+    """
+    def __init__(self, callables, then_callables, store, row_buffer,
+                 set_id, parameter_ids, buffered=None, growable=False,
+                 timer=None):
+        self.callables = callables
+        self.then_callables = then_callables
+        self.store = store
+        self.row_buffer = row_buffer
+        self.set_id = set_id
+        self.parameter_ids = parameter_ids
+        self.buffered = buffered
+        self.growable = growable
+        self.timer = timer
+        # the most points this loop has had in any pass
+        self.length = 0
+
+    def grow(self, data_set, length):
+        """Make room for ``length`` points in the arrays of this loop."""
+        self.length = length
+        data_set.grow_loop(self.set_id, length)
+
+    def trim_arrays(self, data_set):
+        """
+        Trim the arrays of this loop, and any nested loops, that grew
+        while running down to the length they needed.
+        """
+        if self.growable:
+            data_set.trim_loop(self.set_id, self.length)
+        for f in self.callables:
+            if isinstance(f, _Nest):
+                f.plan.trim_arrays(data_set)
+
+
+class _PointTimer:
+    """
+    Times the phases of each point of one loop, for
+    ``ActiveLoop.run(record_timing=True)``, and stores them at the end of
+    the point.
+
+    Its ``store`` takes the place of the loop's ``store``, to time it, and
+    ``wait`` that of ``ActiveLoop._wait``. The get times are measured and
+    stored by ``_Measure``.
+
+    Args:
+        data_set (DataSet): where the data goes.
+        store (callable): the ``store`` to time.
+        wait (callable): the loop's ``_wait``.
+        start_clock (float): the ``time.perf_counter()`` the run started.
+        phase_ids (List[str]): the array_ids for ``_TIMING_PHASES``.
+        get_time_ids (Dict[int, str]): the array_ids of the get times, by
+            the index of the measured action in the loop.
+    """
+    def __init__(self, data_set, store, wait, start_clock, phase_ids,
+                 get_time_ids):
+        self.data_set = data_set
+        self._store = store
+        self._wait = wait
+        self.start_clock = start_clock
+        self.phase_ids = phase_ids
+        self.get_time_ids = get_time_ids
+        self.start_point()
+
+    def start_point(self):
+        """Start timing a new point, just before it's set."""
+        self.point_clock = time.perf_counter()
+        self.wait_time = 0
+        self.wait_requested = 0
+        self.wait_actual = 0
+        self.store_time = 0
+        self.write_time = 0
+
+    def store(self, loop_indices, ids_values):
+        write_time = self.data_set.triggered_write_time
+        t = time.perf_counter()
+        self._store(loop_indices, ids_values)
+        t = time.perf_counter() - t
+        write_time = self.data_set.triggered_write_time - write_time
+        self.store_time += t - write_time
+        self.write_time += write_time
+
+    def wait(self, delay, start=None):
+        t = time.perf_counter()
+        if start is None:
+            start = t
+        self._wait(delay, start)
+        end = time.perf_counter()
+        self.wait_time += end - t
+        if delay:
+            self.wait_requested += delay
+            self.wait_actual += end - start
+
+    def end_point(self, loop_indices, set_clock):
+        """
+        Store the timing of the point.
+
+        Args:
+            loop_indices (tuple): the indices of the point.
+            set_clock (float): the ``time.perf_counter()`` when the set
+                returned.
+        """
+        times = (self.point_clock - self.start_clock,
+                 set_clock - self.point_clock,
+                 self.wait_time, self.wait_requested, self.wait_actual,
+                 self.store_time, self.write_time)
+        self._store(loop_indices, dict(zip(self.phase_ids, times)))
+
+
+class _RowBuffer:
+    """
+    Collects the data of one row of the innermost loop, to store it in one
+    ``DataSet.store_block`` call.
+
+    Has the same ``store`` method as the DataSet, so it can take its place
+    in ``_Measure`` and ``ActiveLoop._run_loop``, but all points must be in
+    the current row. Call ``start_row`` before each row.
+
+    Args:
+        data_set (DataSet): where the data goes.
+    """
+    def __init__(self, data_set):
+        self.data_set = data_set
+        self.loop_indices = ()
+        self.start = None
+        self.values = {}
+
+    def start_row(self, loop_indices):
+        """
+        Start collecting a new row.
+
+        Args:
+            loop_indices (tuple): the indices of this row in any outer loops.
+        """
+        self.loop_indices = loop_indices
+        self.start = None
+        self.values = {}
+
+    def store(self, loop_indices, ids_values):
+        if self.start is None:
+            self.start = loop_indices[-1]
+        values = self.values
+        for array_id, value in ids_values.items():
+            if array_id in values:
+                values[array_id].append(value)
+            else:
+                values[array_id] = [value]
+
+    def flush(self):
+        """Store everything collected so far, and start a new block."""
+        # if the row was interrupted, some arrays can be a point short
+        blocks = {}
+        for array_id, values in self.values.items():
+            blocks.setdefault(len(values), {})[array_id] = values
+        for block in blocks.values():
+            self.data_set.store_block(self.loop_indices + (self.start, ),
+                                      block)
+
+        self.start = None
+        self.values = {}
+
+
 class _QuietInterrupt(Exception):
     pass
 
@@ -28,11 +28,16 @@ class ServerManager:
         to wait for confirmation that the query has completed
     `manager.write(func_name, *args, **kwargs)`: if they want to continue
         immediately without blocking for the query.
-    The server communicates with this manager via two multiprocessing `Queue`s.
+    The server communicates with this manager via two multiprocessing `Queue`s,
+    or through a `transport` such as `SocketTransport`.
     """
 
+    # a transport class to use when none is given to the constructor,
+    # or None to use multiprocessing Queues
+    default_transport = None
+
     def __init__(self, name, server_class, shared_attrs=None,
-                 query_timeout=None):
+                 query_timeout=None, transport=None):
         """
         Construct the ServerManager and start its server.
 
@@ -48,9 +53,17 @@ class ServerManager:
             inheritance by a new process.
         query_timeout: (default None) the default max time to wait for
             responses
+        transport: (default None) an object like `SocketTransport` to carry
+            queries and responses instead of the Queues, which must all go
+            through one lock. If omitted, we make one from
+            `ServerManager.default_transport` if that's set.
         """
-        self._query_queue = mp.Queue()
-        self._response_queue = mp.Queue()
+        if transport is None and self.default_transport is not None:
+            transport = self.default_transport()
+        self._transport = transport
+        if transport is None:
+            self._query_queue = mp.Queue()
+            self._response_queue = mp.Queue()
         self._server_class = server_class
         self._shared_attrs = shared_attrs
 
@@ -75,8 +88,17 @@ class ServerManager:
         self._server.start()
 
     def _run_server(self):
-        self._server_class(self._query_queue, self._response_queue,
-                           self._shared_attrs)
+        if self._transport is None:
+            self._server_class(self._query_queue, self._response_queue,
+                               self._shared_attrs)
+            return
+
+        query_queue, response_queue = self._transport.serve()
+        try:
+            self._server_class(query_queue, response_queue,
+                               self._shared_attrs)
+        finally:
+            query_queue.close()
 
     def _check_alive(self):
         try:
@@ -95,7 +117,11 @@ class ServerManager:
         `server.handle_<func_name>(*args, **kwargs)`
         """
         self._check_alive()
-        self._query_queue.put((QUERY_WRITE, func_name, args, kwargs))
+        query = (QUERY_WRITE, func_name, args, kwargs)
+        if self._transport is not None:
+            self._transport.write(query)
+        else:
+            self._query_queue.put(query)
 
     def ask(self, func_name, *args, timeout=None, **kwargs):
         """
@@ -114,6 +140,11 @@ class ServerManager:
 
         query = (QUERY_ASK, func_name, args, kwargs)
 
+        if self._transport is not None:
+            # the transport matches responses to queries itself
+            return self._parse_response(
+                self._transport.ask(query, timeout=timeout), query)
+
         with self.query_lock:
             # in case a previous query errored and left something on the
             # response queue, clear it
@@ -137,7 +168,10 @@ class ServerManager:
         return value
 
     def _get_response(self, timeout=None, query=None):
-        res = self._response_queue.get(timeout=timeout)
+        return self._parse_response(
+            self._response_queue.get(timeout=timeout), query)
+
+    def _parse_response(self, res, query=None):
         try:
             code, value = res
         except (TypeError, ValueError):
@@ -191,11 +225,15 @@ class ServerManager:
     def restart(self):
         """Restart the server."""
         self.halt()
+        if self._transport is not None:
+            self._transport.reset()
         self._start_server()
 
     def close(self):
         """Irreversibly stop the server and manager."""
         self.halt()
+        if self._transport is not None:
+            self._transport.reset()
         for q in ['query', 'response', 'error']:
             qname = '_{}_queue'.format(q)
             if hasattr(self, qname):
@@ -226,6 +264,10 @@ class BaseServer(NestedAttrAccess):
     map onto method calls:
         `response = self.handle_<func_name>(*args, **kwargs)`
 
+    If the manager has a `transport`, the server gets stand-ins for the
+    queues from the transport, which behave the same way as far as the
+    server is concerned.
+
     The actual query passed through the queue and unpacked by `process_query`
     has the form `(code, func_name[, args][, kwargs])` where `code` is:
 
@@ -286,11 +328,14 @@ class BaseServer(NestedAttrAccess):
             query = self._query_queue.get(timeout=self.timeout)
             self.process_query(query)
 
-    def process_query(self, query):
+    def process_query(self, query, respond=None):
         """
         Act on one query received through the query queue.
 
         query: should have the form `(code, func_name[, args][, kwargs])`
+
+        respond: (default `self._response_queue.put`) where to send the
+            response, for servers that answer queries out of order.
         """
         try:
             code = None
@@ -309,15 +354,15 @@ class BaseServer(NestedAttrAccess):
                     raise ValueError(part)
 
             if code == QUERY_ASK:
-                self._process_ask(func, args or (), kwargs or {})
+                self._process_ask(func, args or (), kwargs or {}, respond)
             elif code == QUERY_WRITE:
                 self._process_write(func, args or (), kwargs or {})
             else:
                 raise ValueError(code)
         except:
-            self.report_error(query, code)
+            self.report_error(query, code, respond)
 
-    def report_error(self, query, code):
+    def report_error(self, query, code, respond=None):
         """
         Common error handler for all queries.
 
@@ -337,17 +382,19 @@ class BaseServer(NestedAttrAccess):
             logging.error(error_str)
         if code != QUERY_WRITE:
             try:
-                self._response_queue.put((RESPONSE_ERROR, error_str))
+                (respond or self._response_queue.put)(
+                    (RESPONSE_ERROR, error_str))
             except:
                 logging.error('Could not put error on response queue\n' +
                               error_str)
 
-    def _process_ask(self, func, args, kwargs):
+    def _process_ask(self, func, args, kwargs, respond=None):
+        respond = respond or self._response_queue.put
         try:
             response = func(*args, **kwargs)
-            self._response_queue.put((RESPONSE_OK, response))
+            respond((RESPONSE_OK, response))
         except:
-            self._response_queue.put(
+            respond(
                 (RESPONSE_ERROR, repr((func, args, kwargs)) + '\n' +
                     format_exc()))
 
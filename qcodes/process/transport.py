@@ -0,0 +1,343 @@
+"""Alternative transports between a ServerManager and its server."""
+
+from multiprocessing.connection import (Listener, Client, arbitrary_address,
+                                        default_family)
+from queue import Queue, Empty
+from traceback import format_exc
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+
+
+class SocketTransport:
+
+    """
+    Connect a `ServerManager` to its server through sockets instead of
+    `multiprocessing.Queue`s.
+
+    The server listens on a Unix-domain socket (a named pipe on Windows),
+    and each client process opens its own connection on first use. Every
+    query is tagged with a request id, and the server sends the response
+    back on the connection the query came in on, with the same id. So
+    nothing is shared between client processes, and threads within one
+    process can have several queries outstanding at once and still each
+    get their own response - there's no need for the manager's global
+    ``query_lock``. A response to a query that timed out is thrown away
+    instead of being taken as the answer to the next query.
+
+    Use it with ``ServerManager(..., transport=SocketTransport())``, or
+    set ``ServerManager.default_transport = SocketTransport`` to use it for
+    every server started afterward.
+
+    Args:
+        address (Optional[str]): where the server listens. Default is a new
+            temporary address for the platform's default connection family.
+
+        connect_timeout (float): seconds a client waits for the server to
+            start listening. Default 10.
+    """
+
+    def __init__(self, address=None, connect_timeout=10):
+        self.family = default_family
+        self.address = address or arbitrary_address(self.family)
+        self.connect_timeout = connect_timeout
+
+        # client connections, only valid in the process that made them
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_clients'] = {}
+        state['_clients_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._clients_lock = threading.Lock()
+
+    ######################################################################
+    # client side                                                        #
+    ######################################################################
+
+    def ask(self, query, timeout=None):
+        """
+        Send a query and wait for its response.
+
+        Args:
+            query (tuple): the query, as the server's ``process_query``
+                expects it.
+
+            timeout (Optional[float]): max seconds to wait for the response.
+
+        Returns:
+            Any: the response, as the server put it on its response queue.
+
+        Raises:
+            queue.Empty: if the timeout expires, like ``Queue.get``.
+        """
+        client, request_id = self._send(query, expect_response=True)
+        return client.get_response(request_id, timeout)
+
+    def write(self, query):
+        """
+        Send a query that doesn't get a response.
+
+        Args:
+            query (tuple): the query, as the server's ``process_query``
+                expects it.
+        """
+        self._send(query, expect_response=False)
+
+    def reset(self):
+        """Close this process's connection, to reconnect on the next query."""
+        with self._clients_lock:
+            client = self._clients.pop(os.getpid(), None)
+        if client is not None:
+            client.close()
+
+    def _send(self, query, expect_response):
+        try:
+            client = self._client()
+            return client, client.send(query, expect_response)
+        except (OSError, EOFError):
+            # the server may have been restarted since we connected,
+            # so try once more on a new connection
+            client = self._client()
+            return client, client.send(query, expect_response)
+
+    def _client(self):
+        pid = os.getpid()
+        client = self._clients.get(pid)
+        if client is None or client.closed:
+            with self._clients_lock:
+                client = self._clients.get(pid)
+                if client is None or client.closed:
+                    client = _SocketClient(self._connect())
+                    # connections inherited from a parent process belong
+                    # to that process, so they're dropped, not closed
+                    self._clients = {pid: client}
+        return client
+
+    def _connect(self):
+        deadline = time.perf_counter() + self.connect_timeout
+        while True:
+            try:
+                return Client(self.address, family=self.family,
+                              authkey=mp.current_process().authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                # the server isn't listening (yet)
+                if time.perf_counter() > deadline:
+                    raise
+                time.sleep(0.01)
+
+    ######################################################################
+    # server side                                                        #
+    ######################################################################
+
+    def serve(self):
+        """
+        Start listening, in the server process.
+
+        Returns:
+            Tuple[_SocketServerQueries, _SocketServerResponses]: stand-ins
+                for the query and response queues, to pass to the server.
+        """
+        if self.family == 'AF_UNIX' and os.path.exists(self.address):
+            # left over from a server that was terminated
+            os.remove(self.address)
+
+        # processes started by multiprocessing inherit the authkey, so only
+        # they can connect
+        listener = Listener(self.address, family=self.family,
+                            authkey=mp.current_process().authkey)
+        queries = _SocketServerQueries(listener)
+        return queries, _SocketServerResponses(queries)
+
+
+class _SocketClient:
+
+    """One process's connection to the server."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.closed = False
+
+        self._request_ids = itertools.count()
+        self._send_lock = threading.Lock()
+
+        # responses that arrived for other threads, and whether some
+        # thread is currently reading from the connection
+        self._responses = {}
+        self._abandoned = set()
+        self._receiving = False
+        self._condition = threading.Condition()
+
+    def send(self, query, expect_response):
+        request_id = next(self._request_ids) if expect_response else None
+        with self._send_lock:
+            try:
+                self.connection.send((request_id, query))
+            except (OSError, EOFError):
+                self.close()
+                raise
+        return request_id
+
+    def get_response(self, request_id, timeout):
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        with self._condition:
+            while request_id not in self._responses:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._abandoned.add(request_id)
+                        raise Empty
+
+                if self._receiving:
+                    # another thread is reading, it will wake us up
+                    self._condition.wait(remaining)
+                    continue
+
+                self._receiving = True
+                self._condition.release()
+                try:
+                    message = None
+                    if self.connection.poll(remaining):
+                        message = self.connection.recv()
+                except (OSError, EOFError):
+                    self.closed = True
+                    raise
+                finally:
+                    self._condition.acquire()
+                    self._receiving = False
+                    self._condition.notify_all()
+
+                if message is not None:
+                    response_id, response = message
+                    if response_id in self._abandoned:
+                        self._abandoned.discard(response_id)
+                        logging.warning('discarding late response:\n' +
+                                        repr(response))
+                    else:
+                        self._responses[response_id] = response
+
+            return self._responses.pop(request_id)
+
+    def close(self):
+        self.closed = True
+        try:
+            self.connection.close()
+        except OSError:
+            pass
+
+
+class _SocketServerQueries:
+
+    """
+    The server's end of a `SocketTransport`, in place of its query queue.
+
+    Accepts client connections and reads their queries in background
+    threads, and ``get`` hands them over one at a time like ``Queue.get``.
+    Remembers where the last query came from, so the response goes back
+    there.
+    """
+
+    def __init__(self, listener):
+        self._listener = listener
+        self._queries = Queue()
+        self.current = None
+
+        threading.Thread(target=self._accept, name='SocketTransport accept',
+                         daemon=True).start()
+
+    def get(self, timeout=None):
+        connection, request_id, query = self._queries.get(timeout=timeout)
+        self.current = (connection, request_id)
+        return query
+
+    def empty(self):
+        return self._queries.empty()
+
+    def requeue(self, query, source):
+        """
+        Put a query back in line, to be handled as if it just arrived.
+
+        Args:
+            query: the query to handle again.
+            source (tuple): where it came from, ``current`` when it was
+                first handed over.
+        """
+        connection, request_id = source
+        self._queries.put((connection, request_id, query))
+
+    def close(self):
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                # the listener was closed
+                return
+            threading.Thread(target=self._read, args=(connection,),
+                             name='SocketTransport read', daemon=True).start()
+
+    def _read(self, connection):
+        # so the server thread and this one don't both send at once
+        connection.send_lock = threading.Lock()
+        while True:
+            try:
+                request_id, query = connection.recv()
+            except (OSError, EOFError):
+                # the client is gone
+                connection.close()
+                return
+            except Exception:
+                logging.error('malformed message on SocketTransport\n' +
+                              format_exc())
+                continue
+            self._queries.put((connection, request_id, query))
+
+
+class _SocketServerResponses:
+
+    """
+    The server's end of a `SocketTransport`, in place of its response queue.
+
+    ``put`` sends the response to whoever asked the current query. To answer
+    later, or from another thread, save ``reply_to()`` when the query
+    arrives and use ``put_to``.
+    """
+
+    def __init__(self, queries):
+        self._queries = queries
+
+    def reply_to(self):
+        """Where the response to the current query should go."""
+        return self._queries.current
+
+    def put(self, response):
+        self.put_to(self._queries.current, response)
+
+    def put_to(self, reply_to, response):
+        """Send a response to a query, given its ``reply_to()``."""
+        if reply_to is None:
+            raise RuntimeError('no query to respond to')
+        connection, request_id = reply_to
+        if request_id is None:
+            # only queries that expect a response have an id, anything else
+            # (like errors in writes) is just logged
+            logging.error('unexpected response to a write:\n' +
+                          repr(response))
+            return
+        with connection.send_lock:
+            connection.send((request_id, response))
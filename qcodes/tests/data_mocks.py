@@ -117,6 +117,20 @@ def DataSet2D(location=None, name=None):
     return new_data(arrays=(x, y, z), location=location, name=name)
 
 
+def DataSet3D(location=None, name=None):
+    # DataSet with one 3D array with 2 x 3 x 4 points
+    xx, yy, zz = numpy.meshgrid(range(2), range(3), range(4), indexing='ij')
+    ww = xx * 0.5 + yy * 1.25 - zz ** 2
+    x = DataArray(name='x', label='X', preset_data=xx[:, 0, 0] + 1.5,
+                  is_setpoint=True)
+    y = DataArray(name='y', label='Y', preset_data=yy[:, :, 0] * 0.1,
+                  set_arrays=(x,), is_setpoint=True)
+    z = DataArray(name='z', label='Z', preset_data=zz * 1e-7,
+                  set_arrays=(x, y), is_setpoint=True)
+    w = DataArray(name='w', label='W', preset_data=ww, set_arrays=(x, y, z))
+    return new_data(arrays=(x, y, z, w), location=location, name=name)
+
+
 def file_1d():
     return '\n'.join([
         '# x_set\ty',
@@ -325,3 +325,54 @@ class MultiGetter(Parameter):
 
     def get(self):
         return self._return
+
+
+class BufferedSource(ManualParameter):
+    """
+    A ManualParameter that also implements the BufferedSweep protocol,
+    like a source with a hardware list mode. During a buffered sweep, each
+    BufferedReader attached to it takes a reading at every setpoint.
+    """
+    def __init__(self, name, **kwargs):
+        super().__init__(name, **kwargs)
+        self.readers = []
+        self.sweep_count = 0
+        self._sweep_values = None
+
+    def prepare_buffered_sweep(self, values, delay):
+        self._sweep_values = list(values)
+        self.sweep_delay = delay
+
+    def run_buffered_sweep(self):
+        self.sweep_count += 1
+        for value in self._sweep_values:
+            self.set(value)
+            for reader in self.readers:
+                reader.record()
+
+
+class BufferedReader(Parameter):
+    """
+    A meter reading ``func(source value)``, either one value at a time with
+    ``get`` or as a whole buffer during a sweep of ``source``.
+    """
+    def __init__(self, name, source, func):
+        super().__init__(name=name)
+        self._source = source
+        self._func = func
+        self._buffer = None
+        source.readers.append(self)
+
+    def get(self):
+        return self._func(self._source.get())
+
+    def prepare_buffered_get(self, npts):
+        self._buffer = []
+
+    def record(self):
+        if self._buffer is not None:
+            self._buffer.append(self.get())
+
+    def get_buffered(self):
+        buffer, self._buffer = self._buffer, None
+        return np.array(buffer)
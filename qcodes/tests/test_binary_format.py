@@ -0,0 +1,218 @@
+from unittest import TestCase
+import json
+import os
+import numpy as np
+
+from qcodes.data.binary_format import BinaryFormat
+from qcodes.data.gnuplot_format import GNUPlotFormat
+
+from qcodes.data.data_set import DataSet, load_data
+from qcodes.utils.helpers import LogCapture
+from .data_mocks import DataSet1D, DataSet2D, DataSetCombined
+
+
+class TestBinaryFormat(TestCase):
+    def setUp(self):
+        self.io = DataSet.default_io
+        self.locations = ('_binary1d_', '_binarycombined_', '_gnuplotcopy_')
+
+        for location in self.locations:
+            self.assertFalse(self.io.list(location))
+
+    def tearDown(self):
+        for location in self.locations:
+            self.io.remove_all(location)
+
+    def checkArraysEqual(self, a, b):
+        self.checkArrayAttrs(a, b)
+
+        self.assertEqual(len(a.set_arrays), len(b.set_arrays))
+        for sa, sb in zip(a.set_arrays, b.set_arrays):
+            self.checkArrayAttrs(sa, sb)
+
+    def checkArrayAttrs(self, a, b):
+        self.assertEqual(repr(a.tolist()), repr(b.tolist()))
+        self.assertEqual(a.label, b.label)
+        self.assertEqual(a.array_id, b.array_id)
+
+    def test_file_layout(self):
+        formatter = BinaryFormat()
+        location = self.locations[0]
+        data = DataSet1D(location)
+
+        formatter.write(data, data.io, data.location)
+
+        with open(location + '/x_set.json', 'r') as f:
+            header = json.load(f)
+        self.assertEqual(header['shape'], [5])
+        self.assertEqual(header['saved_points'], 5)
+        self.assertEqual(header['dtype'], '<f8')
+        self.assertEqual([a['array_id'] for a in header['arrays']],
+                         ['x_set', 'y'])
+
+        columns = np.fromfile(location + '/x_set.bin', dtype='<f8')
+        self.assertEqual(columns.tolist(),
+                         [1, 2, 3, 4, 5, 3, 4, 5, 6, 7])
+
+        data2 = DataSet(location=location)
+        formatter.read(data2)
+        self.checkArraysEqual(data2.x_set, data.x_set)
+        self.checkArraysEqual(data2.y, data.y)
+        self.assertEqual(data2.y.last_saved_index, 4)
+
+    def test_round_trip_vs_gnuplot(self):
+        for make_data, location in ((DataSet2D, self.locations[0]),
+                                    (DataSetCombined, self.locations[1])):
+            data = make_data(location)
+            data.formatter = BinaryFormat()
+            data.write()
+
+            gnuplot_copy = make_data(False)
+            gnuplot_copy.write_copy(io_manager=data.io,
+                                    location=self.locations[2])
+
+            binary_data = load_data(location, data_manager=False,
+                                    formatter=BinaryFormat(), io=data.io)
+            gnuplot_data = load_data(self.locations[2], data_manager=False,
+                                     formatter=GNUPlotFormat(), io=data.io)
+
+            self.assertEqual(set(binary_data.arrays), set(data.arrays))
+            for array_id, array in gnuplot_data.arrays.items():
+                self.checkArraysEqual(binary_data.arrays[array_id], array)
+
+            self.io.remove_all(self.locations[2])
+
+    def test_incremental_write(self):
+        formatter = BinaryFormat()
+        location = self.locations[1]
+        data = DataSet2D(location)
+        data_copy = DataSet2D(False)
+        path = location + '/x_set_y_set.bin'
+
+        # empty the data and mark it as unmodified
+        for array in (data.x_set, data.y_set, data.z):
+            array.clear()
+            array.modified_range = None
+
+        for i in range(data_copy.x_set.shape[0]):
+            data.x_set[i] = data_copy.x_set[i]
+            for j in range(data_copy.y_set.shape[1]):
+                data.y_set[i, j] = data_copy.y_set[i, j]
+                data.z[i, j] = data_copy.z[i, j]
+            formatter.write(data, data.io, data.location)
+            if i == 0:
+                # make sure later writes only fill in new chunks
+                first_row = self.read_first_row(path)
+
+            self.assertEqual(self.read_first_row(path), first_row)
+
+            reread_data = load_data(location=location, data_manager=False,
+                                    formatter=formatter, io=data.io)
+            for array_id in ('x_set', 'y_set', 'z'):
+                self.checkArrayAttrs(reread_data.arrays[array_id],
+                                     data.arrays[array_id])
+            self.assertEqual(reread_data.z.last_saved_index,
+                             (i + 1) * data.z.shape[1] - 1)
+
+        self.assertEqual(data.z.tolist(), data_copy.z.tolist())
+
+    def read_first_row(self, path):
+        # 3 columns (x_set, y_set, z) of shape (6, 4)
+        columns = np.fromfile(path, dtype='<f8').reshape((3, 6, 4))
+        return columns[:, 0].tolist()
+
+    def test_default_formatter(self):
+        location = self.locations[0]
+        default_formatter = DataSet.default_formatter
+        try:
+            DataSet.default_formatter = BinaryFormat()
+            data = DataSet1D(location)
+            data.write()
+            self.assertTrue(os.path.isfile(location + '/x_set.bin'))
+
+            data2 = load_data(location, data_manager=False)
+            self.assertIsInstance(data2.formatter, BinaryFormat)
+            self.checkArraysEqual(data2.y, data.y)
+        finally:
+            DataSet.default_formatter = default_formatter
+
+    def test_lazy_read(self):
+        location = self.locations[1]
+        data = DataSetCombined(location)
+        data.formatter = BinaryFormat()
+        data.write()
+
+        lazy_data = load_data(location, data_manager=False,
+                              formatter=BinaryFormat(), io=data.io, lazy=True)
+        full_data = load_data(location, data_manager=False,
+                              formatter=BinaryFormat(), io=data.io)
+
+        for array_id in ('y1', 'y2', 'y_set', 'z1', 'z2'):
+            self.assertIsInstance(lazy_data.arrays[array_id].ndarray,
+                                  np.memmap)
+        # outer setpoints are loaded into memory
+        self.assertNotIsInstance(lazy_data.x_set.ndarray, np.memmap)
+
+        for array_id, array in full_data.arrays.items():
+            lazy_array = lazy_data.arrays[array_id]
+            self.checkArraysEqual(lazy_array, array)
+            self.assertEqual(lazy_array.last_saved_index,
+                             array.last_saved_index)
+
+        # changes stay in memory
+        lazy_data.z1[1, 1] = 100
+        self.assertEqual(lazy_data.z1.modified_range, (4, 4))
+        reread_data = load_data(location, data_manager=False,
+                                formatter=BinaryFormat(), io=data.io)
+        self.assertEqual(reread_data.z1[1, 1], 29)
+
+    def test_lazy_read_partial(self):
+        location = self.locations[0]
+        data = DataSet2D(location)
+        # only the first 10 points have been measured
+        for array in (data.y_set, data.z):
+            array.modified_range = (0, 9)
+        data.formatter = BinaryFormat()
+        data.write()
+
+        lazy_data = load_data(location, data_manager=False,
+                              formatter=BinaryFormat(), io=data.io, lazy=True)
+        self.assertEqual(lazy_data.z.shape, (6, 4))
+        self.assertEqual(lazy_data.z.last_saved_index, 9)
+        z = lazy_data.z.ndarray.reshape(-1)
+        self.assertEqual(z[:10].tolist(),
+                         data.z.ndarray.reshape(-1)[:10].tolist())
+        self.assertTrue(np.isnan(z[10:]).all())
+        self.assertEqual(repr(lazy_data.x_set.tolist()),
+                         repr([0., 1., 2., float('nan'), float('nan'),
+                               float('nan')]))
+
+    def test_lazy_not_supported(self):
+        location = self.locations[0]
+        data = DataSet1D(location)
+        data.write()
+
+        # GNUPlotFormat doesn't support lazy reading, so reads everything
+        lazy_data = load_data(location, data_manager=False, io=data.io,
+                              lazy=True)
+        self.assertNotIsInstance(lazy_data.y.ndarray, np.memmap)
+        self.checkArraysEqual(lazy_data.y, data.y)
+
+    def test_read_errors(self):
+        formatter = BinaryFormat()
+        location = self.locations[0]
+        data = DataSet1D(location)
+        formatter.write(data, data.io, data.location)
+
+        # truncated data file
+        with open(location + '/x_set.bin', 'r+b') as f:
+            f.truncate(16)
+
+        data2 = DataSet(location=location)
+        with LogCapture() as logs:
+            formatter.read(data2)
+        self.assertTrue('ValueError' in logs.value, logs.value)
+
+    def test_constructor_errors(self):
+        with self.assertRaises(ValueError):
+            BinaryFormat(extension='dat', header_extension='.dat')
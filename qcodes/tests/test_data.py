@@ -4,6 +4,8 @@ import numpy as np
 import os
 import pickle
 import logging
+import tempfile
+import time
 
 from qcodes.data.data_array import DataArray
 from qcodes.data.manager import get_data_manager, NoData
@@ -184,6 +186,57 @@ class TestDataArray(TestCase):
         ])
         self.assertEqual(data.modified_range, (2, 14))
 
+    def test_flat_range(self):
+        data = DataArray(shape=(3, 4, 5))
+        data.init_data()
+        indices = [2, (1,), (2, 3), (1, 2, 4), (0, 0, 0), (2, 3, 4),
+                   # these all take the general path
+                   (1, slice(1, 3)), (slice(None), 2), (np.int64(1), 2)]
+        for index in indices:
+            flat = np.arange(60).reshape(3, 4, 5)[index]
+            self.assertEqual(data._flat_range(index),
+                             (flat.min(), flat.max()), index)
+
+        # out of range, and negative, indices are not supported
+        with self.assertRaises(ValueError):
+            data[3, 0, 0] = 1
+        with self.assertRaises(ValueError):
+            data[-1, 2, 3] = 1
+
+    def test_get_apply_changes(self):
+        source = DataArray(preset_data=np.arange(12.).reshape(3, 4))
+        source.modified_range = (2, 6)
+        source.last_saved_index = 4
+        self.assertIsNone(source.get_changes(6))
+
+        changes = source.get_changes(1)
+        self.assertEqual((changes['start'], changes['stop']), (2, 6))
+        self.assertIsInstance(changes['vals'], np.ndarray)
+        self.assertEqual(changes['vals'].tolist(), [2, 3, 4, 5, 6])
+        # it's a copy, so later changes don't affect it
+        source[1, 0] = 100
+        self.assertEqual(changes['vals'].tolist(), [2, 3, 4, 5, 6])
+
+        target = DataArray(shape=(3, 4))
+        target.init_data()
+        target.apply_changes(**changes)
+        self.assertEqual(target.synced_index, 6)
+        np.testing.assert_array_equal(target.ndarray.reshape(-1)[2:7],
+                                      [2, 3, 4, 5, 6])
+        self.assertTrue(np.isnan(target.ndarray.reshape(-1)[7:]).all())
+
+        # arrays that aren't contiguous in memory work too
+        target.ndarray = np.full((4, 3), float('nan')).T
+        target.apply_changes(7, 8, [7, 8])
+        self.assertEqual(target[1, 3], 7)
+        self.assertEqual(target[2, 0], 8)
+        source.ndarray = np.asfortranarray(source.ndarray)
+        self.assertEqual(source.get_changes(3)['vals'].tolist(),
+                         [100, 5, 6])
+
+        with self.assertRaises(ValueError):
+            target.apply_changes(0, 2, [1, 2])
+
     def test_repr(self):
         array2d = [[1, 2], [3, 4]]
         arrayrepr = repr(np.array(array2d))
@@ -239,6 +292,36 @@ class TestDataArray(TestCase):
         with self.assertRaises(TypeError):
             data.nest(4)
 
+    def test_grow_and_trim(self):
+        nan = float('nan')
+        x = DataArray(name='x', is_setpoint=True).nest(2)
+        x.init_data()
+        x[0] = 1
+        x[1] = 2
+        x.mark_saved(1)
+
+        # capacity doubles, and everything needs saving again
+        x.grow(0, 3)
+        self.assertEqual(x.shape, (4,))
+        self.assertEqual(repr(x.tolist()), repr([1., 2., nan, nan]))
+        self.assertEqual(x.modified_range, (0, 3))
+        self.assertIsNone(x.last_saved_index)
+        x.grow(0, 4)
+        self.assertEqual(x.shape, (4,))
+        x.grow(0, 9)
+        self.assertEqual(x.shape, (9,))
+
+        x.trim(0, 3)
+        self.assertEqual(x.shape, (3,))
+        self.assertEqual(repr(x.tolist()), repr([1., 2., nan]))
+        x[2] = 3
+        self.assertEqual(x.modified_range, (0, 2))
+
+        # preset arrays nested in the loop get copies of their data
+        sp = DataArray(preset_data=[5, 6]).nest(3, set_array=x)
+        sp.grow(0, 4)
+        self.assertEqual(sp.tolist(), [[5, 6]] * 6)
+
     def test_data_set_property(self):
         data = DataArray(preset_data=[1, 2])
         self.assertIsNone(data.data_set)
@@ -281,6 +364,40 @@ class TestDataArray(TestCase):
         data.synced_index = 22
         self.assertEqual(data.fraction_complete(), 23/50)
 
+    def test_shared_data(self):
+        data = DataArray(preset_data=[1., 2., 3.])
+        with tempfile.TemporaryDirectory() as directory:
+            data.init_shared_data(directory)
+            path = data.shared_file
+            self.assertEqual(os.path.dirname(path), directory)
+            # preset data is kept
+            self.assertEqual(data.ndarray.tolist(), [1, 2, 3])
+
+            # a pickled copy sees our changes and we see its changes
+            data2 = pickle.loads(pickle.dumps(data))
+            self.assertEqual(data2.shared_file, path)
+            data[1] = 20
+            data2[2] = 30
+            self.assertEqual(data2.ndarray.tolist(), [1, 20, 30])
+            self.assertEqual(data.ndarray.tolist(), [1, 20, 30])
+
+            # changes only send the indices
+            data.modified_range = (1, 2)
+            data2.synced_index = 0
+            changes = data.get_changes(0)
+            self.assertEqual(changes, {'start': 1, 'stop': 2})
+            data2.apply_changes(**changes)
+            self.assertEqual(data2.synced_index, 2)
+
+            data.release_shared_data()
+            self.assertFalse(os.path.exists(path))
+            self.assertIsNone(data.shared_file)
+            # data2 still has its data, but can't be shared anymore
+            self.assertEqual(data2.ndarray.tolist(), [1, 20, 30])
+            data3 = pickle.loads(pickle.dumps(data2))
+            self.assertIsNone(data3.shared_file)
+            self.assertEqual(data3.ndarray.tolist(), [1, 20, 30])
+
 
 class TestLoadData(TestCase):
 
@@ -518,6 +635,45 @@ class TestDataSet(TestCase):
         with self.assertRaises(ValueError):
             data.add_array(MockArray())
 
+    def test_shared_memory(self):
+        data_manager = get_data_manager()
+        with tempfile.TemporaryDirectory() as directory:
+            x = DataArray(name='x', shape=(4,), is_setpoint=True)
+            y = DataArray(name='y', shape=(4,), set_arrays=(x,))
+            data = new_data(arrays=(x, y), location='shared',
+                            io=DiskIO(directory), data_manager=True,
+                            mode=DataMode.PUSH_TO_SERVER, shared_memory=True)
+            self.assertIsNotNone(data.x_set.shared_file)
+
+            with patch.object(data_manager, 'write',
+                              wraps=data_manager.write) as write_mock:
+                data.store((0,), {'x_set': 1, 'y': 2})
+                data.store((1,), {'x_set': 3, 'y': 4})
+            # only the modified ranges go through the queue
+            for call in write_mock.call_args_list:
+                self.assertEqual(call[0][0], 'mark_modified')
+
+            viewer = DataSet(location='shared', io=DiskIO(directory),
+                             data_manager=data_manager,
+                             mode=DataMode.PULL_FROM_SERVER)
+            data._send_modified_ranges()
+            self.assertTrue(viewer.sync())
+            self.assertEqual(viewer.y.synced_index, 1)
+            self.assertEqual(viewer.y.ndarray[:2].tolist(), [2, 4])
+
+            data.store((2,), {'x_set': 5, 'y': 6})
+            data.finalize()
+            self.assertFalse(viewer.sync())
+            self.assertEqual(viewer.y.ndarray[:3].tolist(), [2, 4, 6])
+
+            # the DataServer wrote it all to disk too
+            saved = load_data(location='shared', io=DiskIO(directory))
+            self.assertEqual(saved.y.ndarray[:3].tolist(), [2, 4, 6])
+
+            shared_file = data.x_set.shared_file
+            data_manager.halt()
+            self.assertFalse(os.path.exists(shared_file))
+
     def test_write_copy(self):
         data = DataSet1D(location=False)
         mockbase = os.path.abspath('some_folder')
@@ -580,6 +736,93 @@ class TestDataSet(TestCase):
         self.assertEqual(data.formatter.write_metadata_calls,
                          [(mockbase2, 'yet/another/path', False)])
 
+    def test_store_block(self):
+        data = DataSet2D(location=False)
+        for array in data.arrays.values():
+            array.modified_range = None
+
+        data.store_block((2, 1), {'y_set': [11, 12], 'z': [21, 22]})
+        self.assertEqual(data.z[2].tolist(), [4, 21, 22, 13])
+        self.assertEqual(data.y_set[2].tolist(), [0, 11, 12, 3])
+        self.assertEqual(data.z.modified_range, (9, 10))
+        self.assertEqual(data.y_set.modified_range, (9, 10))
+
+        # whole rows at once too
+        data.store_block((3, 0), {'z': np.arange(4)})
+        self.assertEqual(data.z[3].tolist(), [0, 1, 2, 3])
+        self.assertEqual(data.z.modified_range, (9, 15))
+
+        with self.assertRaises(ValueError):
+            data.store_block((4, 0), {'y_set': [1, 2], 'z': [1, 2, 3]})
+
+    def test_grow_loop(self):
+        x = DataArray(name='x', is_setpoint=True).nest(2)
+        y = DataArray(name='y', is_setpoint=True).nest(3).nest(
+            2, set_array=x)
+        z = DataArray(name='z').nest(3, set_array=y).nest(2, set_array=x)
+        data = new_data(arrays=(x, y, z), location=False)
+
+        data.grow_loop('y_set', 4)
+        self.assertEqual([x.shape, y.shape, z.shape], [(2,), (2, 6), (2, 6)])
+        data.grow_loop('x_set', 3)
+        self.assertEqual([x.shape, y.shape, z.shape], [(4,), (4, 6), (4, 6)])
+
+        data.store((2, 5), {'z': 7})
+        data.trim_loop('y_set', 4)
+        data.trim_loop('x_set', 3)
+        self.assertEqual([x.shape, y.shape, z.shape], [(3,), (3, 4), (3, 4)])
+        self.assertTrue(np.isnan(z.ndarray).all())
+
+        data.mode = DataMode.PULL_FROM_SERVER
+        with self.assertRaises(RuntimeError):
+            data.grow_loop('x_set', 5)
+
+    def test_write_in_background(self):
+        data = DataSet1D(location='some/path')
+        data.formatter = RecordingMockFormatter()
+        data.write_in_background = True
+        data.write_period = None
+        for array in data.arrays.values():
+            array.modified_range = None
+
+        data.store((1,), {'x_set': 20, 'y': 21})
+        data.store((slice(2, 4),), {'y': [22, 23]})
+        self.assertEqual(data.y[1:4].tolist(), [21, 22, 23])
+        # nothing is marked modified until a write picks it up
+        self.assertIsNone(data.y.modified_range)
+        # and with no write_period, there's no thread to do that
+        self.assertIsNone(data._background_writer.thread)
+        self.assertEqual(data.formatter.write_calls, [])
+
+        data.write()
+        self.assertEqual(data.formatter.modified_ranges,
+                         [{'x_set': (1, 1), 'y': (1, 3)}])
+
+        data.store((0,), {'y': 19})
+        data.finalize()
+        self.assertEqual(len(data.formatter.write_calls), 2)
+        self.assertEqual(data.formatter.modified_ranges[1]['y'], (0, 3))
+
+    def test_background_writer_thread(self):
+        data = DataSet1D(location='some/path')
+        data.formatter = RecordingMockFormatter()
+        data.write_in_background = True
+        data.write_period = 0.01
+
+        data.store((0,), {'y': 10})
+        thread = data._background_writer.thread
+        self.assertTrue(thread.is_alive())
+        for i in range(100):
+            if data.formatter.write_calls:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(data.formatter.write_calls), 1)
+
+        data.finalize()
+        self.assertFalse(thread.is_alive())
+        # finalize always writes at the end
+        self.assertEqual(len(data.formatter.write_calls), 2)
+
     def test_pickle_dataset(self):
         # Test pickling of DataSet object
         # If the data_manager is set to None, then the object should pickle.
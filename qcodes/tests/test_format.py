@@ -1,5 +1,6 @@
 from unittest import TestCase
 import os
+import numpy as np
 
 from qcodes.data.format import Formatter
 from qcodes.data.gnuplot_format import GNUPlotFormat
@@ -7,7 +8,8 @@ from qcodes.data.gnuplot_format import GNUPlotFormat
 from qcodes.data.data_array import DataArray
 from qcodes.data.data_set import DataSet, new_data, load_data
 from qcodes.utils.helpers import LogCapture
-from .data_mocks import DataSet1D, file_1d, DataSetCombined, files_combined
+from .data_mocks import (DataSet1D, DataSet3D, file_1d, DataSetCombined,
+                         files_combined)
 
 
 class TestBaseFormatter(TestCase):
@@ -348,6 +350,170 @@ class TestGNUPlotFormat(TestCase):
             self.assertEqual(f.read(), starred_file)
         self.assertEqual(self.stars_before_write, 1)
 
+    def point_by_point_file(self, formatter, data):
+        # reference: format one point at a time, unraveling each index
+        group = formatter.group_arrays(data.arrays)[0]
+        shape = group.set_arrays[-1].shape
+        out = formatter._make_header(group)
+        for i in range(np.prod(shape)):
+            indices = np.unravel_index(i, shape)
+            for j, index in enumerate(reversed(indices)):
+                if index != 0:
+                    out += formatter.terminator * j
+                    break
+            out += formatter.separator.join(
+                formatter.number_format.format(array[indices[:array.ndim]])
+                for array in group.set_arrays + group.data)
+            out += formatter.terminator
+        return out
+
+    def test_block_write_3d(self):
+        formatter = GNUPlotFormat(number_format='.4g')
+        location = self.locations[0]
+        data = DataSet3D(location)
+        data_copy = DataSet3D(False)
+        path = location + '/x_set_y_set_z_set.dat'
+
+        formatter.write(data, data.io, data.location)
+        with open(path, 'r') as f:
+            self.assertEqual(f.read(),
+                             self.point_by_point_file(formatter, data))
+
+        # appending in chunks that don't line up with the loops gives the
+        # same file as writing it all at once
+        self.io.remove_all(location)
+        for array in data.arrays.values():
+            array.clear()
+            array.modified_range = array.last_saved_index = None
+        w = data.w.ndarray.reshape(-1)
+        w_copy = data_copy.w.ndarray.reshape(-1)
+        data.x_set[:] = data_copy.x_set
+        data.y_set[:] = data_copy.y_set
+        data.z_set[:] = data_copy.z_set
+        for start, stop in ((0, 1), (1, 5), (5, 13), (13, 24)):
+            w[start:stop] = w_copy[start:stop]
+            data.w._update_modified_range(start, stop - 1)
+            formatter.write(data, data.io, data.location)
+
+        with open(path, 'r') as f:
+            self.assertEqual(f.read(),
+                             self.point_by_point_file(formatter, data_copy))
+
+    def read_both_ways(self, location):
+        # read a file with and without fast_read, and make sure the
+        # fast reader didn't fall back on reading line by line
+        class LinesOnlyFormat(GNUPlotFormat):
+            def _read_block(self, *args):
+                return False
+
+        fast_format = GNUPlotFormat()
+        fast_format._read_lines = None
+        fast_data = DataSet(location=location, formatter=fast_format)
+        fast_data.read()
+
+        slow_data = DataSet(location=location, formatter=LinesOnlyFormat())
+        slow_data.read()
+
+        self.assertEqual(set(fast_data.arrays), set(slow_data.arrays))
+        for array_id, array in slow_data.arrays.items():
+            fast_array = fast_data.arrays[array_id]
+            self.assertEqual(repr(fast_array.tolist()), repr(array.tolist()))
+            self.assertEqual(fast_array.last_saved_index,
+                             array.last_saved_index)
+        return fast_data
+
+    def test_fast_read(self):
+        location = self.locations[0]
+        data = DataSet3D(location)
+        data.write()
+        path = location + '/x_set_y_set_z_set.dat'
+
+        data2 = self.read_both_ways(location)
+        for array_id in ('x_set', 'y_set', 'z_set', 'w'):
+            self.checkArraysEqual(data2.arrays[array_id],
+                                  data.arrays[array_id])
+
+        # partial files, ending in the middle of each loop
+        with open(path, 'r') as f:
+            lines = f.read().split('\n')
+        for nlines in (4, 7, 12, 21, 30):
+            with open(path, 'w') as f:
+                f.write('\n'.join(lines[:nlines]))
+            self.read_both_ways(location)
+
+    def test_fast_read_fallback(self):
+        location = self.locations[0]
+        formatter = GNUPlotFormat()
+        data = DataSet3D(location)
+        data.write()
+        path = location + '/x_set_y_set_z_set.dat'
+        with open(path, 'r') as f:
+            lines = f.read().split('\n')
+
+        # one blank line less than a full reset (the file wasn't written
+        # by GNUPlotFormat) and a missing column: neither fits the bulk
+        # reader but both are readable line by line.
+        blank_line = lines.index('', 3)
+        for bad_lines in (lines[:blank_line] + lines[blank_line + 1:],
+                          lines[:3] + [lines[3][:lines[3].rindex('\t')]] +
+                          lines[4:]):
+            with open(path, 'w') as f:
+                f.write('\n'.join(bad_lines))
+            data2 = DataSet(location=location, formatter=formatter)
+            data2.read()
+            data3 = DataSet(location=location,
+                            formatter=GNUPlotFormat(fast_read=False))
+            data3.read()
+            for array_id, array in data3.arrays.items():
+                self.assertEqual(repr(data2.arrays[array_id].tolist()),
+                                 repr(array.tolist()))
+
+        # inconsistent setpoints are still an error
+        lines[4] = lines[4].replace('1.5', '2.5', 1)
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines))
+        data2 = DataSet(location=location, formatter=formatter)
+        with LogCapture() as logs:
+            data2.read()
+        self.assertTrue('inconsistent setpoint values' in logs.value,
+                        logs.value)
+
+    def test_nan_setpoints(self):
+        location = self.locations[0]
+        data = DataSet3D(location)
+        data.write()
+        path = location + '/x_set_y_set_z_set.dat'
+        with open(path, 'r') as f:
+            lines = f.read().split('\n')
+
+        def read_both_ways():
+            out = []
+            for fast_read in (True, False):
+                data2 = DataSet(location=location,
+                                formatter=GNUPlotFormat(fast_read=fast_read))
+                with LogCapture() as logs:
+                    data2.read()
+                out.append(('inconsistent setpoint values' in logs.value,
+                            data2))
+            return out
+
+        # NaN in place of a setpoint that's already been read is an error
+        # either way, but before the first one it's just a missing value
+        for line, error in ((4, True), (3, False)):
+            bad_lines = list(lines)
+            bad_lines[line] = 'nan' + bad_lines[line][3:]
+            with open(path, 'w') as f:
+                f.write('\n'.join(bad_lines))
+            (fast_error, fast_data), (slow_error, slow_data) = \
+                read_both_ways()
+            self.assertEqual(fast_error, error, line)
+            self.assertEqual(slow_error, error, line)
+            if not error:
+                for array_id, array in slow_data.arrays.items():
+                    self.assertEqual(
+                        repr(fast_data.arrays[array_id].tolist()),
+                        repr(array.tolist()))
+
     def test_constructor_errors(self):
         with self.assertRaises(AttributeError):
             # extension must be a string
@@ -7,7 +7,8 @@ from shutil import copy
 from qcodes.station import Station
 from qcodes.loops import Loop
 from qcodes.data.location import FormatLocation
-from qcodes.data.hdf5_format import HDF5Format, str_to_bool
+from qcodes.data.hdf5_format import (HDF5Format, str_to_bool,
+                                     _flat_range_regions)
 
 from qcodes.data.data_set import new_data, load_data, DataSet
 from qcodes.data.data_array import DataArray
@@ -111,6 +112,188 @@ class TestHDF5_Format(TestCase):
         self.formatter.close_file(data)
         self.formatter.close_file(data2)
 
+    def test_incremental_write_2D(self):
+        data = DataSet2D(location=self.loc_provider, name='test_inc_2D')
+        data_copy = DataSet2D(False)
+        for array in data.arrays.values():
+            array.clear()
+            array.modified_range = None
+
+        data.x_set[:] = data_copy.x_set
+        data.y_set[:] = data_copy.y_set
+        self.formatter.write(data)
+        dset = data._h5_base_group['Data Arrays']['z']
+        # nothing written yet
+        self.assertEqual(dset.shape, (0, 4))
+
+        z = data.z.ndarray.reshape(-1)
+        z_copy = data_copy.z.ndarray.reshape(-1)
+        for start, stop in ((0, 3), (3, 9), (9, 24)):
+            z[start:stop] = z_copy[start:stop]
+            data.z._update_modified_range(start, stop - 1)
+            self.formatter.write(data)
+            self.assertEqual(dset.shape, ((stop - 1) // 4 + 1, 4))
+            self.assertEqual(data.z.last_saved_index, stop - 1)
+            self.assertIsNone(data.z.modified_range)
+
+            # points we haven't written yet read back as NaN
+            data2 = DataSet(location=data.location, formatter=self.formatter)
+            data2.read()
+            np.testing.assert_array_equal(data2.z.ndarray.reshape(-1),
+                                          z)
+            self.formatter.close_file(data2)
+
+        # only modified points are written: change an unmodified point in
+        # the file, and it doesn't get overwritten
+        dset[0, 0] = -1
+        data.z[5, 3] = 100
+        self.formatter.write(data)
+        self.assertEqual(dset[0, 0], -1)
+        self.assertEqual(dset[5, 3], 100)
+        self.formatter.close_file(data)
+
+    def test_flat_range_regions(self):
+        shape = (2, 3, 4)
+        for start in range(24):
+            for stop in range(start + 1, 25):
+                regions = list(_flat_range_regions(shape, start, stop))
+                self.assertLessEqual(len(regions), 5)
+                counts = np.zeros(shape, dtype=int)
+                for region in regions:
+                    counts[region] += 1
+                expected = np.zeros(24, dtype=int)
+                expected[start:stop] = 1
+                np.testing.assert_array_equal(counts.reshape(-1), expected)
+
+    def test_chunk_shape(self):
+        self.assertEqual(self.formatter._chunk_shape((6, 4)), (6, 4))
+        self.assertEqual(self.formatter._chunk_shape((100, 2000)),
+                         (4, 2000))
+        self.assertEqual(self.formatter._chunk_shape((5, 10, 20000)),
+                         (1, 1, 6667))
+
+    def test_storage_options(self):
+        formatter = HDF5Format(compression='gzip', compression_opts=6,
+                               shuffle=True, chunks={'z': (2, 4)},
+                               dtypes={'z': 'float32'})
+        data = DataSet2D(location=self.loc_provider, name='test_options')
+        data.z[:] = data.z.ndarray / 3
+        formatter.write(data)
+
+        dsets = data._h5_base_group['Data Arrays']
+        self.assertEqual(dsets['z'].compression, 'gzip')
+        self.assertEqual(dsets['z'].compression_opts, 6)
+        self.assertTrue(dsets['z'].shuffle)
+        self.assertEqual(dsets['z'].chunks, (2, 4))
+        self.assertEqual(dsets['z'].dtype, np.float32)
+        self.assertEqual(dsets['x_set'].dtype, np.float64)
+        formatter.close_file(data)
+
+        data2 = DataSet(location=data.location, formatter=HDF5Format())
+        data2.read()
+        self.assertEqual(data2.z.dtype, np.float64)
+        np.testing.assert_array_equal(
+            data2.z, data.z.ndarray.astype(np.float32))
+        self.checkArraysEqual(data2.x_set, data.x_set)
+
+        options = data2.formatter.read_storage_options(data2)
+        self.assertEqual(options['compression'], 'gzip')
+        self.assertEqual(options['compression_opts'], 6)
+        self.assertEqual(options['shuffle'], True)
+        self.assertEqual(options['chunk_size'], 8192)
+        self.assertEqual(options['chunks']['z'], (2, 4))
+        self.assertEqual(options['dtypes']['z'], np.float32)
+        self.assertEqual(options['dtypes']['y_set'], np.float64)
+        # and we can make a formatter that writes the same way
+        HDF5Format(**options)
+        data2.formatter.close_file(data2)
+
+    def test_storage_option_errors(self):
+        with self.assertRaises(ValueError):
+            HDF5Format(compression='zip')
+        with self.assertRaises(ValueError):
+            HDF5Format(compression='lzf', compression_opts=4)
+        with self.assertRaises(TypeError):
+            HDF5Format(dtypes={'z': int})
+
+    def test_swmr_live_read(self):
+        formatter = HDF5Format(swmr=True)
+        data = DataSet2D(location=self.loc_provider, name='test_swmr')
+        data.formatter = formatter
+        data_copy = DataSet2D(False)
+        for array in data.arrays.values():
+            array.clear()
+            array.modified_range = None
+        data.x_set[:2] = data_copy.x_set[:2]
+        data.y_set[:2] = data_copy.y_set[:2]
+        data.z[0] = data_copy.z[0]
+        data.z[1, :2] = data_copy.z[1, :2]
+        formatter.write(data)
+        self.assertTrue(data._h5_base_group.swmr_mode)
+
+        data2 = load_data(data.location, formatter=HDF5Format(swmr=True))
+        self.assertTrue(data2._h5_base_group.swmr_mode)
+        self.assertEqual(data2._h5_rows_read, {'x_set': 2, 'y_set': 2,
+                                               'z': 2})
+        np.testing.assert_array_equal(data2.z[:2], data.z[:2])
+        self.assertTrue(np.isnan(data2.z[2:]).all())
+
+        # the structure can't change any more
+        extra = DataArray(array_id='extra', preset_data=[1., 2.])
+        data.add_array(extra)
+        with self.assertRaises(RuntimeError):
+            formatter.write(data)
+        del data.arrays['extra']
+
+        data.x_set[2:] = data_copy.x_set[2:]
+        data.y_set[2:] = data_copy.y_set[2:]
+        data.z[1:] = data_copy.z[1:]
+        formatter.write(data)
+
+        # rows 0 and 1 are not read again
+        data2.z.ndarray[0] = -1
+        self.assertFalse(data2.sync())
+        self.assertEqual(data2._h5_rows_read, {'x_set': 6, 'y_set': 6,
+                                               'z': 6})
+        np.testing.assert_array_equal(data2.z[0], -1)
+        np.testing.assert_array_equal(data2.z[1:], data_copy.z[1:])
+        np.testing.assert_array_equal(data2.y_set, data_copy.y_set)
+
+        # metadata is saved once readers are done
+        data2.formatter.close_file(data2)
+        data.metadata['extra info'] = 'finished'
+        data.finalize()
+        data.formatter.close_file(data)
+        data3 = load_data(data.location, formatter=HDF5Format(swmr=True))
+        self.assertEqual(data3.metadata['extra info'], 'finished')
+        np.testing.assert_array_equal(data3.z, data_copy.z)
+        data3.formatter.close_file(data3)
+
+    def test_read_legacy_layout(self):
+        data = DataSet2D(location=self.loc_provider, name='test_legacy')
+        self.formatter.write(data)
+        self.formatter.close_file(data)
+
+        # rewrite the arrays as flat (n, 1) datasets, as older versions did
+        filepath = self.formatter._filepath_from_location(data.location,
+                                                          data.io)
+        with h5py.File(filepath, 'r+') as f:
+            arr_group = f['Data Arrays']
+            for array_id, array in data.arrays.items():
+                attrs = dict(arr_group[array_id].attrs)
+                del arr_group[array_id]
+                dset = arr_group.create_dataset(
+                    array_id, data=array.ndarray.reshape(-1, 1),
+                    maxshape=(None, 1))
+                dset.attrs.update(attrs)
+
+        data2 = DataSet(location=data.location, formatter=self.formatter)
+        data2.read()
+        self.checkArraysEqual(data2.x_set, data.x_set)
+        self.checkArraysEqual(data2.y_set, data.y_set)
+        self.checkArraysEqual(data2.z, data.z)
+        self.formatter.close_file(data2)
+
     def test_metadata_write_read(self):
         """
         Test is based on the snapshot of the 1D dataset.
@@ -3,12 +3,17 @@ Test suite for  instument.*
 """
 from datetime import datetime, timedelta
 from unittest import TestCase
+from unittest.mock import patch
+import threading
 import time
 
 from qcodes.instrument.base import Instrument
 from qcodes.instrument.mock import MockInstrument
 from qcodes.instrument.parameter import ManualParameter
-from qcodes.instrument.server import get_instrument_server_manager
+from qcodes.instrument.remote import batch_gets
+from qcodes.instrument.server import (get_instrument_server_manager,
+                                      InstrumentServerManager)
+from qcodes.process.transport import SocketTransport
 
 from qcodes.utils.validators import Numbers, Ints, Strings, MultiType, Enum
 from qcodes.utils.command import NoCommandError
@@ -859,6 +864,27 @@ class TestInstrument(TestCase):
         self.assertEqual(len(sv2), 6)
         self.assertIn(2.2, sv2)
 
+    def test_batch(self):
+        gates, meter = self.gates, self.meter
+        self.assertEqual(gates.batch([('set', 'chan1', 2), ('get', 'chan1'),
+                                      ('add5', 1)]), [None, 2, 6])
+        with self.assertRaises(ValueError):
+            gates.batch([('get', 'chan1'), ('set', 'chan1', 1000)])
+
+        # gets on the same server are grouped together
+        getters = batch_gets([gates.chan0, gates.chan1, ManualParameter('m'),
+                              meter.amplitude])
+        self.assertEqual([indices for _, indices in getters],
+                         [[0, 1, 3], [2]])
+        gates.chan0(1)
+        amplitude = meter.amplitude()
+
+        with patch.object(gates._manager, 'ask',
+                          wraps=gates._manager.ask) as ask:
+            self.assertEqual(getters[0][0](), [1, 2, amplitude])
+        self.assertEqual(ask.call_count, 1)
+        self.assertEqual(ask.call_args[0][0], 'batch')
+
     def test_add_function(self):
         gates = self.gates
         # add a function remotely
@@ -869,6 +895,112 @@ class TestInstrument(TestCase):
         self.assertEqual(gates.chan1(), 0)
 
 
+class SlowInstrument(Instrument):
+    def __init__(self, name, **kwargs):
+        super().__init__(name, **kwargs)
+        self.fast_count = 0
+        self.add_parameter('slow', get_cmd=self._get_slow)
+        self.add_parameter('fast', get_cmd=self._get_fast)
+        self.add_parameter('fast_count', get_cmd=lambda: self.fast_count)
+
+    def _get_slow(self):
+        time.sleep(0.5)
+        return 2
+
+    def _get_fast(self):
+        self.fast_count += 1
+        return 1
+
+
+class TestConcurrentServer(TestCase):
+    def setUp(self):
+        with patch.object(InstrumentServerManager, 'default_transport',
+                          SocketTransport):
+            self.inst1 = SlowInstrument('slow1', server_name='concurrent')
+            self.inst2 = SlowInstrument('slow2', server_name='concurrent')
+
+    def tearDown(self):
+        self.inst1.close()
+        self.inst2.close()
+
+    def test_concurrent(self):
+        results = []
+
+        def get_slow():
+            results.append(self.inst1.slow())
+
+        thread = threading.Thread(target=get_slow)
+        thread.start()
+        time.sleep(0.1)
+
+        # the other instrument answers while the first one is busy
+        t0 = time.perf_counter()
+        self.assertEqual(self.inst2.fast(), 1)
+        self.assertLess(time.perf_counter() - t0, 0.2)
+        self.assertEqual(results, [])
+
+        # but the busy one finishes what it's doing first
+        self.assertEqual(self.inst1.fast(), 1)
+        self.assertEqual(results, [2])
+        thread.join()
+
+        # a batch across instruments runs in parallel too
+        manager = self.inst1._manager
+        t0 = time.perf_counter()
+        self.assertEqual(manager.batch([(self.inst1._id, 'get', 'slow'),
+                                        (self.inst2._id, 'get', 'slow'),
+                                        (self.inst1._id, 'get', 'fast')]),
+                         [2, 2, 1])
+        self.assertLess(time.perf_counter() - t0, 0.9)
+
+        with self.assertRaises(KeyError):
+            manager.batch([(self.inst1._id, 'get', 'fast'),
+                           (self.inst2._id, 'get', 'nope')])
+
+    def test_batch_error(self):
+        manager = self.inst1._manager
+        fast_count = self.inst1.fast_count()
+
+        # like a single-instrument batch, nothing after an error runs, even
+        # for another instrument
+        with self.assertRaises(KeyError):
+            manager.batch([(self.inst2._id, 'get', 'nope'),
+                           (self.inst1._id, 'get', 'slow'),
+                           (self.inst1._id, 'get', 'fast')])
+        self.assertEqual(self.inst1.fast_count(), fast_count)
+
+        # and the first error in the batch is the one reported
+        with self.assertRaises(KeyError):
+            manager.batch([(self.inst1._id, 'get', 'slow'),
+                           (self.inst1._id, 'get', 'nope'),
+                           (self.inst2._id, 'get', 'fast'),
+                           (self.inst2._id, 'nope')])
+
+    def test_delete_busy(self):
+        results = []
+
+        def get_slow():
+            results.append(self.inst1.slow())
+
+        thread = threading.Thread(target=get_slow)
+        thread.start()
+        time.sleep(0.1)
+
+        # deleting a busy instrument waits for it, but not the others
+        manager = self.inst1._manager
+        manager.delete(self.inst1._id)
+        t0 = time.perf_counter()
+        self.assertEqual(self.inst2.fast(), 1)
+        self.assertLess(time.perf_counter() - t0, 0.2)
+
+        thread.join()
+        self.assertEqual(results, [2])
+        # the delete goes back in line once the slow get is done
+        time.sleep(0.05)
+        with self.assertRaises(KeyError):
+            manager.ask('cmd', self.inst1._id, 'get', 'fast')
+
+
 class TestLocalMock(TestCase):
 
     @classmethod
@@ -0,0 +1,372 @@
+from functools import partial
+from unittest import TestCase
+import asyncio
+import socket
+import threading
+import time
+
+import numpy as np
+
+from qcodes.instrument.ip import IPInstrument, _ResponseBuffer, _copy_into
+from qcodes.utils.validators import Numbers
+
+
+class SCPIServer:
+    '''
+    A stand-in for some TCP instruments, each instrument on its own port:
+    - 'VOLT?' waits `delay` seconds, then returns the voltage
+    - 'VOLT <value>' sets the voltage and answers 'OK'
+    - 'IDLE?' returns '1' immediately
+    - 'HASH?' returns '#2 items', text that looks a bit like a block
+    - 'TRACE?' returns `trace` as an IEEE-488.2 block, in several packets
+    - 'LONG?' returns a long line of text, in several packets
+    - anything else never gets an answer
+    It runs an asyncio event loop in a separate thread.
+    '''
+    def __init__(self, count, delay):
+        self.delay = delay
+        self.volts = [0.0] * count
+        self.trace = np.linspace(0, 1, 100001)
+        self.long = ','.join(str(i) for i in range(2000))
+        self.connections = 0
+
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(count, ready),
+                                       daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    def _run(self, count, ready):
+        asyncio.set_event_loop(self.loop)
+        self.servers = []
+        for i in range(count):
+            server = self.loop.run_until_complete(asyncio.start_server(
+                self._handler(i), '127.0.0.1', 0))
+            self.servers.append(server)
+        self.ports = [s.sockets[0].getsockname()[1] for s in self.servers]
+        ready.set()
+        self.loop.run_forever()
+
+    def _handler(self, i):
+        async def handle(reader, writer):
+            self.connections += 1
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                cmd = line.decode().strip()
+                if cmd == 'VOLT?':
+                    await asyncio.sleep(self.delay)
+                    response = '{:.3f}'.format(self.volts[i])
+                elif cmd.startswith('VOLT '):
+                    self.volts[i] = float(cmd[5:])
+                    response = 'OK'
+                elif cmd == 'IDLE?':
+                    response = '1'
+                elif cmd == 'HASH?':
+                    response = '#2 items'
+                elif cmd in ('TRACE?', 'LONG?'):
+                    if cmd == 'TRACE?':
+                        payload = self.trace.tobytes()
+                        length = str(len(payload)).encode()
+                        data = (b'#' + str(len(length)).encode() + length +
+                                payload + b'\n')
+                    else:
+                        data = (self.long + '\n').encode()
+                    chunk = len(data) // 3 + 1
+                    for start in range(0, len(data), chunk):
+                        writer.write(data[start:start + chunk])
+                        await writer.drain()
+                        await asyncio.sleep(0.01)
+                    continue
+                else:
+                    continue
+                writer.write((response + '\n').encode())
+            writer.close()
+        return handle
+
+    async def _shutdown(self):
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        tasks = [task for task in asyncio.Task.all_tasks(self.loop)
+                 if task is not asyncio.Task.current_task(self.loop)]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._shutdown(),
+                                         self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class Source(IPInstrument):
+    def __init__(self, name, **kwargs):
+        super().__init__(name, server_name=None, **kwargs)
+        self.add_parameter('volt', get_cmd='VOLT?', get_parser=float,
+                           set_cmd='VOLT {:.3f}', vals=Numbers(-10, 10))
+
+
+class TestResponseBuffer(TestCase):
+    def read_all(self, stream, size, chunk, terminator=b'\n', block=True):
+        buffer = _ResponseBuffer(size)
+        position = [0]
+
+        def recv_into(space):
+            count = min(chunk, len(space), len(stream) - position[0])
+            start = position[0]
+            space[:count] = stream[start:start + count]
+            position[0] += count
+            return count
+
+        responses = []
+        while True:
+            response = buffer.next_response(terminator, block)
+            if response is not None:
+                responses.append(response)
+            elif position[0] < len(stream):
+                buffer.receive(recv_into)
+            else:
+                return responses
+
+    def test_framing(self):
+        stream = (b'1.5\n#15hello\n#0abc\nOK\n#210abcdefghij' +
+                  b'#13xyz\r\n#no block\n' + b'x' * 300 + b'\n')
+        expected = ['1.5\n', b'hello', b'abc', 'OK\n', b'abcdefghij', b'xyz',
+                    '\r\n', '#no block\n', 'x' * 300 + '\n']
+        for size in (4, 16, 1400):
+            for chunk in (1, 3, 7, 1000):
+                self.assertEqual(self.read_all(stream, size, chunk), expected,
+                                 (size, chunk))
+
+        # blocks are returned in place, without decoding
+        block = self.read_all(b'#15hello\n', 16, 3)[0]
+        self.assertIsInstance(block, bytearray)
+
+        # a two-character terminator split across packets
+        self.assertEqual(self.read_all(b'#12ab\r\nOK\r\n', 16, 1, b'\r\n'),
+                         [b'ab', 'OK\r\n'])
+
+    def test_text(self):
+        # block headers are only parsed when asked for
+        stream = b'#15hello\n#0abc\nOK\n'
+        for size in (4, 16):
+            for chunk in (1, 3, 1000):
+                self.assertEqual(
+                    self.read_all(stream, size, chunk, block=False),
+                    ['#15hello\n', '#0abc\n', 'OK\n'], (size, chunk))
+
+        # without a terminator, each response is whatever was received
+        self.assertEqual(self.read_all(stream, 16, 7, None, block=False),
+                         ['#15hell', 'o\n#0abc', '\nOK\n'])
+
+        # the terminator after a block is still skipped
+        buffer = _ResponseBuffer(16)
+        buffer.receive(partial(_copy_into, b'#12ab\n'))
+        self.assertEqual(buffer.next_response(b'\n', True), b'ab')
+        self.assertIsNone(buffer.next_response(None))
+        buffer.receive(partial(_copy_into, b'#2 items\n'))
+        self.assertEqual(buffer.next_response(None), '#2 items\n')
+
+    def test_closed(self):
+        buffer = _ResponseBuffer(16)
+        self.assertIsNone(buffer.next_response(b'\n'))
+        with self.assertRaises(ConnectionError):
+            buffer.receive(lambda space: 0)
+
+
+class TestIPInstrumentAsync(TestCase):
+    def setUp(self):
+        self.server = SCPIServer(count=5, delay=0.2)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.sources = [Source('source{}'.format(i), address='127.0.0.1',
+                               port=port, timeout=2)
+                        for i, port in enumerate(self.server.ports)]
+
+    def tearDown(self):
+        for source in self.sources:
+            source.close()
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        self.server.close()
+
+    def run_loop(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_get_set(self):
+        source = self.sources[0]
+        self.run_loop(source.volt.set_async(1.5))
+        self.assertEqual(self.server.volts[0], 1.5)
+        self.assertEqual(self.run_loop(source.volt.get_async()), 1.5)
+        self.assertEqual(source.volt.get_latest(), 1.5)
+
+        # the blocking interface still works alongside
+        source.volt.set(2)
+        self.assertEqual(self.run_loop(source.volt.get_async()), 2)
+
+        with self.assertRaises(ValueError):
+            self.run_loop(source.volt.set_async(20))
+
+    def test_concurrent(self):
+        for i, source in enumerate(self.sources):
+            source.volt(i)
+
+        # five instruments that each take 0.2 s to answer
+        t0 = time.perf_counter()
+        values = self.run_loop(asyncio.gather(
+            *(source.volt.get_async() for source in self.sources)))
+        self.assertEqual(values, [0, 1, 2, 3, 4])
+        self.assertLess(time.perf_counter() - t0, 0.6)
+
+        # queries to one instrument wait their turn
+        source = self.sources[0]
+        values = self.run_loop(asyncio.gather(
+            source.volt.get_async(), source.ask_async('IDLE?')))
+        self.assertEqual(values, [0, '1\n'])
+
+    def test_timeout_and_persistence(self):
+        source = self.sources[0]
+        source.set_timeout(0.1)
+        with self.assertRaises(asyncio.TimeoutError):
+            self.run_loop(source.ask_async('NOANSWER?'))
+        # we reconnect after an error, so the next answer is ours
+        source.set_timeout(2)
+        self.assertEqual(self.run_loop(source.ask_async('IDLE?')), '1\n')
+
+        connections = self.server.connections
+        self.run_loop(source.ask_async('IDLE?'))
+        self.assertEqual(self.server.connections, connections)
+
+        source.set_persistent(False)
+        connections = self.server.connections
+        self.run_loop(source.ask_async('IDLE?'))
+        self.run_loop(source.ask_async('IDLE?'))
+        self.assertEqual(self.server.connections, connections + 2)
+
+    def test_framed_reads(self):
+        source = self.sources[0]
+        server = self.server
+        source.set_read_terminator('\n')
+        for i in range(2):
+            trace = source.ask_block('TRACE?')
+            self.assertTrue(np.array_equal(np.frombuffer(trace), server.trace))
+            self.assertEqual(source.ask('LONG?'), server.long + '\n')
+            # the terminator after the block didn't end up in the next answer
+            self.assertEqual(source.ask('IDLE?'), '1\n')
+            # only ask_block looks for blocks
+            self.assertEqual(source.ask('HASH?'), '#2 items\n')
+
+            trace = self.run_loop(source.ask_block_async('TRACE?'))
+            self.assertTrue(np.array_equal(np.frombuffer(trace), server.trace))
+            self.assertEqual(self.run_loop(source.ask_async('LONG?')),
+                             server.long + '\n')
+            self.assertEqual(self.run_loop(source.ask_async('IDLE?')), '1\n')
+            self.assertEqual(self.run_loop(source.ask_async('HASH?')),
+                             '#2 items\n')
+
+            source.set_persistent(False)
+
+    def test_single_recv(self):
+        # without a read terminator, each response is one recv, as always
+        source = self.sources[0]
+        self.assertIsNone(source._read_terminator)
+        self.assertEqual(source.ask('HASH?'), '#2 items\n')
+        self.assertEqual(self.run_loop(source.ask_async('HASH?')),
+                         '#2 items\n')
+
+        # blocks still work, and the terminator after them is skipped
+        trace = source.ask_block('TRACE?')
+        self.assertTrue(np.array_equal(np.frombuffer(trace),
+                                       self.server.trace))
+        self.assertEqual(source.ask('IDLE?'), '1\n')
+
+    def test_closed_loop(self):
+        source, other = self.sources[:2]
+        old_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(old_loop)
+        for instrument in (source, other):
+            self.assertEqual(old_loop.run_until_complete(
+                instrument.ask_async('IDLE?')), '1\n')
+        old_loop.close()
+        asyncio.set_event_loop(self.loop)
+
+        # the connection on the closed loop is dropped and a new one made
+        self.assertEqual(self.run_loop(source.ask_async('IDLE?')), '1\n')
+
+        # closing doesn't trip over the closed loop either, and gets all
+        # the way to stripping the instrument
+        other.close()
+        self.assertFalse(hasattr(other, '_writer'))
+
+
+class TestConnectionPool(TestCase):
+    def setUp(self):
+        self.server = SCPIServer(count=1, delay=0)
+        self.sources = []
+
+    def tearDown(self):
+        for source in self.sources:
+            source.close()
+        IPInstrument.connection_pool.close()
+        self.server.close()
+
+    def make_source(self, **kwargs):
+        source = Source('source{}'.format(len(self.sources)),
+                        address='127.0.0.1', port=self.server.ports[0],
+                        timeout=2, persistent=False, **kwargs)
+        self.sources.append(source)
+        return source
+
+    def asks_per_second(self, source, count):
+        t0 = time.perf_counter()
+        for i in range(count):
+            self.assertEqual(source.ask('IDLE?'), '1\n')
+        return count / (time.perf_counter() - t0)
+
+    def test_reuse(self):
+        plain = self.make_source()
+        pooled = self.make_source(keep_alive=5)
+        shared = self.make_source(keep_alive=5)
+        count = 200
+
+        connections = self.server.connections
+        plain_rate = self.asks_per_second(plain, count)
+        self.assertEqual(self.server.connections, connections + count)
+
+        # one handshake, shared by both instruments at this address
+        connections = self.server.connections
+        pooled_rate = self.asks_per_second(pooled, count)
+        shared.volt(3)
+        self.assertEqual(shared.volt(), 3)
+        self.assertEqual(self.server.connections, connections + 1)
+
+        self.assertGreater(pooled_rate, plain_rate)
+
+    def test_expiry_and_health(self):
+        source = self.make_source(keep_alive=0.05)
+        pool = IPInstrument.connection_pool
+
+        source.ask('IDLE?')
+        connections = self.server.connections
+        time.sleep(0.1)
+        source.ask('IDLE?')
+        self.assertEqual(self.server.connections, connections + 1)
+
+        # a stray response means the connection is out of step: don't reuse
+        sock = pool.get(('127.0.0.1', self.server.ports[0]))
+        sock.send(b'IDLE?\n')
+        time.sleep(0.05)
+        pool.put(('127.0.0.1', self.server.ports[0]), sock, 5)
+        self.assertEqual(source.ask('IDLE?'), '1\n')
+        self.assertEqual(self.server.connections, connections + 2)
+
+        # nor a connection that saw an error
+        source.set_timeout(0.05)
+        with self.assertRaises(socket.timeout):
+            source.ask('NOANSWER?')
+        self.assertIsNone(pool.get(('127.0.0.1', self.server.ports[0])))
@@ -2,25 +2,29 @@ from datetime import datetime
 import logging
 import multiprocessing as mp
 import numpy as np
+import threading
 import time
 from unittest import TestCase
 from unittest.mock import patch
 
+from qcodes import config
 from qcodes.loops import (Loop, MP_NAME, get_bg, halt_bg, ActiveLoop,
                           _DebugInterrupt)
-from qcodes.actions import Task, Wait, BreakIf
+from qcodes.actions import Task, Wait, BreakIf, _Measure
 from qcodes.station import Station
 from qcodes.data.io import DiskIO
 from qcodes.data.data_array import DataArray
+from qcodes.data.data_set import DataSet
 from qcodes.data.manager import get_data_manager
 from qcodes.instrument.parameter import Parameter, ManualParameter
+from qcodes.instrument.sweep_values import SweepValues
 from qcodes.process.helpers import kill_processes
 from qcodes.process.qcodes_process import QcodesProcess
 from qcodes.utils.validators import Numbers
 from qcodes.utils.helpers import LogCapture
 
 from .instrument_mocks import (AMockModel, MockGates, MockSource, MockMeter,
-                               MultiGetter)
+                               MultiGetter, BufferedSource, BufferedReader)
 
 
 class TestMockInstLoop(TestCase):
@@ -170,6 +174,22 @@ class TestMockInstLoop(TestCase):
 
         self.check_loop_data(data)
 
+    def test_batched_gets(self):
+        c0, c1 = self.gates.chan0, self.gates.chan1
+        loop = Loop(c1[1:5:1], 0.001).each(c0, c1, self.meter.amplitude)
+        manager = self.gates._manager
+        with patch.object(manager, 'ask', wraps=manager.ask) as ask:
+            data = loop.run(location=self.location, background=False,
+                            data_manager=False, quiet=True)
+        self.check_loop_data(data)
+        self.assertEqual(data.gates_chan0.tolist(), [0] * 4)
+
+        # one query per point for all three measurements
+        batches = [call for call in ask.call_args_list
+                   if call[0][0] == 'batch']
+        self.assertEqual(len(batches), 4)
+        self.assertEqual(len(batches[0][0][1]), 3)
+
     def test_enqueue(self):
         c1 = self.gates.chan1
         loop = Loop(c1[1:5:1], 0.01).each(c1)
@@ -283,6 +303,24 @@ class TestLoop(TestCase):
         self.assertEqual(data.p2.tolist(), [[[3, 3], [4, 4]]] * 2)
         self.assertEqual(data.p3.tolist(), [[[5, 6]] * 2] * 2)
 
+    def test_compile_once(self):
+        loop = Loop(self.p1[1:4:1]).loop(self.p2[1:5:1]).each(
+            self.p1, self.p2, Wait(0))
+        with patch('qcodes.loops._Measure', autospec=True,
+                   side_effect=_Measure) as measure:
+            data = loop.run_temp(buffer_rows=True)
+        # only one _Measure for the whole run, not one per outer setpoint
+        self.assertEqual(measure.call_count, 1)
+        self.assertEqual(data.p1.tolist(), [[1] * 4, [2] * 4, [3] * 4])
+        self.assertEqual(data.p2.tolist(), [[1, 2, 3, 4]] * 3)
+
+        # the same ActiveLoop can be nested twice, with separate plans
+        inner = Loop(self.p2[1:3:1]).each(self.p2)
+        data = Loop(self.p1[1:3:1]).each(inner, self.p3, inner).run_temp()
+        for action_indices in ((0, 0), (2, 0)):
+            array = data.arrays[data.action_id_map[action_indices]]
+            self.assertEqual(array.tolist(), [[1, 2]] * 2)
+
     def test_nesting_2(self):
         loop = Loop(self.p1[1:3:1]).each(
             self.p1,
@@ -565,6 +603,85 @@ class TestLoop(TestCase):
 
         self.assertEqual(logs.value.count('negative delay'), 0, logs.value)
 
+    def test_empty_sweep(self):
+        data = Loop(self.p1[[]]).each(self.p2).run_temp()
+        self.assertEqual(data.p1_set.tolist(), [])
+        self.assertEqual(data.p2.tolist(), [])
+
+        # also with a progress note, which counts the points
+        data = Loop(self.p1[[]]).each(self.p2).run_temp(
+            progress_interval=1)
+        self.assertEqual(data.p2.tolist(), [])
+
+    def test_wait_stats(self):
+        loop = Loop(self.p1[1:4:1], 0.005).each(
+            Loop(self.p2[1:3:1], 0.002).each(self.p3))
+        data = loop.run_temp()
+
+        # the outer delay is inherited by the first inner point
+        scheduler = loop.scheduler
+        self.assertIs(loop.actions[0].scheduler, scheduler)
+
+        wait_stats = data.metadata['loop']['wait_stats']
+        self.assertEqual(wait_stats, scheduler.stats())
+        self.assertEqual(wait_stats['count'], 6)
+        self.assertAlmostEqual(wait_stats['requested_total'], 0.021)
+        # never early
+        self.assertGreaterEqual(wait_stats['min'], 0)
+        # generous, timing in tests is noisy
+        self.assertLess(wait_stats['mean'], 0.002)
+
+        with patch.dict(config['core'], {'wait_stats': False}):
+            data = loop.run_temp()
+        self.assertEqual(loop.scheduler.count, 0)
+        self.assertNotIn('wait_stats', data.metadata['loop'])
+
+    def test_record_timing(self):
+        loop = Loop(self.p1[1:3:1], 0.002).each(
+            Loop(self.p2[1:4:1]).each(self.p3, Wait(0.003)))
+        data = loop.run_temp(record_timing=True)
+        self.assertTrue(data.metadata['loop']['record_timing'])
+
+        timing_arrays = [data.p3_get_time]
+        for name in ('timestamp', 'set_time', 'wait_time', 'wait_requested',
+                     'wait_actual', 'store_time', 'write_time'):
+            self.assertEqual(data.arrays['p1_' + name].shape, (2,))
+            self.assertEqual(data.arrays['p2_' + name].shape, (2, 3))
+            timing_arrays += [data.arrays['p1_' + name],
+                              data.arrays['p2_' + name]]
+        self.assertEqual(data.p3_get_time.shape, (2, 3))
+        for array in timing_arrays:
+            self.assertFalse(np.isnan(array.ndarray).any(), array.array_id)
+            self.assertTrue((array.ndarray >= 0).all(), array.array_id)
+
+        # timestamps are monotonic, inner points come after their outer one
+        inner_ts = data.p2_timestamp.ndarray
+        self.assertTrue((np.diff(inner_ts.flatten()) > 0).all())
+        self.assertTrue((inner_ts[:, 0] >= data.p1_timestamp.ndarray).all())
+
+        # the outer delay is waited by the first inner point, plus the Wait
+        self.assertEqual(data.p1_wait_time.tolist(), [0, 0])
+        wait_time = data.p2_wait_time.ndarray
+        self.assertTrue((wait_time[:, 0] >= 0.005).all())
+        self.assertTrue((wait_time >= 0.003).all())
+        # generous, timing in tests is noisy
+        self.assertTrue((wait_time < 0.05).all())
+
+        # the requested and actual wait of each point, never early
+        self.assertEqual(data.p1_wait_requested.tolist(), [0, 0])
+        self.assertEqual(data.p1_wait_actual.tolist(), [0, 0])
+        requested = data.p2_wait_requested.ndarray
+        np.testing.assert_allclose(requested, [[0.005, 0.003, 0.003]] * 2)
+        actual = data.p2_wait_actual.ndarray
+        self.assertTrue((actual >= requested).all())
+        self.assertTrue((actual < requested + 0.05).all())
+
+        # only when asked for
+        data = loop.run_temp()
+        self.assertFalse(data.metadata['loop']['record_timing'])
+        self.assertNotIn('p1_timestamp', data.arrays)
+        self.assertNotIn('p3_get_time', data.arrays)
+
     def test_breakif(self):
         nan = float('nan')
         loop = Loop(self.p1[1:6:1])
@@ -581,6 +698,106 @@ class TestLoop(TestCase):
         with self.assertRaises(TypeError):
             BreakIf(self.p1.set)
 
+    def test_buffer_rows(self):
+        mg = MultiGetter(arr=(4, 5, 6))
+        loop = Loop(self.p1[1:3:1]).loop(self.p2[3:6:1]).each(
+            self.p1, self.p2, mg)
+        data = loop.run_temp()
+
+        with patch.object(DataSet, 'store', autospec=True,
+                          side_effect=DataSet.store) as store:
+            data2 = loop.run_temp(buffer_rows=True)
+        # one store for each outer setpoint, one for each inner row
+        self.assertEqual(store.call_count, 4)
+        self.assertEqual(store.call_args[0][1], (1, slice(0, 3)))
+
+        self.assertEqual(set(data.arrays), set(data2.arrays))
+        for array_id, array in data.arrays.items():
+            self.assertEqual(data2.arrays[array_id].tolist(), array.tolist())
+        self.assertEqual(data2.arr.tolist(), [[[4, 5, 6]] * 3] * 2)
+
+        # a partial row is stored too, even if not all arrays reached the
+        # last point
+        nan = float('nan')
+        loop = Loop(self.p1[1:6:1])
+        data = loop.each(BreakIf(self.p1.get_latest >= 3),
+                         self.p1).run_temp(buffer_rows=True)
+        self.assertEqual(repr(data.p1_set.tolist()),
+                         repr([1., 2., 3., nan, nan]))
+        self.assertEqual(repr(data.p1.tolist()),
+                         repr([1., 2., nan, nan, nan]))
+
+    def test_use_threads(self):
+        inst1, inst2 = FakeInstrument('inst1'), FakeInstrument('inst2')
+        a = ThreadGetter('a', 1, instrument=inst1)
+        b = ThreadGetter('b', 2, instrument=inst1)
+        c = ThreadGetter('c', 3, instrument=inst2)
+        d = ThreadGetter('d', 4)
+        loop = Loop(self.p1[1:3:1]).loop(self.p2[1:4:1]).each(a, b, c, d)
+        data = loop.run_temp(use_threads=True)
+
+        for param in (a, b, c, d):
+            self.assertEqual(data.arrays[param.full_name].tolist(),
+                             [[param.value] * 3] * 2)
+            self.assertEqual(len(param.threads), 6)
+        # one instrument's gets are never concurrent, and the same few
+        # threads do all the gets of the whole run
+        self.assertFalse(inst1.overlapped)
+        self.assertEqual(a.threads, b.threads)
+        self.assertLessEqual(len(set(a.threads + c.threads + d.threads)), 3)
+        self.assertIsNone(loop._executor)
+        self.assertIsNone(loop.actions[0]._executor)
+
+        # with only one instrument there is nothing to parallelize
+        a.threads[:] = []
+        Loop(self.p1[1:3:1]).each(a, b).run_temp(use_threads=True)
+        self.assertEqual(set(a.threads), {threading.get_ident()})
+
+    def test_buffered_sweep(self):
+        source = BufferedSource('source', vals=Numbers(-10, 10))
+        square = BufferedReader('square', source, lambda v: v ** 2)
+        cube = BufferedReader('cube', source, lambda v: v ** 3)
+
+        loop = Loop(self.p1[1:4:1]).loop(source[1:5:1], 0.01).each(
+            square, cube)
+        with patch.object(DataSet, 'store', autospec=True,
+                          side_effect=DataSet.store) as store:
+            data = loop.run_temp()
+        # one sweep and one store per row, plus the outer setpoints
+        self.assertEqual(source.sweep_count, 3)
+        self.assertEqual(store.call_count, 6)
+        self.assertEqual(source.sweep_delay, 0.01)
+        self.assertEqual(data.source_set.tolist(), [[1, 2, 3, 4]] * 3)
+        self.assertEqual(data.square.tolist(), [[1, 4, 9, 16]] * 3)
+        self.assertEqual(data.cube.tolist(), [[1, 8, 27, 64]] * 3)
+
+        # anything else in the loop means setting every point
+        data2 = Loop(source[1:5:1]).each(square, Wait(0), cube).run_temp()
+        self.assertEqual(source.sweep_count, 3)
+        self.assertEqual(data2.square.tolist(), [1, 4, 9, 16])
+        self.assertEqual(data2.cube.tolist(), [1, 8, 27, 64])
+
+    def test_feedback_sweep(self):
+        q = ManualParameter('q')
+        sweep = FeedbackSweep(q, lambda: 20)
+        data = Loop(sweep).each(q).run_temp()
+        # more points than ActiveLoop.initial_length, trimmed at the end
+        self.assertEqual(data.q_set.tolist(), list(range(21)))
+        self.assertEqual(data.q.tolist(), list(range(21)))
+        self.assertEqual(sweep.feedbacks[:2], [((0,), [0]), ((1,), [1])])
+
+        # an adaptive inner loop can have a different length in every row
+        nan = float('nan')
+        sweep = FeedbackSweep(self.p1, self.p2.get)
+        data = Loop(self.p2[[2, 5, 3]]).each(
+            Loop(sweep).each(self.p1, self.p2)).run_temp(buffer_rows=True)
+        self.assertEqual(data.p1_set.shape, (3, 6))
+        self.assertEqual(repr(data.p1.tolist()), repr([
+            [0., 1., 2., nan, nan, nan],
+            [0., 1., 2., 3., 4., 5.],
+            [0., 1., 2., 3., nan, nan]]))
+        self.assertEqual(sweep.feedbacks[0], ((2, 0), [0, 2]))
+
     def test_then_construction(self):
         loop = Loop(self.p1[1:6:1])
         task1 = Task(self.p1.set, 2)
@@ -668,6 +885,11 @@ class TestLoop(TestCase):
         self.check_snap_ts(default_meas_meta[1], 'ts', (ts1, ts2, None))
         del p1snap['ts'], p2snap['ts'], p3snap['ts']
 
+        # the only wait was the Wait(0.01)
+        wait_stats = loopmeta.pop('wait_stats')
+        self.assertEqual(wait_stats['count'], 1)
+        self.assertAlmostEqual(wait_stats['requested_total'], 0.01)
+
         self.assertEqual(data.metadata, {
             'station': {
                 'instruments': {},
@@ -678,6 +900,8 @@ class TestLoop(TestCase):
             'loop': {
                 'background': False,
                 'use_threads': False,
+                'buffer_rows': False,
+                'record_timing': False,
                 'use_data_manager': False,
                 '__class__': 'qcodes.loops.ActiveLoop',
                 'sweep_values': {
@@ -726,6 +950,57 @@ class TestLoop(TestCase):
         self.assertEqual(len(f_calls), 1)
 
 
+class FeedbackSweep(SweepValues):
+    """Steps up from 0 until the measured value reaches limit()."""
+    def __init__(self, parameter, limit):
+        super().__init__(parameter)
+        self.limit = limit
+        self.feedbacks = []
+
+    def __iter__(self):
+        self._next = 0
+        self._done = False
+        return self
+
+    def __next__(self):
+        if self._done:
+            raise StopIteration
+        self._next += 1
+        return self._next - 1
+
+    def feedback(self, set_values, measured_values):
+        self.feedbacks.append((set_values, measured_values))
+        if measured_values[0] >= self.limit():
+            self._done = True
+
+
+class FakeInstrument:
+    def __init__(self, name):
+        self.name = name
+        self.busy = False
+        self.overlapped = False
+
+
+class ThreadGetter(Parameter):
+    """Records which threads call its get, and any overlapping gets."""
+    def __init__(self, name, value, instrument=None):
+        super().__init__(name)
+        self._instrument = instrument
+        self.value = value
+        self.threads = []
+
+    def get(self):
+        self.threads.append(threading.get_ident())
+        instrument = self._instrument
+        if instrument is not None:
+            if instrument.busy:
+                instrument.overlapped = True
+            instrument.busy = True
+            time.sleep(0.002)
+            instrument.busy = False
+        return self.value
+
+
 class AbortingGetter(ManualParameter):
     '''
     A manual parameter that can only be measured a couple of times
@@ -1,4 +1,5 @@
 from unittest import TestCase, skipIf
+import threading
 import time
 import re
 import sys
@@ -10,7 +11,9 @@ import qcodes
 from qcodes.process.helpers import set_mp_method, kill_queue
 from qcodes.process.qcodes_process import QcodesProcess
 from qcodes.process.stream_queue import get_stream_queue, _SQWriter
-from qcodes.process.server import ServerManager, RESPONSE_OK, RESPONSE_ERROR
+from qcodes.process.server import (ServerManager, BaseServer, RESPONSE_OK,
+                                   RESPONSE_ERROR)
+from qcodes.process.transport import SocketTransport
 import qcodes.process.helpers as qcmp
 from qcodes.utils.helpers import in_notebook, LogCapture
 from qcodes.utils.timing import calibrate
@@ -469,3 +472,75 @@ class TestServerManager(TestCase):
         sm._server = HorribleProcess()
 
         sm.halt()
+
+
+class EchoServer(BaseServer):
+    def __init__(self, query_queue, response_queue, extras=None):
+        super().__init__(query_queue, response_queue, extras)
+        self.run_event_loop()
+
+    def handle_echo(self, value):
+        return value
+
+    def handle_sleep(self, delay):
+        time.sleep(delay)
+        return delay
+
+    def handle_fail(self):
+        raise ValueError('on purpose')
+
+
+def ask_echo(manager, value, queue):
+    queue.put(manager.ask('echo', value))
+
+
+class TestSocketTransport(TestCase):
+    def setUp(self):
+        self.sm = ServerManager(name='echo', server_class=EchoServer,
+                                transport=SocketTransport())
+
+    def tearDown(self):
+        self.sm.close()
+
+    def test_ask_write(self):
+        sm = self.sm
+        self.assertEqual(sm.ask('echo', [1, 2]), [1, 2])
+        sm.write('echo', 3)
+        self.assertEqual(sm.ask('echo', 4), 4)
+
+        with self.assertRaises(ValueError):
+            sm.ask('fail')
+
+        # a late response is dropped, not given to the next query
+        with LogCapture() as logs:
+            with self.assertRaises(Empty):
+                sm.ask('sleep', 0.2, timeout=0.05)
+            self.assertEqual(sm.ask('echo', 5), 5)
+        self.assertIn('discarding late response', logs.value)
+
+        sm.restart()
+        self.assertEqual(sm.ask('echo', 6), 6)
+
+    def test_concurrent(self):
+        # threads don't wait for each other's queries, and each gets
+        # its own response
+        results = {}
+
+        def ask(i):
+            results[i] = self.sm.ask('echo', i)
+
+        threads = [threading.Thread(target=ask, args=(i,))
+                   for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {i: i for i in range(20)})
+
+        # and other processes make their own connections
+        queue = mp.Queue()
+        p = mp.Process(target=ask_echo, args=(self.sm, 'hi', queue))
+        p.start()
+        self.assertEqual(queue.get(timeout=10), 'hi')
+        p.join()
+        self.assertEqual(self.sm.ask('echo', 'still here'), 'still here')
@@ -0,0 +1,79 @@
+from unittest import TestCase
+import time
+
+from qcodes.utils.helpers import LogCapture
+from qcodes.utils.timing import sleep_until, DeadlineScheduler
+
+
+class TestSleepUntil(TestCase):
+    def test_deadline(self):
+        for spin_time in [0, 0.002]:
+            for secs in [0.0005, 0.003, 0.03]:
+                finish_clock = time.perf_counter() + secs
+                late = sleep_until(finish_clock, spin_time=spin_time)
+                now = time.perf_counter()
+                # never early, and it reports how late it was
+                self.assertGreaterEqual(now, finish_clock)
+                self.assertGreaterEqual(late, 0)
+                self.assertLessEqual(late, now - finish_clock)
+
+    def test_check(self):
+        calls = []
+        sleep_until(time.perf_counter() + 0.05, spin_time=0,
+                    check=lambda: calls.append(1), check_period=0.01)
+        self.assertGreaterEqual(len(calls), 5)
+
+        # checks at least once even if the deadline has passed
+        calls[:] = []
+        sleep_until(time.perf_counter() - 1,
+                    check=lambda: calls.append(1))
+        self.assertEqual(len(calls), 1)
+
+
+class TestDeadlineScheduler(TestCase):
+    def test_record(self):
+        scheduler = DeadlineScheduler(spin_time=0.002, record=True)
+        self.assertEqual(scheduler.stats(), {'count': 0, 'spin_time': 0.002})
+
+        start = time.perf_counter()
+        scheduler.wait(0.005, start)
+        scheduler.wait(0.001)
+
+        stats = scheduler.stats()
+        self.assertEqual(stats['count'], 2)
+        self.assertAlmostEqual(stats['requested_total'], 0.006)
+        # never early
+        self.assertGreaterEqual(stats['min'], 0)
+        self.assertGreaterEqual(stats['max'], stats['mean'])
+        self.assertGreaterEqual(stats['mean'], stats['min'])
+        self.assertGreaterEqual(stats['std'], 0)
+
+    def test_running_stats(self):
+        scheduler = DeadlineScheduler(spin_time=0.002, record=True)
+        errors = [0.001, 0.004, 0.0, 0.003]
+        for error in errors:
+            scheduler._add(0.01, error)
+
+        mean = sum(errors) / 4
+        std = (sum((e - mean) ** 2 for e in errors) / 4) ** 0.5
+        stats = scheduler.stats()
+        self.assertEqual(stats['count'], 4)
+        self.assertAlmostEqual(stats['requested_total'], 0.04)
+        self.assertAlmostEqual(stats['mean'], mean)
+        self.assertAlmostEqual(stats['std'], std)
+        self.assertEqual(stats['min'], 0)
+        self.assertEqual(stats['max'], 0.004)
+
+    def test_no_record(self):
+        scheduler = DeadlineScheduler(record=False)
+        scheduler.wait(0.001)
+        self.assertEqual(scheduler.count, 0)
+        self.assertEqual(scheduler.stats()['count'], 0)
+
+    def test_passed_deadline(self):
+        scheduler = DeadlineScheduler(record=True)
+        with LogCapture() as logs:
+            late = scheduler.wait_until(time.perf_counter() - 0.01)
+
+        self.assertGreaterEqual(late, 0.01)
+        self.assertEqual(logs.value.count('negative delay'), 1, logs.value)
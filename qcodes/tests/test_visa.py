@@ -1,9 +1,20 @@
-from unittest import TestCase
+from unittest import TestCase, skipIf
 from unittest.mock import patch
+import os
+import string
+import tempfile
+import numpy as np
 import visa
 from qcodes.instrument.visa import VisaInstrument
+from qcodes.instrument_drivers.rohde_schwarz.ZNB20 import ZNB20
 from qcodes.utils.validators import Numbers
 
+try:
+    visa.ResourceManager('@sim')
+    noSim = False
+except Exception:
+    noSim = True
+
 
 class MockVisa(VisaInstrument):
     def __init__(self, *args, **kwargs):
@@ -182,3 +193,139 @@ class TestVisaInstrument(TestCase):
         self.assertEqual(rm_mock.call_count, 3)
         self.assertEqual(rm_mock.call_args, (('@py',),))
         self.assertEqual(address_opened[0], 'ASRL3')
+
+
+SIM_YAML = """
+spec: "1.0"
+devices:
+  ZNB20:
+    eom:
+      TCPIP INSTR:
+        q: "\\r\\n"
+        r: "\\n"
+    dialogues:
+      - q: "*IDN?"
+        r: "Rohde-Schwarz,ZNB20-2Port,1311601062101474,2.80"
+      - q: "CALC:DATA? SDAT"
+        r: "{binary}"
+      - q: "CALC:DATA:ASCII? SDAT"
+        r: "{ascii}"
+    properties:
+{properties}
+resources:
+  TCPIP::znb20::INSTR:
+    device: ZNB20
+"""
+
+SIM_PROPERTY = """
+      {name}:
+        default: {default}
+        getter:
+          q: "{cmd}?"
+          r: "{{:.0f}}"
+        setter:
+          q: "{cmd} {{:f}}"
+        specs:
+          type: float
+"""
+
+
+def make_trace(npts):
+    # random alphanumeric bytes, so the binary block survives the yaml
+    # file and can't contain the termination character
+    chars = np.frombuffer((string.ascii_letters + string.digits).encode(),
+                          dtype=np.uint8)
+    payload = np.random.choice(chars, 8 * npts).astype(np.uint8).tobytes()
+    binary = '#{}{}{}'.format(len(str(len(payload))), len(payload),
+                              payload.decode())
+    values = np.frombuffer(payload, dtype='<f4')
+    ascii = ','.join(repr(float(v)) for v in values)
+    return values, binary, ascii
+
+
+def make_sim_file(npts):
+    """
+    Write a pyvisa-sim file for a ZNB20 with a random trace of npts
+    complex points, available both as a binary block and as ascii.
+
+    Returns:
+        Tuple[np.ndarray, str]: the trace values, and the path of the file,
+            which the caller should remove.
+    """
+    values, binary, ascii = make_trace(npts)
+    properties = ''.join(SIM_PROPERTY.format(name=name, cmd=cmd,
+                                             default=default)
+                         for name, cmd, default in (
+                             ('power', 'SOUR:POW', -50),
+                             ('bandwidth', 'SENS:BAND', 1000),
+                             ('avg', 'AVER:COUN', 1),
+                             ('start', 'SENS:FREQ:START', 1e6),
+                             ('stop', 'SENS:FREQ:STOP', 2e6),
+                             ('npts', 'SENS:SWE:POIN', 10)))
+    fd, sim_file = tempfile.mkstemp(suffix='.yaml')
+    with os.fdopen(fd, 'w') as f:
+        f.write(SIM_YAML.format(binary=binary, ascii=ascii,
+                                properties=properties))
+    return values, sim_file
+
+
+class SimZNB20(ZNB20):
+    def __init__(self, *args, sim_file, **kwargs):
+        self.sim_file = sim_file
+        super().__init__(*args, **kwargs)
+
+    def set_address(self, address):
+        self.visa_handle = visa.ResourceManager(
+            self.sim_file + '@sim').open_resource(address)
+        self._address = address
+
+    def write_raw(self, cmd):
+        # pyvisa-sim doesn't return (count, status) from write
+        self.visa_handle.write(cmd)
+
+
+@skipIf(noSim, '***pyvisa-sim is not installed***')
+class TestBinaryValues(TestCase):
+    npts = 2000
+
+    def setUp(self):
+        self.values, self.sim_file = make_sim_file(self.npts)
+        self.znb = SimZNB20('znb20', address='TCPIP::znb20::INSTR',
+                            sim_file=self.sim_file, terminator='\n',
+                            server_name=None)
+
+    def tearDown(self):
+        self.znb.close()
+        os.remove(self.sim_file)
+
+    def test_ask_binary_values(self):
+        data = self.znb.ask_binary_values('CALC:DATA? SDAT')
+        self.assertEqual(data.dtype, np.float32)
+        self.assertTrue(np.array_equal(data, self.values))
+
+        # the same bytes, read as big-endian doubles
+        data = self.znb.ask_binary_values('CALC:DATA? SDAT', datatype='d',
+                                          is_big_endian=True)
+        expected = self.values.view('>f8')
+        self.assertTrue(np.array_equal(data, expected))
+
+        with self.assertRaises(ValueError) as e:
+            self.znb.ask_binary_values('*IDN?')
+        self.assertIn("asking binary values '*IDN?' to <SimZNB20: znb20>",
+                      e.exception.args)
+
+    def test_trace(self):
+        self.znb.npts(self.npts // 2)
+        mag, phase = self.znb.trace()
+        expected = self.values[0::2] + 1j * self.values[1::2]
+        self.assertTrue(np.allclose(mag, np.abs(expected)))
+        self.assertTrue(np.allclose(phase, np.angle(expected)))
+
+    def test_ascii_values(self):
+        # the ascii version of the trace reads the same values
+        binary = self.znb.ask_binary_values('CALC:DATA? SDAT')
+        ascii = self.znb.ask('CALC:DATA:ASCII? SDAT').split(',')
+        ascii = np.array([float(v) for v in ascii])
+        self.assertEqual(len(binary), 2 * self.npts)
+        self.assertTrue(np.array_equal(binary, self.values))
+        self.assertTrue(np.array_equal(ascii, self.values))
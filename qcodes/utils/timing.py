@@ -1,6 +1,9 @@
 import time
 import multiprocessing as mp
 
+from qcodes import config
+from qcodes.utils.helpers import wait_secs
+
 
 sleep_time = 0.001
 
@@ -87,3 +90,160 @@ def mptest(n=100, d=0.001, timer=time.perf_counter, quiet=False):
     out['finish_time'] = time.time() - out['finish_time']
     out['blocking_time'] = blocking_time
     return out
+
+
+def sleep_until(finish_clock, spin_time=None, check=None, check_period=1):
+    """
+    Wait until ``time.perf_counter()`` reaches ``finish_clock``.
+
+    ``time.sleep`` often wakes up a millisecond or more late (see ``mptest``),
+    which matters for short delays. So we sleep until ``spin_time`` before
+    the deadline, then spin on the clock for the rest.
+
+    Args:
+        finish_clock (float): the deadline, a ``time.perf_counter()`` value.
+        spin_time (Optional[float]): how long before the deadline to stop
+            sleeping and start spinning, in seconds. 0 only sleeps.
+            Default ``config['core']['wait_spin_time']``.
+        check (Optional[callable]): called before each sleep, so at least
+            every ``check_period`` seconds, eg to look for a halt signal.
+        check_period (float): the longest sleep between ``check`` calls.
+
+    Returns:
+        float: how many seconds after the deadline we returned.
+    """
+    if spin_time is None:
+        spin_time = config['core']['wait_spin_time']
+
+    sleep_clock = finish_clock - spin_time
+    while True:
+        if check is not None:
+            check()
+        t = sleep_clock - time.perf_counter()
+        if t <= 0:
+            break
+        time.sleep(min(t, check_period))
+        if t <= check_period:
+            break
+
+    now = time.perf_counter()
+    while now < finish_clock:
+        # sleep(0) lets other threads run while we spin
+        time.sleep(0)
+        now = time.perf_counter()
+    return now - finish_clock
+
+
+class DeadlineScheduler:
+    """
+    Waits until absolute deadlines with ``sleep_until``, and keeps running
+    statistics of how long each wait really took compared to the delay
+    that was asked for. Only the statistics are kept, not every wait, so
+    this is fine for loops of any length.
+
+    Args:
+        spin_time (Optional[float]): see ``sleep_until``.
+            Default ``config['core']['wait_spin_time']``.
+        check (Optional[callable]): see ``sleep_until``.
+        check_period (float): see ``sleep_until``. Default 1.
+        record (Optional[bool]): whether to keep statistics of the waits.
+            Default ``config['core']['wait_stats']``.
+
+    Attributes:
+        count (int): how many waits were recorded.
+        requested_total (float): the sum of the delays asked for in those
+            waits, each from its start to its deadline.
+    """
+    def __init__(self, spin_time=None, check=None, check_period=1,
+                 record=None):
+        if spin_time is None:
+            spin_time = config['core']['wait_spin_time']
+        if record is None:
+            record = config['core']['wait_stats']
+        self.spin_time = spin_time
+        self.check = check
+        self.check_period = check_period
+        self.record = record
+
+        self.count = 0
+        self.requested_total = 0
+        # running mean and sum of squared deviations of the errors
+        # (Welford's algorithm), and their extremes
+        self._mean = 0
+        self._m2 = 0
+        self._min = None
+        self._max = None
+
+    def wait(self, delay, start=None):
+        """
+        Wait until ``delay`` seconds after ``start``.
+
+        Args:
+            delay (float): seconds to wait.
+            start (Optional[float]): a ``time.perf_counter()`` value to
+                count the delay from, eg when a parameter was set, so time
+                spent since then is not added to the delay. Default now.
+
+        Returns:
+            float: how many seconds after the deadline we returned.
+        """
+        if start is None:
+            start = time.perf_counter()
+        return self.wait_until(start + delay, start)
+
+    def wait_until(self, finish_clock, start=None):
+        """
+        Wait until the ``time.perf_counter()`` value ``finish_clock``.
+
+        Args:
+            finish_clock (float): the deadline.
+            start (Optional[float]): when the delay started, for the
+                record. Default now.
+
+        Returns:
+            float: how many seconds after the deadline we returned.
+        """
+        if start is None:
+            start = time.perf_counter()
+        # just to log a warning if the deadline has already passed
+        wait_secs(finish_clock)
+        late = sleep_until(finish_clock, self.spin_time, self.check,
+                           self.check_period)
+        if self.record:
+            self._add(finish_clock - start, late)
+        return late
+
+    def _add(self, requested, error):
+        self.count += 1
+        self.requested_total += requested
+
+        delta = error - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (error - self._mean)
+
+        if self._min is None or error < self._min:
+            self._min = error
+        if self._max is None or error > self._max:
+            self._max = error
+
+    def stats(self):
+        """
+        Summarize the recorded waits.
+
+        Returns:
+            dict: ``count`` waits, ``spin_time``, the ``requested_total``
+                delay, and the ``mean``, ``std``, ``min`` and ``max`` of
+                the error (actual - requested delay), all in seconds.
+        """
+        out = {'count': self.count, 'spin_time': self.spin_time}
+        if not self.count:
+            return out
+
+        out.update({
+            'requested_total': self.requested_total,
+            'mean': self._mean,
+            'std': (self._m2 / self.count) ** 0.5,
+            'min': self._min,
+            'max': self._max
+        })
+        return out